@@ -0,0 +1,43 @@
+import sys
+from time import time
+
+from n_in_a_row.config import load_config
+from n_in_a_row.game_state import GameAnnotator
+from n_in_a_row.game_state.game_annotator import read_game_records, write_annotations
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+
+
+# Annotates every move of the game records with the result and the best move of the position
+# before it, and whether the move was a blunder, from the tree solved into the vault.
+# The records and the annotations are streamed, see the annotate config.
+# Usage: python -m n_in_a_row.annotate_games rows cols chips_in_a_row records_path [annotations_path]
+
+
+if __name__ == '__main__':
+    config = load_config().get('annotate', {})
+    rows, cols, chips_in_a_row = (int(arg) for arg in sys.argv[1:4])
+    records_path = sys.argv[4]
+    annotations_path = sys.argv[5] if len(sys.argv) > 5 else None
+
+    annotator = GameAnnotator(
+        GameStateVault(),
+        rows=rows,
+        cols=cols,
+        chips_in_a_row=chips_in_a_row,
+        canonical=config.get('canonical', False)
+    )
+    start = time()
+    with open(records_path) as records_file:
+        annotations = annotator.annotate(read_game_records(records_file))
+        if annotations_path is None:
+            write_annotations(annotations, sys.stdout)
+        else:
+            with open(annotations_path, 'w') as annotations_file:
+                write_annotations(annotations, annotations_file)
+    end = time()
+
+    print(
+        f'{annotator.moves} moves, {annotator.positions} positions in {end - start:.2f} secs, '
+        f'{annotator.positions / (end - start):.0f} positions/sec',
+        file=sys.stderr
+    )
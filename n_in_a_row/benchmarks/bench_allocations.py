@@ -0,0 +1,74 @@
+import sys
+from time import time
+from typing import Callable
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid, BitGrid, GridIndex
+
+
+# Counts the GridIndex objects allocated per node expanded by a depth-first walk with
+# push and pop, for move generation by get_possible_moves and by iter_possible_cols.
+# Usage: python -m n_in_a_row.benchmarks.bench_allocations [rows cols chips_in_a_row depth]
+
+
+def walk_by_moves(grid, chip: Chip, chips_in_a_row: int, depth: int) -> int:
+    if depth == 0 or grid.get_win_state(chips_in_a_row) is not None:
+        return 1
+    nodes = 1
+    for index in grid.get_possible_moves():
+        grid.push(index.col, chip)
+        nodes += walk_by_moves(grid, chip.swap_chip(), chips_in_a_row, depth - 1)
+        grid.pop()
+    return nodes
+
+
+def walk_by_cols(grid, chip: Chip, chips_in_a_row: int, depth: int) -> int:
+    if depth == 0 or grid.get_win_state(chips_in_a_row) is not None:
+        return 1
+    nodes = 1
+    for col in grid.iter_possible_cols():
+        grid.push(col, chip)
+        nodes += walk_by_cols(grid, chip.swap_chip(), chips_in_a_row, depth - 1)
+        grid.pop()
+    return nodes
+
+
+def count_grid_indexes(walk: Callable[[], int]) -> float:
+    created = 0
+    original_init = GridIndex.__init__
+
+    def counting_init(self, row: int, col: int):
+        nonlocal created
+        created += 1
+        original_init(self, row, col)
+
+    GridIndex.__init__ = counting_init
+    try:
+        nodes = walk()
+    finally:
+        GridIndex.__init__ = original_init
+    return created / nodes
+
+
+def measure(rows: int, cols: int, chips_in_a_row: int, depth: int) -> None:
+    for grid_cls in (Grid, BitGrid):
+        for walk_name, walk_fn in (('get_possible_moves', walk_by_moves), ('iter_possible_cols', walk_by_cols)):
+            def walk():
+                return walk_fn(grid_cls(rows=rows, cols=cols), Chip.GREEN, chips_in_a_row, depth)
+
+            grid_indexes = count_grid_indexes(walk)
+            start = time()
+            nodes = walk()
+            end = time()
+            print(
+                f'{grid_cls.__name__} {rows}x{cols}, depth {depth}, {walk_name}: {nodes} nodes, '
+                f'{grid_indexes:.1f} GridIndex objects/node, '
+                f'{nodes / (end - start):.0f} nodes/sec'
+            )
+
+
+if __name__ == '__main__':
+    board = (6, 7, 4, 5)
+    if len(sys.argv) > 1:
+        board = tuple(int(arg) for arg in sys.argv[1:5])
+    measure(*board)
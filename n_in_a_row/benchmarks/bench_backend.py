@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder
+
+
+# Builds the same tree with every vault backend. The redis one goes to the configured
+# instance, so point config.yml to a scratch one.
+# Usage: python -m n_in_a_row.benchmarks.bench_backend [rows cols chips_in_a_row]
+
+
+def build(rows: int, cols: int, chips_in_a_row: int, backend: str) -> None:
+    load_config().setdefault('vault', {})['backend'] = backend
+    tree_builder = GameTreeBuilder(
+        GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row)
+    )
+    tree_builder.vault.backend.clear()
+
+    start = time()
+    tree_builder.build_solution_tree()
+    end = time()
+
+    print(
+        f'{backend} {rows}x{cols}, {chips_in_a_row} in a row: '
+        f'{len(tree_builder.vault.backend)} nodes in {end - start:.2f} secs, '
+        f'{len(tree_builder.vault.backend) / (end - start):.0f} nodes/sec, '
+        f'root {dict(tree_builder.root.win_states_counter)}'
+    )
+    tree_builder.vault.close()
+
+
+if __name__ == '__main__':
+    rows, cols, chips_in_a_row = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 1 else (4, 4, 3)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        vault_config = load_config().setdefault('vault', {})
+        vault_config['mmap_path'] = os.path.join(temp_dir, 'game_states')
+        vault_config['sqlite_path'] = os.path.join(temp_dir, 'game_states.sqlite3')
+        for backend in ('redis', 'mmap', 'sqlite'):
+            build(rows, cols, chips_in_a_row, backend)
@@ -0,0 +1,47 @@
+import sys
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder
+
+
+# Builds full trees into the configured vault backend, so point config.yml to a scratch store.
+# Usage: python -m n_in_a_row.benchmarks.bench_canonical [rows cols chips_in_a_row]...
+
+
+def vault_size(tree_builder: GameTreeBuilder) -> int:
+    backend = tree_builder.vault.backend
+    return sum(len(data) for data in backend.get_many(list(backend.keys())))
+
+
+def build(rows: int, cols: int, chips_in_a_row: int, canonical: bool) -> None:
+    tree_builder = GameTreeBuilder(
+        GameState(
+            BitGrid(rows=rows, cols=cols),
+            next_chip=Chip.GREEN,
+            chips_in_a_row=chips_in_a_row,
+            canonical=canonical
+        )
+    )
+    tree_builder.vault.backend.clear()
+
+    start = time()
+    tree_builder.build_solution_tree()
+    end = time()
+
+    print(
+        f'{rows}x{cols}, {chips_in_a_row} in a row, canonical={canonical}: '
+        f'{len(tree_builder.vault.backend)} nodes, {vault_size(tree_builder)} bytes, '
+        f'{end - start:.2f} secs, root {dict(tree_builder.root.win_states_counter)}'
+    )
+
+
+if __name__ == '__main__':
+    boards = [(4, 4, 3), (4, 5, 3)]
+    if len(sys.argv) > 1:
+        args = [int(arg) for arg in sys.argv[1:]]
+        boards = list(zip(args[::3], args[1::3], args[2::3]))
+    for board in boards:
+        for canonical in (False, True):
+            build(*board, canonical=canonical)
@@ -0,0 +1,44 @@
+import pickle
+import sys
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder
+from n_in_a_row.game_state.game_state_codec import encode_game_state, decode_game_state
+
+
+# Builds a full tree into the configured vault backend, so point config.yml to a scratch store.
+# Usage: python -m n_in_a_row.benchmarks.bench_codec [rows cols chips_in_a_row]
+
+
+def load_stored_game_states(tree_builder: GameTreeBuilder):
+    backend = tree_builder.vault.backend
+    return [decode_game_state(data) for data in backend.get_many(list(backend.keys()))]
+
+
+def measure(name: str, game_states, dumps, loads) -> None:
+    start = time()
+    encoded = [dumps(game_state) for game_state in game_states]
+    encode_end = time()
+    for data in encoded:
+        loads(data)
+    decode_end = time()
+    print(
+        f'{name}: {sum(len(data) for data in encoded)} bytes, '
+        f'encode {encode_end - start:.3f} secs, decode {decode_end - encode_end:.3f} secs'
+    )
+
+
+if __name__ == '__main__':
+    rows, cols, chips_in_a_row = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 1 else (4, 4, 3)
+    tree_builder = GameTreeBuilder(
+        GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row)
+    )
+    tree_builder.vault.backend.clear()
+    tree_builder.build_solution_tree()
+
+    game_states = load_stored_game_states(tree_builder)
+    print(f'{rows}x{cols}, {chips_in_a_row} in a row: {len(game_states)} game states')
+    measure('pickle', game_states, pickle.dumps, pickle.loads)
+    measure('codec', game_states, encode_game_state, decode_game_state)
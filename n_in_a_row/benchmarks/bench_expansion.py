@@ -0,0 +1,52 @@
+import sys
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.storage import MemoryBackend
+
+
+# Counts the positions expanded by the serial and the parallel builds against the unique
+# positions of the tree, and the children found already saved or still waiting to be expanded.
+# Usage: python -m n_in_a_row.benchmarks.bench_expansion [rows cols chips_in_a_row workers split_ply]
+
+
+def build(rows: int, cols: int, chips_in_a_row: int, workers: int, split_ply: int) -> GameTreeBuilder:
+    tree_builder = GameTreeBuilder(
+        GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row),
+        vault=GameStateVault(backend=MemoryBackend()),
+        workers=workers,
+        split_ply=split_ply
+    )
+    start = time()
+    tree_builder.build_solution_tree()
+    end = time()
+    expanded = tree_builder.expansions - tree_builder.duplicate_expansions
+    print(
+        f'{rows}x{cols}/{chips_in_a_row}, {workers} workers: {tree_builder.expansions} expansions '
+        f'of {expanded} positions ({tree_builder.duplicate_expansions} repeated), '
+        f'{tree_builder.transpositions} transpositions, '
+        f'{tree_builder.duplicate_pushes_avoided} duplicate pushes avoided, '
+        f'{len(tree_builder.vault.backend)} nodes in {end - start:.2f} secs'
+    )
+    return tree_builder
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        rows, cols, chips_in_a_row, workers, split_ply = (int(arg) for arg in sys.argv[1:6])
+        boards = [(rows, cols, chips_in_a_row)]
+    else:
+        workers, split_ply = 4, 2
+        boards = [(4, 4, 3), (4, 5, 3)]
+    for rows, cols, chips_in_a_row in boards:
+        # only the counters of the serial build are kept, the workers are forked from this process
+        serial_tree_builder = build(rows, cols, chips_in_a_row, 1, split_ply)
+        win_states_counter = serial_tree_builder.root.win_states_counter
+        expansions = serial_tree_builder.expansions
+        del serial_tree_builder
+        tree_builder = build(rows, cols, chips_in_a_row, workers, split_ply)
+        assert tree_builder.root.win_states_counter == win_states_counter
+        assert tree_builder.expansions - tree_builder.duplicate_expansions == expansions
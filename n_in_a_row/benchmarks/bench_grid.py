@@ -0,0 +1,33 @@
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid, BitGrid
+from n_in_a_row.game_state import GameState
+
+
+def expand_nodes(grid_cls, rows: int, cols: int, chips_in_a_row: int, depth: int) -> int:
+    root = GameState(grid_cls(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row)
+    nodes = 0
+    stack = [(root, 0)]
+    while stack:
+        game_state, game_state_depth = stack.pop()
+        nodes += 1
+        if game_state.win_state is not None or game_state_depth == depth:
+            continue
+        for index in game_state.grid.get_possible_moves():
+            stack.append((game_state.make_move(index), game_state_depth + 1))
+        game_state.children = []
+    return nodes
+
+
+if __name__ == '__main__':
+    for rows, cols, chips_in_a_row, depth in [(4, 4, 3, 6), (6, 7, 4, 4)]:
+        for grid_cls in (Grid, BitGrid):
+            start = time()
+            nodes = expand_nodes(grid_cls, rows, cols, chips_in_a_row, depth)
+            end = time()
+            print(
+                f'{grid_cls.__name__} {rows}x{cols}, depth {depth}: '
+                f'{nodes} nodes in {end - start:.3f} secs, '
+                f'{nodes / (end - start):.0f} nodes/sec'
+            )
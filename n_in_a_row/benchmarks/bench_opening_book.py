@@ -0,0 +1,46 @@
+import random
+import sys
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameSolver, OpeningBook
+from n_in_a_row.game_state.opening_book import _expand_levels
+
+
+# Builds an opening book and times lookups of its positions against solving them.
+# Usage: python -m n_in_a_row.benchmarks.bench_opening_book [rows cols chips_in_a_row plies]
+
+
+def measure(rows: int, cols: int, chips_in_a_row: int, plies: int) -> None:
+    root = GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row)
+    start = time()
+    book = OpeningBook.build(root, plies=plies)
+    end = time()
+    print(f'{rows}x{cols}, {chips_in_a_row} in a row, {plies} plies: {len(book)} positions built in {end - start:.2f} secs')
+
+    positions = [position for level in _expand_levels(root, plies) for position in level]
+    random.Random(1).shuffle(positions)
+    for position in positions:
+        # the ids are cached by the positions, so both timings include them
+        position.game_state_id
+
+    start = time()
+    for position in positions:
+        book.get(position)
+    end = time()
+    print(f'lookup: {(end - start) / len(positions) * 1e6:.1f} us per position')
+
+    sample = positions[:100]
+    start = time()
+    for position in sample:
+        GameSolver().solve(position)
+    end = time()
+    print(f'search: {(end - start) / len(sample) * 1e6:.1f} us per position')
+
+
+if __name__ == '__main__':
+    board = (4, 5, 4, 6)
+    if len(sys.argv) > 1:
+        board = tuple(int(arg) for arg in sys.argv[1:5])
+    measure(*board)
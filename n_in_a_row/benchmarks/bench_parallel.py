@@ -0,0 +1,40 @@
+import sys
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.storage import MemoryBackend
+
+
+# Builds the same tree serially and with a growing number of worker processes,
+# every build goes to its own in-memory vault.
+# Usage: python -m n_in_a_row.benchmarks.bench_parallel [rows cols chips_in_a_row split_ply]
+
+
+def build(rows: int, cols: int, chips_in_a_row: int, workers: int, split_ply: int) -> GameTreeBuilder:
+    tree_builder = GameTreeBuilder(
+        GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row),
+        vault=GameStateVault(backend=MemoryBackend()),
+        workers=workers,
+        split_ply=split_ply
+    )
+    start = time()
+    tree_builder.build_solution_tree()
+    end = time()
+    print(
+        f'{workers} workers, split at ply {split_ply}: '
+        f'{len(tree_builder.vault.backend)} nodes in {end - start:.2f} secs'
+    )
+    return tree_builder
+
+
+if __name__ == '__main__':
+    rows, cols, chips_in_a_row, split_ply = (
+        (int(arg) for arg in sys.argv[1:5]) if len(sys.argv) > 1 else (4, 4, 3, 2)
+    )
+    serial_root = build(rows, cols, chips_in_a_row, 1, split_ply).root
+    for workers in (2, 4, 8, 16):
+        root = build(rows, cols, chips_in_a_row, workers, split_ply).root
+        assert root.win_states_counter == serial_root.win_states_counter
@@ -0,0 +1,91 @@
+import random
+import sys
+import tracemalloc
+from copy import deepcopy
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid, BitGrid
+from n_in_a_row.game_state import GameState
+
+from .bench_grid import expand_nodes
+
+
+# Compares expanding nodes by GameState.make_move, which copies the grid for every child,
+# with walking a single grid by push and pop: memory blocks allocated per move and
+# depth-first expansion speed.
+# Usage: python -m n_in_a_row.benchmarks.bench_push_pop [rows cols chips_in_a_row depth]
+
+
+def walk_nodes(grid_cls, rows: int, cols: int, chips_in_a_row: int, depth: int) -> int:
+    grid = grid_cls(rows=rows, cols=cols)
+
+    def walk(game_state: GameState, game_state_depth: int) -> int:
+        nodes = 1
+        if game_state.win_state is not None or game_state_depth == depth:
+            return nodes
+        for index in grid.get_possible_moves():
+            grid.push(index.col, game_state.next_chip)
+            nodes += walk(
+                GameState(
+                    grid,
+                    next_chip=game_state.next_chip.swap_chip(),
+                    chips_in_a_row=chips_in_a_row,
+                    copy_grid=False
+                ),
+                game_state_depth + 1
+            )
+            grid.pop()
+        return nodes
+
+    return walk(GameState(grid, next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row, copy_grid=False), 0)
+
+
+def blocks_per_move(grid_cls, rows: int, cols: int, push: bool) -> float:
+    # memory blocks still allocated after a move, averaged over the moves of a random game
+    rnd = random.Random(5)
+    grid = grid_cls(rows=rows, cols=cols)
+    chip = Chip.GREEN
+    moves = 0
+    blocks = 0
+    tracemalloc.start()
+    while not grid.is_full():
+        col = rnd.choice(grid.get_possible_moves()).col
+        before = tracemalloc.take_snapshot()
+        if push:
+            grid.push(col, chip)
+            child = grid
+        else:
+            child = deepcopy(grid)
+            child.drop_chip(col, chip)
+        after = tracemalloc.take_snapshot()
+        blocks += sum(stat.count_diff for stat in after.compare_to(before, 'lineno'))
+        moves += 1
+        grid = child
+        chip = chip.swap_chip()
+    tracemalloc.stop()
+    return blocks / moves
+
+
+def measure(rows: int, cols: int, chips_in_a_row: int, depth: int) -> None:
+    for grid_cls in (Grid, BitGrid):
+        start = time()
+        copy_nodes = expand_nodes(grid_cls, rows, cols, chips_in_a_row, depth)
+        middle = time()
+        push_nodes = walk_nodes(grid_cls, rows, cols, chips_in_a_row, depth)
+        end = time()
+        assert copy_nodes == push_nodes
+        print(
+            f'{grid_cls.__name__} {rows}x{cols}, depth {depth}, {copy_nodes} nodes: '
+            f'make_move {copy_nodes / (middle - start):.0f} nodes/sec, '
+            f'{blocks_per_move(grid_cls, rows, cols, push=False):.1f} blocks/move; '
+            f'push/pop {push_nodes / (end - middle):.0f} nodes/sec, '
+            f'{blocks_per_move(grid_cls, rows, cols, push=True):.1f} blocks/move'
+        )
+
+
+if __name__ == '__main__':
+    board = (6, 7, 4, 4)
+    if len(sys.argv) > 1:
+        board = tuple(int(arg) for arg in sys.argv[1:5])
+    measure(*board)
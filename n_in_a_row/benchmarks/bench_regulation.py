@@ -0,0 +1,60 @@
+import sys
+from time import time
+from typing import List, Set
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.storage import MemoryBackend
+
+
+# Compares the level regulation used by the win state propagation with the former
+# one that subtracted the processed nodes from every parent's children on every level.
+# Usage: python -m n_in_a_row.benchmarks.bench_regulation [rows cols chips_in_a_row]...
+
+
+def excluded_set_regulation(tree_builder: GameTreeBuilder) -> List[Set[int]]:
+    regulation: List[Set[int]] = []
+    leaf_nodes = tree_builder.get_leaf_nodes()
+    excluded_node_ids: Set[int] = set()
+    while leaf_nodes:
+        level_node_ids = {node.game_state_id for node in leaf_nodes}
+        excluded_node_ids.update(level_node_ids)
+        parent_ids = list({parent.game_state_id for node in leaf_nodes for parent in node.parents})
+        next_leaf_nodes = []
+        for parent in tree_builder.vault.load_many(parent_ids):
+            parent_children = {child.game_state_id for child in parent.children} - excluded_node_ids
+            if not parent_children:
+                next_leaf_nodes.append(parent)
+        regulation.append(level_node_ids)
+        leaf_nodes = next_leaf_nodes
+    return regulation
+
+
+def measure(rows: int, cols: int, chips_in_a_row: int) -> None:
+    tree_builder = GameTreeBuilder(
+        GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row),
+        vault=GameStateVault(backend=MemoryBackend())
+    )
+    tree_builder._build_solution_tree()
+
+    start = time()
+    regulation = excluded_set_regulation(tree_builder)
+    middle = time()
+    assert regulation == tree_builder._build_lower_parallel_regulation()
+    end = time()
+    print(
+        f'{rows}x{cols}, {chips_in_a_row} in a row: {sum(map(len, regulation))} nodes, '
+        f'{len(regulation)} levels, excluded sets {middle - start:.2f} secs, '
+        f'unresolved counters {end - middle:.2f} secs'
+    )
+
+
+if __name__ == '__main__':
+    boards = [(3, 4, 3), (3, 5, 3), (4, 4, 3)]
+    if len(sys.argv) > 1:
+        args = [int(arg) for arg in sys.argv[1:]]
+        boards = list(zip(args[::3], args[1::3], args[2::3]))
+    for board in boards:
+        measure(*board)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import random
+import sys
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder
+from n_in_a_row.server import PositionService, serve
+
+
+# Load generator for the position server. Solves the tree into the configured redis unless
+# it is there already, then requests positions of random games from concurrent keep-alive
+# connections. Without host and port the server runs in this process.
+# Usage: python -m n_in_a_row.benchmarks.bench_server [rows cols chips_in_a_row [requests concurrency [host port]]]
+
+
+def build_tree(rows: int, cols: int, chips_in_a_row: int) -> GameState:
+    load_config().setdefault('vault', {})['backend'] = 'redis'
+    tree_builder = GameTreeBuilder(
+        GameState(
+            BitGrid(rows=rows, cols=cols),
+            next_chip=Chip.GREEN,
+            chips_in_a_row=chips_in_a_row,
+            canonical=load_config().get('server', {}).get('canonical', False)
+        )
+    )
+    start = perf_counter()
+    tree_builder.build_solution_tree()
+    tree_builder.vault.close()
+    print(f'Tree of {rows}x{cols}, {chips_in_a_row} in a row ready in {perf_counter() - start:.2f} secs')
+    return tree_builder.root
+
+
+def sample_paths(root: GameState, games: int, seed: int = 0) -> List[str]:
+    # every position of random games, the early ones repeat like in real traffic
+    rnd = random.Random(seed)
+    paths = []
+    for _ in range(games):
+        grid = BitGrid(rows=root.grid.rows, cols=root.grid.cols)
+        chip = Chip.GREEN
+        while True:
+            paths.append(
+                f'/evaluate?rows={grid.rows}&cols={grid.cols}&chips_in_a_row={root.chips_in_a_row}'
+                f'&cells={"".join(str(cell) for cell in grid.to_cells())}'
+            )
+            if grid.get_win_state(root.chips_in_a_row) is not None:
+                break
+            grid.drop_chip(rnd.choice(list(grid.iter_possible_cols())), chip)
+            chip = chip.swap_chip()
+    return paths
+
+
+async def fetch(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> Tuple[int, bytes]:
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b'\r\n', b''):
+            break
+        name, _, value = header.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def run_client(host: str, port: int, paths: List[str], latencies: List[float]) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    errors = 0
+    try:
+        for path in paths:
+            start = perf_counter()
+            status, _ = await fetch(reader, writer, path)
+            latencies.append(perf_counter() - start)
+            errors += status != 200
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return errors
+
+
+async def generate_load(
+        paths: List[str],
+        requests: int,
+        concurrency: int,
+        host: Optional[str],
+        port: Optional[int]
+) -> None:
+    service = server = None
+    if host is None:
+        service = PositionService()
+        server = await serve('localhost', 0, service)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    rnd = random.Random(1)
+    batches = [
+        [rnd.choice(paths) for _ in range(requests // concurrency)]
+        for _ in range(concurrency)
+    ]
+    latencies: List[float] = []
+    start = perf_counter()
+    errors = sum(await asyncio.gather(*(run_client(host, port, batch, latencies) for batch in batches)))
+    end = perf_counter()
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(
+        f'{len(latencies)} requests from {concurrency} connections in {end - start:.2f} secs, '
+        f'{len(latencies) / (end - start):.0f} requests/sec, p50 {p50:.3f} ms, p99 {p99:.3f} ms, '
+        f'{errors} errors'
+    )
+    reader, writer = await asyncio.open_connection(host, port)
+    _, body = await fetch(reader, writer, '/stats')
+    writer.close()
+    await writer.wait_closed()
+    print(f'server {json.loads(body)}')
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+        await service.close()
+
+
+if __name__ == '__main__':
+    rows, cols, chips_in_a_row = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 3 else (4, 4, 3)
+    requests = int(sys.argv[4]) if len(sys.argv) > 4 else 20000
+    concurrency = int(sys.argv[5]) if len(sys.argv) > 5 else 32
+    host = sys.argv[6] if len(sys.argv) > 6 else None
+    port = int(sys.argv[7]) if len(sys.argv) > 7 else None
+
+    root = build_tree(rows, cols, chips_in_a_row)
+    asyncio.run(generate_load(sample_paths(root, games=1000), requests, concurrency, host, port))
@@ -0,0 +1,36 @@
+import sys
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameSolver
+
+
+# Reports the nodes visited by every iteration of the solver's deepening and the effective
+# branching factor between consecutive depths.
+# Usage: python -m n_in_a_row.benchmarks.bench_solver [max_depth [rows cols chips_in_a_row]]
+
+
+def measure(rows: int, cols: int, chips_in_a_row: int, max_depth: int) -> None:
+    solver = GameSolver()
+    start = time()
+    result = solver.solve(
+        GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row),
+        max_depth=max_depth
+    )
+    end = time()
+    print(f'{rows}x{cols}, {chips_in_a_row} in a row, max depth {max_depth}: {result}')
+    previous = None
+    for depth, nodes in enumerate(solver.depth_nodes, start=1):
+        branching = f'{nodes / previous:.2f}' if previous else '-'
+        print(f'depth {depth:2}: {nodes:9} nodes, effective branching factor {branching}')
+        previous = nodes
+    print(f'{solver.nodes} nodes in {end - start:.2f} secs, {len(solver.table)} table entries')
+
+
+if __name__ == '__main__':
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    board = (6, 7, 4)
+    if len(sys.argv) > 2:
+        board = tuple(int(arg) for arg in sys.argv[2:5])
+    measure(*board, max_depth)
@@ -0,0 +1,29 @@
+import sys
+from time import time
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, OpeningBook
+
+
+# Solves the first plies of a game and writes the opening book, see the opening_book config.
+# Usage: python -m n_in_a_row.build_opening_book [rows cols chips_in_a_row [plies [path]]]
+
+
+if __name__ == '__main__':
+    config = load_config()['opening_book']
+    rows, cols, chips_in_a_row = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 3 else (6, 7, 4)
+    plies = int(sys.argv[4]) if len(sys.argv) > 4 else config['plies']
+    path = sys.argv[5] if len(sys.argv) > 5 else config['path']
+
+    start = time()
+    book = OpeningBook.build(
+        GameState(BitGrid(rows=rows, cols=cols), next_chip=Chip.GREEN, chips_in_a_row=chips_in_a_row, canonical=True),
+        plies=plies,
+        search_depth=config['search_depth']
+    )
+    book.save(path)
+    end = time()
+
+    print(f'{rows}x{cols}, {chips_in_a_row} in a row, {plies} plies: {len(book)} positions in {end - start:.2f} secs')
@@ -3,6 +3,7 @@ from __future__ import annotations
 import enum
 
 from n_in_a_row.hashable import Hashable, pack_ints
+from n_in_a_row.zobrist import side_key
 
 
 class Chip(Hashable, enum.Enum):
@@ -14,6 +15,9 @@ class Chip(Hashable, enum.Enum):
     def build_hash(self, hash_obj) -> None:
         hash_obj.update(pack_ints(self.value))
 
+    def zobrist_hash(self) -> int:
+        return side_key(self.value)
+
     def swap_chip(self) -> Chip:
         if self == Chip.EMPTY:
             raise ValueError('Cannot swap empty chip!')
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Tuple
+from typing import Dict, Any
 
 import yaml
 
@@ -16,6 +16,5 @@ def load_config(config_filename: str = 'config.yml') -> Dict[str, Any]:
     return config
 
 
-def max_grid_shape() -> Tuple[int, int]:
-    config = load_config()
-    return config['max_grid_rows'], config['max_grid_cols']
+def set_config(config: Dict[str, Any], config_filename: str = 'config.yml') -> None:
+    _g_config[config_filename] = config
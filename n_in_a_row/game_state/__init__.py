@@ -1,2 +1,6 @@
 from .game_state import GameState
 from .game_tree_builder import GameTreeBuilder
+from .game_solver import GameSolver, SolverResult
+from .opening_book import OpeningBook, BookEntry
+from .game_tree_query import GameTreeQuery
+from .game_annotator import GameAnnotator, MoveAnnotation
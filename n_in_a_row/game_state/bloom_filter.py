@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import math
+from typing import List, Sequence
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    # Bits are picked by double hashing of the 64-bit ids, bit i of a key is
+    # (h1 + i * h2) mod size. The ids may be signed or unsigned. The vault asks for a few ids
+    # at a time, plain ints are much faster than numpy for that.
+
+    def __init__(self, expected_items: int, error_rate: float = 0.01):
+        if expected_items <= 0 or not 0 < error_rate < 1:
+            raise ValueError(f'Bloom filter for {expected_items} items at error rate {error_rate} is invalid')
+        self.expected_items = expected_items
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-expected_items * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        # keys that set at least one bit, a repeated key or a false positive isn't counted
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, key: int) -> bool:
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def add(self, key: int) -> None:
+        bits = self.bits
+        added = False
+        for position in self._positions(key):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not bits[byte] & bit:
+                bits[byte] |= bit
+                added = True
+        if added:
+            self.count += 1
+
+    def add_many(self, keys: Sequence[int]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def contains_many(self, keys: Sequence[int]) -> List[bool]:
+        # False means the key was never added, True that it probably was
+        return [key in self for key in keys]
+
+    def clear(self) -> None:
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+    @property
+    def estimated_error_rate(self) -> float:
+        # false positive rate expected for the keys added so far
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def _positions(self, key: int) -> List[int]:
+        size = self.size
+        first = _mix(key & _MASK_64)
+        # odd, so that the steps don't repeat early when the size is even
+        step = (_mix(first) | 1) % size
+        position = first % size
+        positions = [position]
+        for _ in range(self.hash_count - 1):
+            position += step
+            if position >= size:
+                position -= size
+            positions.append(position)
+        return positions
+
+
+def _mix(value: int) -> int:
+    # splitmix64 finalizer
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return value ^ (value >> 31)
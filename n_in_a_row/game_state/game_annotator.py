@@ -0,0 +1,162 @@
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.grid import BitGrid, ColumnFullError
+from n_in_a_row.win_state import WinState
+
+from .game_state import GameState
+from .game_state_vault import GameStateVault
+
+
+class MoveAnnotation(NamedTuple):
+    # number of the game in the records, from 0
+    game: int
+    ply: int
+    col: int
+    # result, distance and best column of the position before the move, None if it's not in the vault
+    result: Optional[WinState]
+    distance: Optional[int]
+    best_col: Optional[int]
+    # whether the move makes the result worse for the player who made it
+    blunder: Optional[bool]
+
+
+class PositionKey(NamedTuple):
+    game_state_id: int
+    orientation_id: int
+    next_chip: Chip
+
+
+def read_game_records(lines: Iterable[str]) -> Iterator[List[int]]:
+    # one game per line, the columns of its moves separated by spaces or commas,
+    # empty lines and lines starting with # are skipped
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        yield [int(col) for col in line.replace(',', ' ').split()]
+
+
+class GameAnnotator:
+    # Replays the games on a single grid by pushing and popping the moves, and looks up the
+    # positions of a batch of games in the vault at once. Memory is bounded by batch_size.
+
+    def __init__(
+            self,
+            vault: GameStateVault,
+            rows: int,
+            cols: int,
+            chips_in_a_row: int,
+            canonical: bool = False,
+            batch_size: Optional[int] = None
+    ):
+        if batch_size is None:
+            batch_size = load_config().get('annotate', {}).get('batch_size', 10000)
+        self.vault = vault
+        self.chips_in_a_row = chips_in_a_row
+        self.canonical = canonical
+        self.batch_size = batch_size
+        self.grid = BitGrid(rows=rows, cols=cols)
+        self.positions = 0
+        self.moves = 0
+
+    def annotate(self, games: Iterable[Sequence[int]]) -> Iterator[MoveAnnotation]:
+        batch: List[Tuple[int, Sequence[int], List[PositionKey]]] = []
+        batch_positions = 0
+        for game, moves in enumerate(games):
+            keys = self._replay(game, moves)
+            batch.append((game, moves, keys))
+            batch_positions += len(keys)
+            if batch_positions >= self.batch_size:
+                yield from self._annotate_batch(batch)
+                batch = []
+                batch_positions = 0
+        if batch:
+            yield from self._annotate_batch(batch)
+
+    def _replay(self, game: int, moves: Sequence[int]) -> List[PositionKey]:
+        # keys of every position of the game, the final one included
+        grid = self.grid
+        chip = Chip.GREEN
+        keys = []
+        try:
+            for ply in range(len(moves) + 1):
+                game_state = GameState(
+                    grid,
+                    next_chip=chip,
+                    chips_in_a_row=self.chips_in_a_row,
+                    copy_grid=False,
+                    canonical=self.canonical
+                )
+                keys.append(PositionKey(game_state.game_state_id, game_state.orientation_id, chip))
+                if ply == len(moves):
+                    break
+                if game_state.win_state is not None:
+                    raise GameRecordError(game, f'Game {game} goes on after it has ended at ply {ply}')
+                try:
+                    grid.push(moves[ply], chip)
+                except (ColumnFullError, ValueError) as error:
+                    raise GameRecordError(game, f'Game {game} has an invalid move at ply {ply}: {error}')
+                chip = chip.swap_chip()
+        finally:
+            for _ in range(len(keys) - 1):
+                grid.pop()
+        return keys
+
+    def _annotate_batch(
+            self,
+            batch: List[Tuple[int, Sequence[int], List[PositionKey]]]
+    ) -> Iterator[MoveAnnotation]:
+        game_state_ids = list({key.game_state_id for _, _, keys in batch for key in keys})
+        nodes = dict(zip(game_state_ids, self.vault.load_stored_many(game_state_ids, with_parents=False)))
+        self.positions += sum(len(keys) for _, _, keys in batch)
+        for game, moves, keys in batch:
+            for ply, col in enumerate(moves):
+                key = keys[ply]
+                node = nodes[key.game_state_id]
+                next_node = nodes[keys[ply + 1].game_state_id]
+                self.moves += 1
+                if node is None or node.result is None:
+                    yield MoveAnnotation(game, ply, col, None, None, None, None)
+                    continue
+                best_col = node.best_col
+                if best_col is not None and node.orientation_id != key.orientation_id:
+                    best_col = node.grid.mirror_col(best_col)
+                blunder = None
+                if next_node is not None and next_node.result is not None:
+                    blunder = _rank(next_node.result, key.next_chip) < _rank(node.result, key.next_chip)
+                yield MoveAnnotation(game, ply, col, node.result, node.distance, best_col, blunder)
+
+
+def _rank(result: WinState, chip: Chip) -> int:
+    if result == WinState.DRAW:
+        return 1
+    return 2 if result == WinState.from_chip(chip) else 0
+
+
+def write_annotations(annotations: Iterable[MoveAnnotation], file: TextIO) -> int:
+    # tab separated, with empty fields for the positions missing from the vault
+    file.write('game\tply\tcol\tresult\tdistance\tbest_col\tblunder\n')
+    count = 0
+    for annotation in annotations:
+        file.write('{}\t{}\t{}\t{}\t{}\t{}\t{}\n'.format(
+            annotation.game,
+            annotation.ply,
+            annotation.col,
+            '' if annotation.result is None else annotation.result.name,
+            '' if annotation.distance is None else annotation.distance,
+            '' if annotation.best_col is None else annotation.best_col,
+            '' if annotation.blunder is None else int(annotation.blunder)
+        ))
+        count += 1
+    return count
+
+
+class GameRecordError(ValueError):
+
+    def __init__(self, game: int, *args):
+        if not args:
+            args = [f'Game record {game} is invalid']
+        super().__init__(*args)
+        self.game = game
@@ -0,0 +1,175 @@
+from typing import List, NamedTuple, Optional
+
+from n_in_a_row.config import load_config
+from n_in_a_row.win_state import WinState
+
+from .game_state import GameState
+from .lru_cache import LRUCache
+from .move_ordering import MoveOrdering
+
+
+# Bounds of the transposition table entries
+_EXACT = 0
+_LOWER = 1
+_UPPER = 2
+
+
+class SolverResult(NamedTuple):
+    win_state: WinState
+    # plies until the game ends when the winner hurries and the loser delays
+    distance: int
+
+
+class TableEntry(NamedTuple):
+    score: int
+    bound: int
+    # plies searched below the position
+    depth: int
+    # column of the best move as seen from the orientation of game_state_id
+    best_col: Optional[int]
+
+
+class GameSolver:
+    # Scores are from the side to move: cells + 1 - chips at the end for a win, the negated
+    # value for a loss and 0 for a draw or a position cut by the depth limit. Every position
+    # has a fixed number of chips, so the scores don't depend on the path and can be shared
+    # through the transposition table.
+    #
+    # The search deepens iteratively, the best moves of the previous depth come from the table.
+    # Cut positions score 0, so a win or a loss that ends within the depth is proven and the
+    # deepening stops. Longer ones may come from table entries of deeper searches, a quicker
+    # win or a longer loss beyond the depth could still exist then.
+
+    def __init__(self, table_size: Optional[int] = None):
+        if table_size is None:
+            table_size = load_config().get('solver', {}).get('table_size')
+        self.table = LRUCache(max_entries=table_size)
+        self.nodes = 0
+        # nodes visited by every iteration of the deepening, by depth - 1
+        self.depth_nodes: List[int] = []
+        self.move_ordering: Optional[MoveOrdering] = None
+        self._cells = 0
+        self._root_chips = 0
+
+    def solve(self, game_state: GameState, max_depth: Optional[int] = None) -> Optional[SolverResult]:
+        # returns None if max_depth stopped the search before the value was proven
+        # the search walks the tree by pushing and popping moves on a single grid
+        grid = game_state.grid.snapshot()
+        game_state = GameState(
+            grid,
+            next_chip=game_state.next_chip,
+            chips_in_a_row=game_state.chips_in_a_row,
+            copy_grid=False,
+            canonical=game_state.canonical
+        )
+        self._cells = grid.rows * grid.cols
+        self._root_chips = sum(1 for chip_value in grid.to_cells() if chip_value)
+        self.move_ordering = MoveOrdering(grid.rows, grid.cols)
+        self.depth_nodes = []
+
+        remaining = self._cells - self._root_chips
+        if max_depth is not None:
+            max_depth = min(max_depth, remaining)
+        else:
+            max_depth = remaining
+
+        if game_state.win_state is not None:
+            return self._to_result(
+                game_state, self._negamax(game_state, self._root_chips, 0, -self._cells - 1, self._cells + 1)
+            )
+        for depth in range(1, max_depth + 1):
+            nodes = self.nodes
+            score = self._negamax(game_state, self._root_chips, depth, -self._cells - 1, self._cells + 1)
+            self.depth_nodes.append(self.nodes - nodes)
+            result = self._to_result(game_state, score)
+            if depth == remaining or (score != 0 and result.distance <= depth):
+                return result
+        return None
+
+    def get_best_col(self, game_state: GameState) -> Optional[int]:
+        # the best move found by the last search through the position, if it is still in the table
+        entry: Optional[TableEntry] = self.table.get(game_state.game_state_id)
+        if entry is None or entry.best_col is None:
+            return None
+        if game_state.canonical and game_state.is_mirrored:
+            return game_state.grid.mirror_col(entry.best_col)
+        return entry.best_col
+
+    def _to_result(self, game_state: GameState, score: int) -> SolverResult:
+        if score == 0:
+            return SolverResult(WinState.DRAW, self._cells - self._root_chips)
+        distance = self._cells + 1 - abs(score) - self._root_chips
+        if score > 0:
+            return SolverResult(WinState.from_chip(game_state.next_chip), distance)
+        return SolverResult(WinState.from_chip(game_state.next_chip.swap_chip()), distance)
+
+    def _negamax(self, game_state: GameState, chips: int, depth: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        if game_state.win_state is not None:
+            if game_state.win_state == WinState.DRAW:
+                return 0
+            # only the last move can complete a line
+            return chips - self._cells - 1
+        if depth == 0:
+            return 0
+        # a search to the end of the game is exact for any deeper iteration
+        depth = min(depth, self._cells - chips)
+
+        game_state_id = game_state.game_state_id
+        mirrored = game_state.canonical and game_state.is_mirrored
+        best_col = None
+        entry: Optional[TableEntry] = self.table.get(game_state_id)
+        if entry is not None:
+            best_col = entry.best_col
+            if best_col is not None and mirrored:
+                best_col = game_state.grid.mirror_col(best_col)
+            if entry.depth >= depth:
+                if entry.bound == _EXACT:
+                    return entry.score
+                if entry.bound == _LOWER:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if alpha >= beta:
+                    return entry.score
+
+        ply = chips - self._root_chips
+        moves = self.move_ordering.order(
+            game_state.grid.get_possible_moves(), ply, game_state.next_chip, best_col
+        )
+        original_alpha = alpha
+        best_score = -self._cells - 1
+        best_index = None
+        grid = game_state.grid
+        for index in moves:
+            grid.push(index.col, game_state.next_chip)
+            child = GameState(
+                grid,
+                next_chip=game_state.next_chip.swap_chip(),
+                chips_in_a_row=game_state.chips_in_a_row,
+                copy_grid=False,
+                canonical=game_state.canonical
+            )
+            score = -self._negamax(child, chips + 1, depth - 1, -beta, -alpha)
+            grid.pop()
+            if score > best_score:
+                best_score = score
+                best_index = index
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.move_ordering.on_cutoff(index, ply, depth, game_state.next_chip)
+                        break
+
+        if best_score <= original_alpha:
+            bound = _UPPER
+        elif best_score >= beta:
+            bound = _LOWER
+        else:
+            bound = _EXACT
+        best_col = best_index.col
+        if mirrored:
+            best_col = game_state.grid.mirror_col(best_col)
+        self.table.put(game_state_id, TableEntry(best_score, bound, depth, best_col))
+        return best_score
+
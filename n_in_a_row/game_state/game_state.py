@@ -2,12 +2,15 @@ from __future__ import annotations
 
 from copy import deepcopy
 from functools import cached_property
-from typing import Optional, List, Dict, Set
+from typing import Optional, List, Dict
 
 from n_in_a_row.chip import Chip
 from n_in_a_row.grid import Grid, GridIndex
 from n_in_a_row.win_state import WinState
 from n_in_a_row.hashable import Hashable, pack_ints
+from n_in_a_row.zobrist import is_zobrist_enabled, side_key, rule_key
+
+from .leaf_bitmap import LeafBitmap
 
 
 class GameState(Hashable):
@@ -18,7 +21,8 @@ class GameState(Hashable):
             next_chip: Chip,
             chips_in_a_row: int,
             parent: Optional[GameState] = None,
-            copy_grid: bool = True
+            copy_grid: bool = True,
+            canonical: bool = False
     ):
         if copy_grid:
             self.grid = deepcopy(grid)
@@ -26,6 +30,8 @@ class GameState(Hashable):
             self.grid = grid
         self.next_chip = next_chip
         self.chips_in_a_row = chips_in_a_row
+        # canonical states are keyed by the lesser of their own and their mirror's id
+        self.canonical = canonical
 
         self.win_state = self.grid.get_win_state(self.chips_in_a_row)
 
@@ -35,7 +41,15 @@ class GameState(Hashable):
         if parent is not None:
             self.parents.append(parent)
         self.children: List[GameState] = []
-        self.child_leaf_node_ids: Set[int] = set()
+        # whether the stored child is the mirror of the position reached by the move
+        self.children_mirrored: List[bool] = []
+        # ranks of the leaves below, by outcome, see GameTreeBuilder for the ranks
+        self.child_leaves: Dict[WinState, LeafBitmap] = {}
+        # outcome under perfect play, the plies until it and the column of the best move
+        # as seen from the stored orientation, set by GameTreeBuilder
+        self.result: Optional[WinState] = None
+        self.distance: Optional[int] = None
+        self.best_col: Optional[int] = None
 
     def __repr__(self) -> str:
         return '{}(\n{},\nnext_chip={},\nchips_in_a_row={},\n' \
@@ -48,7 +62,8 @@ class GameState(Hashable):
                 repr(self.chips_in_a_row),
                 repr(self.win_state),
                 repr(self.win_states_counter),
-                repr([parent.game_state_id for parent in self.parents]),
+                # None for the game states loaded without parents
+                repr(None if self.parents is None else [parent.game_state_id for parent in self.parents]),
                 repr([child.game_state_id for child in self.children]),
                 self.game_state_id
             )
@@ -68,12 +83,60 @@ class GameState(Hashable):
 
     @cached_property
     def game_state_id(self) -> int:
+        if self.canonical:
+            return min(self.orientation_id, self.mirror_id)
+        return self.orientation_id
+
+    @cached_property
+    def orientation_id(self) -> int:
+        if is_zobrist_enabled():
+            # hash() would fold the key into the platform hash range
+            return self.zobrist_hash()
         return hash(self)
 
+    @cached_property
+    def mirror_id(self) -> int:
+        if is_zobrist_enabled():
+            return self._build_zobrist_hash(self.grid.mirror_zobrist_key)
+        return hash(self.mirror())
+
+    @property
+    def is_mirrored(self) -> bool:
+        return self.orientation_id != self.game_state_id
+
     def build_hash(self, hash_obj) -> None:
         self.grid.build_hash(hash_obj)
         self.next_chip.build_hash(hash_obj)
         hash_obj.update(pack_ints(self.chips_in_a_row))
+        if self.canonical:
+            hash_obj.update(pack_ints(1))
+
+    def zobrist_hash(self) -> int:
+        return self._build_zobrist_hash(self.grid.zobrist_key)
+
+    def _build_zobrist_hash(self, grid_key: int) -> int:
+        return (
+            grid_key
+            ^ side_key(self.next_chip.value)
+            ^ rule_key(self.grid.rows, self.grid.cols, self.chips_in_a_row, self.canonical)
+        )
+
+    def mirror(self) -> GameState:
+        return GameState(
+            grid=self.grid.mirrored(),
+            next_chip=self.next_chip,
+            chips_in_a_row=self.chips_in_a_row,
+            copy_grid=False,
+            canonical=self.canonical
+        )
+
+    def mirror_index(self, index: GridIndex) -> GridIndex:
+        return GridIndex.of(index.row, self.grid.mirror_col(index.col))
+
+    def is_same_position(self, other: GameState) -> bool:
+        if self == other:
+            return True
+        return self.canonical and self.mirror() == other
 
     def make_move(self, index: GridIndex) -> GameState:
         if self.win_state is not None:
@@ -87,7 +150,8 @@ class GameState(Hashable):
             next_chip=self.next_chip.swap_chip(),
             chips_in_a_row=self.chips_in_a_row,
             parent=self,
-            copy_grid=False
+            copy_grid=False,
+            canonical=self.canonical
         )
         self.children.append(child)
 
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import pickle
+import struct
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid, BitGrid
+from n_in_a_row.win_state import WinState
+
+from .game_state import GameState
+from .leaf_bitmap import LeafBitmap
+
+
+# Record layout, all integers are big-endian:
+#   header   version, flags, rows, cols, chips_in_a_row, next_chip, win_state, grid kind: 8 x uint8
+#   counts   parents, children, children_mirrored, child_leaves: 4 x uint32
+#   counter  DRAW, GREEN, RED leaf counts: 3 x uint32, only with _HAS_COUNTER
+#   result   result win state, best col: 2 x uint8 and distance: uint16, only with _HAS_RESULT
+#   board    2 bits per cell in row-major order
+#   mirrored 1 bit per child
+#   leaves   per outcome in child_leaves: win state as uint8 and the LeafBitmap bytes
+#   ids      game_state_id, orientation_id, mirror_id (only with _CANONICAL),
+#            then parents and children: int64 or uint64 each
+# Version 1 records kept leaf ids after the children instead of the leaf bitmaps,
+# those are dropped on decode. Version 2 records have no result.
+CODEC_VERSION = 3
+_LEAF_IDS_VERSION = 1
+_SUPPORTED_VERSIONS = (CODEC_VERSION, 2, _LEAF_IDS_VERSION)
+
+_HEADER = struct.Struct('!8B')
+_COUNTS = struct.Struct('!4I')
+_COUNTER = struct.Struct('!3I')
+_RESULT = struct.Struct('!2BH')
+
+_CANONICAL = 1
+_HAS_COUNTER = 2
+_SIGNED_IDS = 4
+_HAS_RESULT = 8
+
+_NO_WIN_STATE = 0xFF
+_NO_COL = 0xFF
+
+_GRID_KINDS = (Grid, BitGrid)
+
+_PICKLE_PROTO = 0x80
+
+# Leaf rank tables of a tree: per outcome the win state and whether the ids are signed
+# as 2 x uint8, the count of ranks as uint32, the leaf id of every rank as int64 or uint64
+# and the rank of the mirrored leaf as uint32
+_LEAF_RANKS = struct.Struct('!2BI')
+
+_BYTE_CELLS = [(byte & 3, byte >> 2 & 3, byte >> 4 & 3, byte >> 6 & 3) for byte in range(256)]
+
+
+def encode_game_state(game_state: GameState) -> bytes:
+    # game_state must be in the stored form, i.e. with ids in parents and children
+    grid = game_state.grid
+    parents: List[int] = game_state.parents
+    children: List[int] = game_state.children
+    children_mirrored: List[bool] = getattr(game_state, 'children_mirrored', [])
+    child_leaves = game_state.child_leaves
+
+    ids = [game_state.game_state_id, game_state.orientation_id]
+    flags = 0
+    if game_state.canonical:
+        flags |= _CANONICAL
+        ids.append(game_state.mirror_id)
+    ids.extend(parents)
+    ids.extend(children)
+    if any(game_state_id < 0 for game_state_id in ids):
+        flags |= _SIGNED_IDS
+    if game_state.win_states_counter is not None:
+        flags |= _HAS_COUNTER
+    result = getattr(game_state, 'result', None)
+    if result is not None:
+        flags |= _HAS_RESULT
+
+    chunks = [
+        _HEADER.pack(
+            CODEC_VERSION,
+            flags,
+            grid.rows,
+            grid.cols,
+            game_state.chips_in_a_row,
+            game_state.next_chip.value,
+            _NO_WIN_STATE if game_state.win_state is None else game_state.win_state.value,
+            _GRID_KINDS.index(type(grid))
+        ),
+        _COUNTS.pack(len(parents), len(children), len(children_mirrored), len(child_leaves))
+    ]
+    if flags & _HAS_COUNTER:
+        chunks.append(_COUNTER.pack(*(
+            game_state.win_states_counter.get(win_state, 0)
+            for win_state in (WinState.DRAW, WinState.GREEN, WinState.RED)
+        )))
+    if flags & _HAS_RESULT:
+        chunks.append(_RESULT.pack(
+            result.value,
+            _NO_COL if game_state.best_col is None else game_state.best_col,
+            game_state.distance
+        ))
+    chunks.append(_pack_cells(grid.to_cells()))
+    chunks.append(np.packbits(np.array(children_mirrored, dtype=np.bool_)).tobytes())
+    for win_state, leaves in child_leaves.items():
+        chunks.append(bytes([win_state.value]))
+        chunks.append(leaves.to_bytes())
+    chunks.append(np.array(ids, dtype='>i8' if flags & _SIGNED_IDS else '>u8').tobytes())
+    return b''.join(chunks)
+
+
+def decode_game_state(data: bytes) -> GameState:
+    if data[0] == _PICKLE_PROTO:
+        return _decode_pickled_game_state(data)
+    if data[0] not in _SUPPORTED_VERSIONS:
+        raise GameStateCodecError(f'Unsupported GameState record version {data[0]}')
+
+    version, flags, rows, cols, chips_in_a_row, next_chip, win_state, grid_kind = \
+        _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    parents_count, children_count, mirrored_count, leaves_count = _COUNTS.unpack_from(data, offset)
+    offset += _COUNTS.size
+
+    win_states_counter = None
+    if flags & _HAS_COUNTER:
+        win_states_counter = Counter({
+            win_state: count
+            for win_state, count in zip(
+                (WinState.DRAW, WinState.GREEN, WinState.RED),
+                _COUNTER.unpack_from(data, offset)
+            )
+            if count
+        })
+        offset += _COUNTER.size
+
+    result = distance = best_col = None
+    if flags & _HAS_RESULT:
+        result_value, best_col, distance = _RESULT.unpack_from(data, offset)
+        result = WinState(result_value)
+        if best_col == _NO_COL:
+            best_col = None
+        offset += _RESULT.size
+
+    cells_count = rows * cols
+    board_size = (cells_count + 3) // 4
+    cells = _unpack_cells(data[offset:offset + board_size], cells_count)
+    offset += board_size
+
+    mirrored_size = (mirrored_count + 7) // 8
+    children_mirrored = np.unpackbits(
+        np.frombuffer(data, dtype=np.uint8, count=mirrored_size, offset=offset),
+        count=mirrored_count
+    ).astype(bool).tolist()
+    offset += mirrored_size
+
+    child_leaves = {}
+    if version != _LEAF_IDS_VERSION:
+        for _ in range(leaves_count):
+            win_state_value = data[offset]
+            child_leaves[WinState(win_state_value)], offset = LeafBitmap.read(data, offset + 1)
+
+    ids = np.frombuffer(data, dtype='>i8' if flags & _SIGNED_IDS else '>u8', offset=offset).tolist()
+
+    game_state = GameState.__new__(GameState)
+    game_state.grid = _GRID_KINDS[grid_kind].from_cells(rows, cols, cells)
+    game_state.next_chip = Chip(next_chip)
+    game_state.chips_in_a_row = chips_in_a_row
+    game_state.canonical = bool(flags & _CANONICAL)
+    game_state.win_state = None if win_state == _NO_WIN_STATE else WinState(win_state)
+    game_state.win_states_counter = win_states_counter
+
+    game_state.game_state_id = ids[0]
+    game_state.orientation_id = ids[1]
+    offset = 2
+    if game_state.canonical:
+        game_state.mirror_id = ids[2]
+        offset = 3
+    game_state.parents = ids[offset:offset + parents_count]
+    offset += parents_count
+    game_state.children = ids[offset:offset + children_count]
+    offset += children_count
+    game_state.children_mirrored = children_mirrored
+    game_state.child_leaves = child_leaves
+    game_state.result = result
+    game_state.distance = distance
+    game_state.best_col = best_col
+    return game_state
+
+
+def encode_leaf_ranks(
+        leaf_rank_ids: Dict[WinState, List[int]],
+        mirror_ranks: Dict[WinState, np.ndarray]
+) -> bytes:
+    chunks = []
+    for win_state, rank_ids in leaf_rank_ids.items():
+        signed = any(leaf_id < 0 for leaf_id in rank_ids)
+        chunks.append(_LEAF_RANKS.pack(win_state.value, signed, len(rank_ids)))
+        chunks.append(np.array(rank_ids, dtype='>i8' if signed else '>u8').tobytes())
+        chunks.append(mirror_ranks[win_state].astype('>u4').tobytes())
+    return b''.join(chunks)
+
+
+def decode_leaf_ranks(data: bytes) -> Tuple[Dict[WinState, List[int]], Dict[WinState, np.ndarray]]:
+    leaf_rank_ids = {}
+    mirror_ranks = {}
+    offset = 0
+    while offset < len(data):
+        win_state_value, signed, count = _LEAF_RANKS.unpack_from(data, offset)
+        offset += _LEAF_RANKS.size
+        win_state = WinState(win_state_value)
+        leaf_rank_ids[win_state] = np.frombuffer(
+            data, dtype='>i8' if signed else '>u8', count=count, offset=offset
+        ).tolist()
+        offset += 8 * count
+        mirror_ranks[win_state] = np.frombuffer(data, dtype='>u4', count=count, offset=offset).astype(np.uint32)
+        offset += 4 * count
+    return leaf_rank_ids, mirror_ranks
+
+
+def is_pickled_game_state(data: bytes) -> bool:
+    return data[0] == _PICKLE_PROTO
+
+
+def _decode_pickled_game_state(data: bytes) -> GameState:
+    game_state: GameState = pickle.loads(data)
+    # the grids of old records lack the keys, line lengths and undo log and keep older union
+    # managers, the board is set up again from its cells
+    grid = game_state.grid
+    game_state.grid = type(grid).from_cells(grid.rows, grid.cols, grid.to_cells())
+    # fill in attributes added after the record was written
+    game_state.__dict__.setdefault('canonical', False)
+    game_state.__dict__.setdefault('children_mirrored', [False] * len(game_state.children))
+    # leaf ids of old records can't be turned into leaf ranks
+    game_state.__dict__.pop('child_leaf_node_ids', None)
+    game_state.__dict__.setdefault('child_leaves', {})
+    for attr in ('result', 'distance', 'best_col'):
+        game_state.__dict__.setdefault(attr, None)
+    return game_state
+
+
+def _pack_cells(cells: List[int]) -> bytes:
+    cells = cells + [0] * (-len(cells) % 4)
+    return bytes(
+        cells[i] | cells[i + 1] << 2 | cells[i + 2] << 4 | cells[i + 3] << 6
+        for i in range(0, len(cells), 4)
+    )
+
+
+def _unpack_cells(data: bytes, cells_count: int) -> List[int]:
+    return [cell for byte in data for cell in _BYTE_CELLS[byte]][:cells_count]
+
+
+class GameStateCodecError(ValueError):
+    pass
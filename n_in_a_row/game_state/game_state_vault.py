@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import pickle
 from copy import copy, deepcopy
-from typing import cast
-
-import redis
+from typing import Dict, Iterable, List, Optional, Sequence, cast
 
 from n_in_a_row.game_state import GameState
+from n_in_a_row.game_state.lru_cache import LRUCache
+from n_in_a_row.game_state.bloom_filter import BloomFilter
+from n_in_a_row.game_state.storage import StorageBackend, GameStateEdges, create_backend
+from n_in_a_row.game_state.game_state_codec import (
+    encode_game_state, decode_game_state, is_pickled_game_state
+)
 from n_in_a_row.config import load_config
 
 
@@ -30,7 +33,8 @@ class GameStateProxy:
         return getattr(self.game_state, item)
 
     def __hash__(self) -> int:
-        return self.game_state_id
+        # must match hash(int) for ids that compare equal to the proxy
+        return hash(self.game_state_id)
 
     def __copy__(self):
         self._load_game_state()
@@ -53,13 +57,38 @@ class GameStateProxy:
 
 class GameStateVault:
 
-    def __init__(self):
+    def __init__(self, backend: Optional[StorageBackend] = None):
         config = load_config()
-        self.redis = redis.Redis(
-            host=config['redis']['host'],
-            port=config['redis']['port']
+        self.backend = create_backend(config) if backend is None else backend
+        vault_config = config.get('vault', {})
+        self.verify_collisions = vault_config.get('verify_collisions', False)
+        self.flush_size = vault_config.get('flush_size', 1)
+
+        # write-behind buffer of serialized game states not yet written to the backend
+        self._pending: Dict[int, bytes] = {}
+        # edges of the buffered game states for backends that store them separately
+        self._pending_edges: Dict[int, GameStateEdges] = {}
+        # edges not yet appended to the parent lists of backends that keep them apart
+        self._appended_parents: Dict[int, List[int]] = {}
+        # write-back cache of game states in the stored form, i.e. with ids instead of edges;
+        # loaded game states share their grids with it, so save a game state after changing it
+        self.cache = LRUCache(
+            max_entries=vault_config.get('cache_size'),
+            max_bytes=vault_config.get('cache_bytes'),
+            on_evict=self._on_cache_evict
         )
 
+        # ids of the saved game states, the backend is only asked for the ids that may be in it
+        self.saved_filter: Optional[BloomFilter] = None
+        # backend reads skipped by the filter, and the ones it let through that were missing
+        self.filter_skips = 0
+        self.filter_false_positives = 0
+        expected_nodes = vault_config.get('bloom_expected_nodes')
+        if expected_nodes:
+            self.saved_filter = BloomFilter(expected_nodes, vault_config.get('bloom_error_rate', 0.01))
+            # a single pass over the keys, len() may have to scan them as well
+            self.rebuild_filter()
+
     def save_game_state(
             self,
             game_state: GameState,
@@ -67,29 +96,329 @@ class GameStateVault:
             overwrite: bool = True
     ) -> int:
         game_state_id = game_state.game_state_id
-        if not overwrite and game_state_id in self.redis:
+        if not overwrite and self.exists_many([game_state_id])[0]:
             return game_state_id
+        self.save_many([game_state])
+        return game_state_id
+
+    def save_many(self, game_states: Iterable[GameState]) -> List[int]:
+        return self.save_stored_many(self._to_stored(game_state) for game_state in game_states)
+
+    def save_stored_many(self, stored_game_states: Iterable[GameState]) -> List[int]:
+        # game states in the stored form, e.g. decoded from another vault
+        game_state_ids = []
+        for stored_game_state in stored_game_states:
+            game_state_id = stored_game_state.game_state_id
+            if self.backend.appends_parents:
+                self._save_parents(game_state_id, stored_game_state.parents)
+            self.cache.put(
+                game_state_id,
+                stored_game_state,
+                size=self._estimate_size(stored_game_state),
+                dirty=True
+            )
+            game_state_ids.append(game_state_id)
+        if self.saved_filter is not None:
+            self.saved_filter.add_many(game_state_ids)
+        return game_state_ids
+
+    def add_parent(self, game_state_id: int, parent_id: int) -> None:
+        # adds an edge to a saved game state, a single append for the backends that support it
+        if not self.backend.appends_parents:
+            stored_game_state = self.load_stored_many([game_state_id])[0]
+            if stored_game_state is None:
+                raise GameStateNotInVaultError(game_state_id)
+            stored_game_state = copy(stored_game_state)
+            stored_game_state.parents = stored_game_state.parents + [parent_id]
+            self.save_stored_many([stored_game_state])
+            return
+        stored_game_state = self.cache.peek(game_state_id)
+        if stored_game_state is not None and stored_game_state.parents is not None:
+            if parent_id in stored_game_state.parents:
+                return
+            # a new list, the old one may be shared with a loaded game state
+            stored_game_state.parents = stored_game_state.parents + [parent_id]
+        self._appended_parents.setdefault(game_state_id, []).append(parent_id)
+        self._flush_parents_if_full()
+
+    def _save_parents(self, game_state_id: int, parent_ids: Optional[List[int]]) -> None:
+        # Only the edges missing from the cached list, i.e. the written edges and the pending ones,
+        # are appended. The list is never replaced, so the edges another vault appended after
+        # this game state was loaded are kept. None means the parents were not loaded.
+        if not parent_ids:
+            return
+        cached_game_state = self.cache.peek(game_state_id)
+        if cached_game_state is not None and cached_game_state.parents is not None:
+            cached_parent_ids = set(cached_game_state.parents)
+            parent_ids = [parent_id for parent_id in parent_ids if parent_id not in cached_parent_ids]
+            if not parent_ids:
+                return
+        self._appended_parents.setdefault(game_state_id, []).extend(parent_ids)
+        self._flush_parents_if_full()
+
+    def _flush_parents_if_full(self) -> None:
+        if len(self._appended_parents) >= self.flush_size:
+            self._flush_parents()
+
+    def _flush_parents(self) -> None:
+        if self._appended_parents:
+            self.backend.append_parents(self._appended_parents)
+            self._appended_parents = {}
+
+    def save_meta(self, name: str, data: bytes) -> None:
+        # tables that belong to a whole tree, written right away
+        self.backend.put_meta(name, data)
+
+    def load_meta(self, name: str) -> Optional[bytes]:
+        return self.backend.get_meta(name)
+
+    def rebuild_filter(self, batch_size: int = 10000) -> None:
+        # fills the filter from the backend, e.g. when reopening a vault built earlier
+        self.saved_filter.clear()
+        keys = []
+        for key in self.backend.keys():
+            keys.append(key)
+            if len(keys) >= batch_size:
+                self.saved_filter.add_many(keys)
+                keys = []
+        self.saved_filter.add_many(keys)
+        self.saved_filter.add_many(list(self._pending))
+
+    @property
+    def filter_error_rate(self) -> Optional[float]:
+        # share of the missing ids the filter failed to skip
+        misses = self.filter_skips + self.filter_false_positives
+        if not misses:
+            return None
+        return self.filter_false_positives / misses
+
+    def flush(self) -> None:
+        for game_state_id, stored_game_state in self.cache.dirty_items():
+            self._add_pending(game_state_id, stored_game_state)
+        self.cache.mark_clean()
+        self._flush_pending()
+        self.backend.sync()
+
+    def close(self) -> None:
+        self.flush()
+        self.backend.close()
+
+    def _flush_pending(self) -> None:
+        self._flush_parents()
+        if not self._pending:
+            return
+        self.backend.put_many(self._pending)
+        self._pending = {}
+        if self._pending_edges:
+            self.backend.put_edges(self._pending_edges)
+            self._pending_edges = {}
+
+    def _add_pending(self, game_state_id: int, stored_game_state: GameState) -> None:
+        if self.backend.stores_edges:
+            self._pending_edges[game_state_id] = GameStateEdges(
+                stored_game_state.parents,
+                stored_game_state.children,
+                stored_game_state.children_mirrored
+            )
+            stored_game_state = copy(stored_game_state)
+            stored_game_state.parents = []
+            stored_game_state.children = []
+            stored_game_state.children_mirrored = []
+        elif self.backend.appends_parents:
+            stored_game_state = copy(stored_game_state)
+            stored_game_state.parents = []
+        self._pending[game_state_id] = encode_game_state(stored_game_state)
+
+    def _on_cache_evict(self, game_state_id: int, stored_game_state: GameState, dirty: bool) -> None:
+        if not dirty:
+            return
+        self._add_pending(game_state_id, stored_game_state)
+        if len(self._pending) >= self.flush_size:
+            self._flush_pending()
+
+    def migrate_pickled(self, batch_size: int = 1000) -> int:
+        # re-encodes game states written by older versions with pickle
+        self.flush()
+        migrated = 0
+        keys = []
+        for key in self.backend.keys():
+            keys.append(key)
+            if len(keys) >= batch_size:
+                migrated += self._migrate_keys(keys)
+                keys = []
+        if keys:
+            migrated += self._migrate_keys(keys)
+        return migrated
+
+    def _migrate_keys(self, keys: List[int]) -> int:
+        encoded = {
+            key: encode_game_state(decode_game_state(data))
+            for key, data in zip(keys, self.backend.get_many(keys))
+            if data is not None and is_pickled_game_state(data)
+        }
+        self.backend.put_many(encoded)
+        return len(encoded)
+
+    def load_game_state(
+            self,
+            game_state_id: int,
+            expected: Optional[GameState] = None
+    ) -> GameState:
+        game_state = self.load_many(
+            [game_state_id],
+            expected=None if expected is None else [expected]
+        )[0]
+        if game_state is None:
+            raise GameStateNotInVaultError(game_state_id)
+        return game_state
+
+    def load_many(
+            self,
+            game_state_ids: Sequence[int],
+            expected: Optional[Sequence[GameState]] = None,
+            with_parents: bool = True
+    ) -> List[Optional[GameState]]:
+        # without parents the game states from backends that append them may have None parents
+        game_states: List[Optional[GameState]] = []
+        for i, stored_game_state in enumerate(self.load_stored_many(game_state_ids, with_parents)):
+            if stored_game_state is None:
+                game_states.append(None)
+                continue
+            game_state = self._from_stored(stored_game_state)
+            if (
+                    self.verify_collisions
+                    and expected is not None
+                    and not game_state.is_same_position(expected[i])
+            ):
+                raise GameStateCollisionError(game_state_ids[i])
+            game_states.append(game_state)
+        return game_states
+
+    def load_stored_many(
+            self,
+            game_state_ids: Sequence[int],
+            with_parents: bool = True
+    ) -> List[Optional[GameState]]:
+        # game states in the stored form, shared with the cache, so they must not be changed
+        stored_game_states = [self.cache.get(game_state_id) for game_state_id in game_state_ids]
+
+        missing = []
+        for i, stored_game_state in enumerate(stored_game_states):
+            if stored_game_state is not None:
+                continue
+            data = self._pending.get(game_state_ids[i])
+            if data is None:
+                missing.append(i)
+            else:
+                stored_game_states[i] = self._cache_data(
+                    game_state_ids[i], data, self._pending_edges.get(game_state_ids[i])
+                )
+        missing = self._filter_missing(game_state_ids, missing)
+        if missing:
+            fetched = self.backend.get_many([game_state_ids[i] for i in missing])
+            found = [(i, data) for i, data in zip(missing, fetched) if data is not None]
+            if self.saved_filter is not None:
+                self.filter_false_positives += len(missing) - len(found)
+            if self.backend.stores_edges:
+                edges = self.backend.get_edges([game_state_ids[i] for i, _ in found])
+            else:
+                edges = [None] * len(found)
+            for (i, data), game_state_edges in zip(found, edges):
+                stored_game_states[i] = self._cache_data(game_state_ids[i], data, game_state_edges)
+        if with_parents and self.backend.appends_parents:
+            self._load_parents({
+                stored_game_state.game_state_id: stored_game_state
+                for stored_game_state in stored_game_states
+                if stored_game_state is not None and stored_game_state.parents is None
+            })
+        return stored_game_states
+
+    def _load_parents(self, stored_game_states: Dict[int, GameState]) -> None:
+        # the written lists with the pending edges, after the parents kept in the records
+        # written before the backend appended them; an edge appended twice is kept once
+        if not stored_game_states:
+            return
+        game_state_ids = list(stored_game_states)
+        for game_state_id, written_parent_ids in zip(game_state_ids, self.backend.get_parents(game_state_ids)):
+            stored_game_state = stored_game_states[game_state_id]
+            stored_game_state.parents = list(dict.fromkeys(
+                (stored_game_state.parents or [])
+                + written_parent_ids
+                + self._appended_parents.get(game_state_id, [])
+            ))
+
+    def exists_many(self, game_state_ids: Sequence[int]) -> List[bool]:
+        exists = [
+            game_state_id in self.cache or game_state_id in self._pending
+            for game_state_id in game_state_ids
+        ]
+        missing = [i for i, game_state_exists in enumerate(exists) if not game_state_exists]
+        missing = self._filter_missing(game_state_ids, missing)
+        if missing:
+            for i, game_state_exists in zip(
+                    missing, self.backend.exists_many([game_state_ids[i] for i in missing])
+            ):
+                exists[i] = game_state_exists
+                if self.saved_filter is not None and not game_state_exists:
+                    self.filter_false_positives += 1
+        return exists
+
+    def _filter_missing(self, game_state_ids: Sequence[int], missing: List[int]) -> List[int]:
+        # positions of the missing ids that may be in the backend
+        if self.saved_filter is None or not missing:
+            return missing
+        maybe_saved = self.saved_filter.contains_many([game_state_ids[i] for i in missing])
+        filtered = [i for i, saved in zip(missing, maybe_saved) if saved]
+        self.filter_skips += len(missing) - len(filtered)
+        return filtered
+
+    def _cache_data(
+            self,
+            game_state_id: int,
+            data: bytes,
+            edges: Optional[GameStateEdges] = None
+    ) -> GameState:
+        stored_game_state = decode_game_state(data)
+        dirty = False
+        if edges is not None:
+            stored_game_state.parents = list(edges.parents)
+            stored_game_state.children = list(edges.children)
+            stored_game_state.children_mirrored = list(edges.children_mirrored)
+        elif self.backend.appends_parents:
+            if stored_game_state.parents:
+                # an older record, its parents are completed right away and moved to the list
+                self._load_parents({game_state_id: stored_game_state})
+                self._appended_parents[game_state_id] = list(stored_game_state.parents)
+                dirty = True
+            else:
+                # loaded when they are needed
+                stored_game_state.parents = None
+        self.cache.put(game_state_id, stored_game_state, size=len(data), dirty=dirty)
+        return stored_game_state
 
+    @staticmethod
+    def _estimate_size(stored_game_state: GameState) -> int:
+        edges = len(stored_game_state.parents or ()) + len(stored_game_state.children)
+        leaves = sum(leaves.nbytes for leaves in stored_game_state.child_leaves.values())
+        return 512 + 8 * stored_game_state.grid.rows * stored_game_state.grid.cols + 16 * edges + leaves
+
+    @staticmethod
+    def _to_stored(game_state: GameState) -> GameState:
         game_state = copy(game_state)
         if game_state.parents:
             game_state.parents = [parent.game_state_id for parent in game_state.parents]
         game_state.children = [child.game_state_id for child in game_state.children]
+        game_state.child_leaves = dict(game_state.child_leaves)
+        return game_state
 
-        data = pickle.dumps(game_state)
-        if not self.redis.set(game_state_id, data):
-            raise RuntimeError(f'Redis: Failed to save GameState {game_state_id}')
-        return game_state_id
-
-    def load_game_state(self, game_state_id: int) -> GameState:
-        data = self.redis.get(game_state_id)
-        if data is None:
-            raise GameStateNotInVaultError(game_state_id)
-        game_state: GameState = pickle.loads(data)
+    def _from_stored(self, stored_game_state: GameState) -> GameState:
+        game_state = copy(stored_game_state)
         if game_state.parents:
             game_state.parents = [GameStateProxy(cast(int, parent), self) for parent in game_state.parents]
         game_state.children = [
             GameStateProxy(cast(int, child), self) for child in game_state.children
         ]
+        game_state.child_leaves = dict(game_state.child_leaves)
         return game_state
 
 
@@ -100,3 +429,12 @@ class GameStateNotInVaultError(Exception):
             args = [f'GameState with id f{game_state_id} is not found']
         super().__init__(*args)
         self.game_state_id = game_state_id
+
+
+class GameStateCollisionError(Exception):
+
+    def __init__(self, game_state_id: int, *args):
+        if not args:
+            args = [f'Different GameStates share id {game_state_id}']
+        super().__init__(*args)
+        self.game_state_id = game_state_id
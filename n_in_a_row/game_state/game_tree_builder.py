@@ -1,86 +1,543 @@
+import os
+import pickle
+import tempfile
 from collections import deque, Counter
-from typing import Deque, List, Set
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from copy import copy
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from n_in_a_row.config import load_config, set_config
+from n_in_a_row.grid import GridIndex
+from n_in_a_row.win_state import WinState
 
 from .game_state import GameState
+from .leaf_bitmap import LeafBitmap
+from .game_state_codec import decode_game_state, decode_leaf_ranks, encode_leaf_ranks
 from .game_state_vault import GameStateVault, GameStateNotInVaultError
+from .storage import MemoryBackend
+
+
+# expansions of a worker between two exchanges of positions with the other workers
+_EXCHANGE_EXPANSIONS = 100
+
+
+class _Subtree(NamedTuple):
+    encoded_game_states: Dict[int, bytes]
+    leaf_node_ids: List[int]
+    # edges to the positions expanded by other subtrees, by their ids,
+    # and the orientations the subtree took them to be stored in
+    elsewhere_parents: Dict[int, List[int]]
+    elsewhere_orientation_ids: Dict[int, int]
+    expansions: int
+    transpositions: int
+    duplicate_pushes_avoided: int
+
+
+class _PositionLog:
+    # Positions claimed by the subtrees of a parallel build. A worker publishes the id -> stored
+    # orientation id of the positions its subtree saved since the last time, as numbered files
+    # named after the subtree root, and reads the files of the other subtrees once. The first
+    # orientation read for a position is kept, the merge flips the edges if another one is stored.
+
+    def __init__(self, path: str):
+        self.path = path
+        self.positions: Dict[int, int] = {}
+        self.subtree_id: Optional[int] = None
+        self._files = 0
+        self._read: Set[str] = set()
+
+    def start(self, subtree_id: int) -> None:
+        self.subtree_id = subtree_id
+        self._files = 0
+
+    def publish(self, positions: Dict[int, int]) -> None:
+        if not positions:
+            return
+        file_path = os.path.join(self.path, f'{self.subtree_id}.{self._files}.pickle')
+        with open(file_path + '.tmp', 'wb') as log_file:
+            pickle.dump(positions, log_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file_path + '.tmp', file_path)
+        self._files += 1
+
+    def refresh(self) -> None:
+        own_prefix = f'{self.subtree_id}.'
+        for name in os.listdir(self.path):
+            if name in self._read or name.startswith(own_prefix) or not name.endswith('.pickle'):
+                continue
+            with open(os.path.join(self.path, name), 'rb') as log_file:
+                positions: Dict[int, int] = pickle.load(log_file)
+            self._read.add(name)
+            self.positions.update(
+                (game_state_id, orientation_id)
+                for game_state_id, orientation_id in positions.items()
+                if game_state_id not in self.positions
+            )
 
 
 class GameTreeBuilder:
 
     def __init__(
             self,
-            game_state: GameState
+            game_state: GameState,
+            vault: Optional[GameStateVault] = None,
+            workers: Optional[int] = None,
+            split_ply: Optional[int] = None
     ):
+        builder_config = load_config().get('builder', {})
         self.root = game_state
         self.leaf_node_ids = []
+        # Leaves are ranked densely per outcome. Canonical leaves get a rank for the id of
+        # each orientation, since a leaf and its mirror are counted as different leaves.
+        self.leaf_ranks: Dict[int, int] = {}
+        self.leaf_rank_ids: Dict[WinState, List[int]] = {}
+        # rank -> rank of the leaf seen from the mirrored orientation, by outcome
+        self._mirror_ranks: Dict[WinState, np.ndarray] = {}
+        # the tables are saved in the vault with the tree and loaded along with its root
+        self.workers = builder_config.get('workers', 1) if workers is None else workers
+        self.split_ply = builder_config.get('split_ply', 2) if split_ply is None else split_ply
+        # positions expanded, children found already saved, and children found on the stack
+        # that would have been pushed and expanded again
+        self.expansions = 0
+        self.transpositions = 0
+        self.duplicate_pushes_avoided = 0
+        # positions expanded by more than one worker of a parallel build
+        self.duplicate_expansions = 0
+        # id -> stored orientation id of the positions expanded by other subtrees of a parallel
+        # build, only the edges to them are recorded, in elsewhere_parents. A worker exchanges
+        # them through the position log with the workers of the other subtrees while it builds,
+        # _claimed_positions are the ones it saved since the last exchange.
+        self.expanded_elsewhere: Dict[int, int] = {}
+        self.elsewhere_parents: Dict[int, List[int]] = {}
+        self.position_log: Optional[_PositionLog] = None
+        self._claimed_positions: Dict[int, int] = {}
+        # edges of merged subtrees to positions of the subtrees still being built, by the child
+        # ids, as the parent ids and the orientation the child was taken to be stored in
+        self._pending_elsewhere: Dict[int, List[Tuple[int, int]]] = {}
 
-        self.vault = GameStateVault()
+        self.vault = GameStateVault() if vault is None else vault
 
-    def _build_solution_tree(self) -> None:
-        game_states_stack: Deque[GameState] = deque([self.root])
+    def _build_solution_tree(self, split_ply: Optional[int] = None) -> List[int]:
+        # with split_ply the game states at that ply are saved without children,
+        # their ids are returned so the subtrees can be built separately
+        split_game_state_ids = []
+        game_states_stack: Deque[Tuple[GameState, int]] = deque([(self.root, 0)])
+        # positions pushed on the stack and not saved yet, a position reached again before
+        # it is saved gets the new parent instead of a second push
+        in_flight: Dict[int, GameState] = {self.root.game_state_id: self.root}
         while game_states_stack:
-            game_state = game_states_stack.pop()
+            game_state, ply = game_states_stack.pop()
+            del in_flight[game_state.game_state_id]
 
             if game_state.win_state is not None:
                 game_state_id = self.vault.save_game_state(game_state)
                 self.leaf_node_ids.append(game_state_id)
+                self._claim(game_state)
+                continue
+
+            if ply == split_ply:
+                split_game_state_ids.append(self.vault.save_game_state(game_state))
                 continue
 
-            for index in game_state.grid.get_possible_moves():
-                next_game_state = game_state.make_move(index)
-                try:
-                    next_game_state = self.vault.load_game_state(next_game_state.game_state_id)
-                    next_game_state.parents.append(game_state)
-                    self.vault.save_game_state(next_game_state)
-                except GameStateNotInVaultError:
-                    game_states_stack.append(next_game_state)
+            self.expansions += 1
+            if self.position_log is not None and self.expansions % _EXCHANGE_EXPANSIONS == 0:
+                self._exchange_positions()
+            # the children are expanded on the grid of the game state, a child gets a grid of its
+            # own only when it is pushed on the stack, the ids are cached while the move is on the grid
+            grid = game_state.grid
+            next_game_states = []
+            unique_game_states: Dict[int, GameState] = {}
+            moves: Dict[int, GridIndex] = {}
+            for index in grid.get_possible_moves():
+                grid.push(index.col, game_state.next_chip)
+                next_game_state = GameState(
+                    grid,
+                    next_chip=game_state.next_chip.swap_chip(),
+                    chips_in_a_row=game_state.chips_in_a_row,
+                    parent=game_state,
+                    copy_grid=False,
+                    canonical=game_state.canonical
+                )
+                game_state_id = next_game_state.game_state_id
+                grid.pop()
+                next_game_states.append(next_game_state)
+                # canonical siblings may be mirrors of each other and share an id
+                if game_state_id not in unique_game_states:
+                    unique_game_states[game_state_id] = next_game_state
+                    moves[game_state_id] = index
+            game_state.children.extend(next_game_states)
+
+            # stored orientations of the children
+            orientation_ids: Dict[int, int] = {}
+            new_game_states: Dict[int, GameState] = {}
+            for game_state_id, next_game_state in unique_game_states.items():
+                pushed_game_state = in_flight.get(game_state_id)
+                if pushed_game_state is not None:
+                    pushed_game_state.parents.append(game_state)
+                    orientation_ids[game_state_id] = pushed_game_state.orientation_id
+                    self.duplicate_pushes_avoided += 1
+                else:
+                    new_game_states[game_state_id] = next_game_state
+            if self.vault.verify_collisions:
+                # compared with the saved positions of the same ids
+                for game_state_id, next_game_state in new_game_states.items():
+                    self._take_snapshot(game_state, next_game_state, moves[game_state_id])
+            # only the orientations of the saved children are needed, the edges are added to them
+            loaded_game_states = self.vault.load_many(
+                list(new_game_states),
+                expected=list(new_game_states.values()),
+                with_parents=False
+            )
+
+            for next_game_state, loaded_game_state in zip(new_game_states.values(), loaded_game_states):
+                game_state_id = next_game_state.game_state_id
+                if loaded_game_state is not None:
+                    self.vault.add_parent(game_state_id, game_state.game_state_id)
+                    orientation_ids[game_state_id] = loaded_game_state.orientation_id
+                    self.transpositions += 1
+                elif game_state_id in self.expanded_elsewhere:
+                    # looked up after the own vault, another subtree may claim a position
+                    # after this one has saved it
+                    self.elsewhere_parents.setdefault(game_state_id, []).append(game_state.game_state_id)
+                    orientation_ids[game_state_id] = self.expanded_elsewhere[game_state_id]
+                    self.transpositions += 1
+                else:
+                    self._take_snapshot(game_state, next_game_state, moves[game_state_id])
+                    orientation_ids[game_state_id] = next_game_state.orientation_id
+                    in_flight[game_state_id] = next_game_state
+                    game_states_stack.append((next_game_state, ply + 1))
+            for next_game_state in next_game_states:
+                game_state.children_mirrored.append(
+                    orientation_ids[next_game_state.game_state_id] != next_game_state.orientation_id
+                )
 
             self.vault.save_game_state(game_state)
+            self._claim(game_state)
+        return split_game_state_ids
+
+    @staticmethod
+    def _take_snapshot(game_state: GameState, next_game_state: GameState, index: GridIndex) -> None:
+        grid = game_state.grid
+        if next_game_state.grid is grid:
+            grid.push(index.col, game_state.next_chip)
+            next_game_state.grid = grid.snapshot()
+            grid.pop()
+
+    def _claim(self, game_state: GameState) -> None:
+        if self.position_log is not None:
+            self._claimed_positions[game_state.game_state_id] = game_state.orientation_id
+
+    def _exchange_positions(self) -> None:
+        self.position_log.publish(self._claimed_positions)
+        self._claimed_positions = {}
+        self.position_log.refresh()
+
+    def _build_solution_tree_parallel(self) -> None:
+        # every position is reached at the same ply, so the subtrees below the split ply share
+        # positions only deeper down. The workers skip the positions the others have claimed,
+        # the subtrees are merged into the vault as they arrive.
+        split_game_state_ids = self._build_solution_tree(split_ply=self.split_ply)
+        subtree_roots: Deque[GameState] = deque()
+        for game_state in self.vault.load_many(split_game_state_ids, with_parents=False):
+            subtree_root = copy(game_state)
+            subtree_root.parents = []
+            subtree_roots.append(subtree_root)
+
+        with tempfile.TemporaryDirectory() as log_path, ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(load_config(), log_path)
+        ) as executor:
+            running: Set[Future] = set()
+            while subtree_roots or running:
+                while subtree_roots and len(running) < self.workers:
+                    running.add(executor.submit(_build_subtree, subtree_roots.popleft()))
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    subtree: _Subtree = future.result()
+                    self._merge_subtree(subtree)
+                    self.leaf_node_ids.extend(subtree.leaf_node_ids)
+                    self.expansions += subtree.expansions
+                    self.transpositions += subtree.transpositions
+                    self.duplicate_pushes_avoided += subtree.duplicate_pushes_avoided
+        self.leaf_node_ids = list(dict.fromkeys(self.leaf_node_ids))
+
+    def _merge_subtree(self, subtree: _Subtree) -> None:
+        game_states = {
+            game_state_id: decode_game_state(data)
+            for game_state_id, data in subtree.encoded_game_states.items()
+        }
+        merged_game_states = dict(zip(game_states, self.vault.load_stored_many(list(game_states))))
+        elsewhere_ids = list(subtree.elsewhere_parents)
+        merged_elsewhere = dict(zip(elsewhere_ids, self.vault.load_stored_many(elsewhere_ids)))
+        # canonical game states merged from another subtree may be stored in another orientation
+        # than the one this subtree saved or took, the edges pointing to them have to be flipped
+        flipped_ids = {
+            game_state_id
+            for game_state_id, game_state in game_states.items()
+            if merged_game_states[game_state_id] is not None
+            and merged_game_states[game_state_id].orientation_id != game_state.orientation_id
+        }
+        flipped_ids.update(
+            game_state_id
+            for game_state_id, merged_game_state in merged_elsewhere.items()
+            if merged_game_state is not None
+            and merged_game_state.orientation_id != subtree.elsewhere_orientation_ids[game_state_id]
+        )
+
+        new_game_states: Dict[int, GameState] = {}
+        for game_state_id, game_state in game_states.items():
+            merged_game_state = merged_game_states[game_state_id]
+            if merged_game_state is not None and (
+                    merged_game_state.children or merged_game_state.win_state is not None
+            ):
+                # reached by another subtree as well
+                if game_state.win_state is None:
+                    self.duplicate_expansions += 1
+                self._add_parents(merged_game_state, game_state.parents)
+                continue
+            if flipped_ids:
+                game_state.children_mirrored = [
+                    mirrored != (child_id in flipped_ids)
+                    for child_id, mirrored in zip(game_state.children, game_state.children_mirrored)
+                ]
+            if merged_game_state is not None:
+                # the root of the subtree, saved at the split ply with the parents but no children
+                game_state.parents = merged_game_state.parents
+            new_game_states[game_state_id] = game_state
+        self.vault.save_stored_many(new_game_states.values())
+
+        for game_state_id, parent_ids in subtree.elsewhere_parents.items():
+            # the edges of the positions merged already come with them
+            parent_ids = [parent_id for parent_id in parent_ids if parent_id in new_game_states]
+            merged_game_state = merged_elsewhere[game_state_id]
+            if merged_game_state is None:
+                # claimed by a subtree that is still being built
+                orientation_id = subtree.elsewhere_orientation_ids[game_state_id]
+                self._pending_elsewhere.setdefault(game_state_id, []).extend(
+                    (parent_id, orientation_id) for parent_id in parent_ids
+                )
+            else:
+                self._add_parents(merged_game_state, parent_ids)
+        self._merge_pending_elsewhere(new_game_states)
+
+    def _merge_pending_elsewhere(self, new_game_states: Dict[int, GameState]) -> None:
+        for game_state_id in [
+            game_state_id for game_state_id in self._pending_elsewhere if game_state_id in new_game_states
+        ]:
+            game_state = new_game_states[game_state_id]
+            pending_edges = self._pending_elsewhere.pop(game_state_id)
+            self._add_parents(game_state, [parent_id for parent_id, _ in pending_edges])
+            flipped_parent_ids = [
+                parent_id
+                for parent_id, orientation_id in pending_edges
+                if orientation_id != game_state.orientation_id
+            ]
+            flipped_parents = []
+            for parent in self.vault.load_stored_many(flipped_parent_ids, with_parents=False):
+                parent = copy(parent)
+                parent.children_mirrored = [
+                    mirrored != (child_id == game_state_id)
+                    for child_id, mirrored in zip(parent.children, parent.children_mirrored)
+                ]
+                flipped_parents.append(parent)
+            self.vault.save_stored_many(flipped_parents)
+
+    def _add_parents(self, merged_game_state: GameState, parent_ids: List[int]) -> None:
+        merged_parent_ids = set(merged_game_state.parents)
+        for parent_id in parent_ids:
+            if parent_id not in merged_parent_ids:
+                merged_parent_ids.add(parent_id)
+                self.vault.add_parent(merged_game_state.game_state_id, parent_id)
 
     def _build_lower_parallel_regulation(self) -> List[Set[int]]:
+        # Kahn's algorithm by levels: a node is ready once all its children are in lower levels.
+        # Every parent edge is followed once, and only the stored forms are read, so no proxies
+        # are created for the edges.
         regulation: List[Set[int]] = []
-        leaf_nodes = self.get_leaf_nodes()
-        next_leaf_nodes = []
-        excluded_node_ids: Set[int] = set()
-        while leaf_nodes:
-            for node in leaf_nodes:
-                node_id = node.game_state_id
-                excluded_node_ids.add(node_id)
-                for parent in node.parents:
-                    parent_children = set(parent.children) - excluded_node_ids
-                    if not parent_children:
-                        next_leaf_nodes.append(parent)
-            regulation.append({node.game_state_id for node in leaf_nodes})
-            leaf_nodes = next_leaf_nodes
-            next_leaf_nodes = []
+        unresolved_children: Dict[int, int] = {}
+        level_node_ids = list(dict.fromkeys(self.leaf_node_ids))
+        while level_node_ids:
+            regulation.append(set(level_node_ids))
+
+            resolved_children = Counter(
+                parent_id
+                for node in self.vault.load_stored_many(level_node_ids)
+                for parent_id in set(node.parents)
+            )
+            new_parent_ids = [
+                parent_id for parent_id in resolved_children if parent_id not in unresolved_children
+            ]
+            new_parents = self.vault.load_stored_many(new_parent_ids, with_parents=False)
+            for parent_id, parent in zip(new_parent_ids, new_parents):
+                unresolved_children[parent_id] = len(set(parent.children))
+
+            level_node_ids = []
+            for parent_id, count in resolved_children.items():
+                unresolved_children[parent_id] -= count
+                if not unresolved_children[parent_id]:
+                    del unresolved_children[parent_id]
+                    level_node_ids.append(parent_id)
         return regulation
 
+    def _rank_leaves(self) -> None:
+        mirror_ranks: Dict[WinState, List[int]] = {}
+        for leaf in self.vault.load_stored_many(self.leaf_node_ids, with_parents=False):
+            rank_ids = self.leaf_rank_ids.setdefault(leaf.win_state, [])
+            ranks = mirror_ranks.setdefault(leaf.win_state, [])
+            rank = len(rank_ids)
+            self.leaf_ranks[leaf.orientation_id] = rank
+            rank_ids.append(leaf.orientation_id)
+            if leaf.canonical and leaf.mirror_id != leaf.orientation_id:
+                self.leaf_ranks[leaf.mirror_id] = rank + 1
+                rank_ids.append(leaf.mirror_id)
+                ranks.extend((rank + 1, rank))
+            else:
+                ranks.append(rank)
+        self._mirror_ranks = {
+            win_state: np.array(ranks, dtype=np.uint32) for win_state, ranks in mirror_ranks.items()
+        }
+        self.vault.save_meta(self._leaf_ranks_name(), encode_leaf_ranks(self.leaf_rank_ids, self._mirror_ranks))
+
+    def _load_leaf_ranks(self) -> None:
+        data = self.vault.load_meta(self._leaf_ranks_name())
+        if data is None:
+            # the tree was built before the tables were saved
+            return
+        self.leaf_rank_ids, self._mirror_ranks = decode_leaf_ranks(data)
+        self.leaf_ranks = {
+            leaf_id: rank
+            for rank_ids in self.leaf_rank_ids.values()
+            for rank, leaf_id in enumerate(rank_ids)
+        }
+
+    def _leaf_ranks_name(self) -> str:
+        return f'leaf_ranks.{self.root.game_state_id}'
+
     def _propagate_win_states(self) -> None:
+        self._rank_leaves()
         regulation = self._build_lower_parallel_regulation()
         for level_node_ids in regulation:
-            for node_id in level_node_ids:
-                node = self.vault.load_game_state(node_id)
+            # the parents are neither needed nor changed, so they are not read or written again
+            nodes = self.vault.load_many(list(level_node_ids), with_parents=False)
+            child_ids = list({child.game_state_id for node in nodes for child in node.children})
+            children = dict(zip(child_ids, self.vault.load_stored_many(child_ids, with_parents=False)))
+
+            for node in nodes:
+                # leaves are kept as seen from the stored orientation of the node
                 if node.win_state is not None:
-                    node.child_leaf_node_ids.add(node_id)
-                    win_states = [node.win_state]
+                    node.child_leaves = {
+                        node.win_state: LeafBitmap.from_ranks([self.leaf_ranks[node.orientation_id]])
+                    }
+                    node.result = node.win_state
+                    node.distance = 0
+                    node.best_col = None
                 else:
-                    for child in node.children:
-                        node.child_leaf_node_ids.update(child.child_leaf_node_ids)
-                    win_states = [
-                        self.vault.load_game_state(game_state_id).win_state
-                        for game_state_id in node.child_leaf_node_ids
-                    ]
-                node.win_states_counter = Counter(win_states)
-                self.vault.save_game_state(node)
+                    child_leaves: Dict[WinState, LeafBitmap] = {}
+                    for child, mirrored in zip(node.children, node.children_mirrored):
+                        for win_state, leaves in children[child.game_state_id].child_leaves.items():
+                            if mirrored:
+                                leaves = leaves.permuted(self._mirror_ranks[win_state])
+                            if win_state in child_leaves:
+                                leaves = child_leaves[win_state] | leaves
+                            child_leaves[win_state] = leaves
+                    node.child_leaves = child_leaves
+                    self._set_best_move(node, [children[child.game_state_id] for child in node.children])
+                node.win_states_counter = Counter({
+                    win_state: len(leaves) for win_state, leaves in node.child_leaves.items()
+                })
+            self.vault.save_many(nodes)
+
+    @staticmethod
+    def _set_best_move(node: GameState, children: List[GameState]) -> None:
+        # the winner hurries and the loser delays, the first of equal moves is kept,
+        # a mirrored child has the same result, only its column is mirrored
+        win = WinState.from_chip(node.next_chip)
+        best_rank = None
+        for index, child in zip(node.grid.get_possible_moves(), children):
+            distance = child.distance + 1
+            if child.result == win:
+                rank = (2, -distance)
+            elif child.result == WinState.DRAW:
+                rank = (1, distance)
+            else:
+                rank = (0, distance)
+            if best_rank is None or rank > best_rank:
+                best_rank = rank
+                node.result = child.result
+                node.distance = distance
+                node.best_col = index.col
+
+    def get_child_leaf_node_ids(self, game_state: GameState) -> Set[int]:
+        # ids of the leaves below game_state as seen from its stored orientation
+        return {
+            self.leaf_rank_ids[win_state][rank]
+            for win_state, leaves in game_state.child_leaves.items()
+            for rank in leaves
+        }
+
+    def get_child(
+            self,
+            game_state: GameState,
+            index: GridIndex,
+            mirrored: bool = False
+    ) -> Tuple[GameState, bool]:
+        # `mirrored` tells whether the caller sees game_state mirrored,
+        # the returned flag tells the same about the child
+        if mirrored:
+            index = game_state.mirror_index(index)
+        move = game_state.grid.get_possible_moves().index(index)
+        child = self.vault.load_game_state(game_state.children[move].game_state_id)
+        return child, mirrored != game_state.children_mirrored[move]
 
     def get_leaf_nodes(self):
-        return [self.vault.load_game_state(node_id) for node_id in self.leaf_node_ids]
+        return self.vault.load_many(self.leaf_node_ids)
 
     def build_solution_tree(self) -> None:
         try:
             self.root = self.vault.load_game_state(self.root.game_state_id)
+            self._load_leaf_ranks()
         except GameStateNotInVaultError:
-            self._build_solution_tree()
+            if self.workers > 1:
+                self._build_solution_tree_parallel()
+            else:
+                self._build_solution_tree()
             self._propagate_win_states()
+            self.vault.flush()
 
             self.root = self.vault.load_game_state(self.root.game_state_id)
+
+
+# the position log of the parallel build a worker process belongs to
+_worker_position_log: Optional[_PositionLog] = None
+
+
+def _init_worker(config: Dict[str, Any], log_path: str) -> None:
+    global _worker_position_log
+    set_config(config)
+    _worker_position_log = _PositionLog(log_path)
+
+
+def _build_subtree(game_state: GameState) -> _Subtree:
+    backend = MemoryBackend()
+    tree_builder = GameTreeBuilder(game_state, vault=GameStateVault(backend=backend), workers=1)
+    _worker_position_log.start(game_state.game_state_id)
+    _worker_position_log.refresh()
+    tree_builder.position_log = _worker_position_log
+    tree_builder.expanded_elsewhere = _worker_position_log.positions
+    tree_builder._build_solution_tree()
+    _worker_position_log.publish(tree_builder._claimed_positions)
+    tree_builder.vault.flush()
+    return _Subtree(
+        backend.items,
+        tree_builder.leaf_node_ids,
+        tree_builder.elsewhere_parents,
+        {
+            game_state_id: tree_builder.expanded_elsewhere[game_state_id]
+            for game_state_id in tree_builder.elsewhere_parents
+        },
+        tree_builder.expansions,
+        tree_builder.transpositions,
+        tree_builder.duplicate_pushes_avoided
+    )
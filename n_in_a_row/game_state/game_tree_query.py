@@ -0,0 +1,64 @@
+from typing import List, Optional, Tuple
+
+from n_in_a_row.grid import GridIndex
+
+from .game_state import GameState
+from .game_solver import SolverResult
+from .game_state_vault import GameStateVault, GameStateNotInVaultError
+
+
+class GameTreeQuery:
+    # Answers from the results GameTreeBuilder stores with the nodes, every position
+    # is a single read of its stored form. Game states may be in any orientation.
+
+    def __init__(self, vault: Optional[GameStateVault] = None):
+        self.vault = GameStateVault() if vault is None else vault
+
+    def best_move(self, game_state: GameState) -> Optional[GridIndex]:
+        # None for finished games
+        node, mirrored = self._load(game_state.game_state_id, game_state.orientation_id)
+        return best_move_of(node, mirrored)
+
+    def evaluate(self, game_state: GameState) -> SolverResult:
+        node, _ = self._load(game_state.game_state_id, game_state.orientation_id)
+        return SolverResult(node.result, node.distance)
+
+    def principal_variation(self, game_state: GameState, depth: Optional[int] = None) -> List[GridIndex]:
+        # the best moves of both players, at most depth of them
+        node, mirrored = self._load(game_state.game_state_id, game_state.orientation_id)
+        moves = []
+        while node.best_col is not None and (depth is None or len(moves) < depth):
+            moves.append(best_move_of(node, mirrored))
+            # children are in the order of the possible columns
+            move = list(node.grid.iter_possible_cols()).index(node.best_col)
+            mirrored = mirrored != node.children_mirrored[move]
+            node, _ = self._load(node.children[move])
+        return moves
+
+    def _load(self, game_state_id: int, orientation_id: Optional[int] = None) -> Tuple[GameState, bool]:
+        # the stored node and whether the caller sees it mirrored
+        node = self.vault.load_stored_many([game_state_id], with_parents=False)[0]
+        if node is None:
+            raise GameStateNotInVaultError(game_state_id)
+        if node.result is None:
+            raise GameStateNotSolvedError(game_state_id)
+        return node, orientation_id is not None and node.orientation_id != orientation_id
+
+
+def best_move_of(node: GameState, mirrored: bool) -> Optional[GridIndex]:
+    # the best move of a stored node as seen by a caller that holds it mirrored or not
+    if node.best_col is None:
+        return None
+    # a column and its mirror have the same height
+    row = node.grid.find_empty_row(node.best_col)
+    col = node.grid.mirror_col(node.best_col) if mirrored else node.best_col
+    return GridIndex.of(row, col)
+
+
+class GameStateNotSolvedError(Exception):
+
+    def __init__(self, game_state_id: int, *args):
+        if not args:
+            args = [f'GameState with id {game_state_id} has no stored result']
+        super().__init__(*args)
+        self.game_state_id = game_state_id
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import struct
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+
+# Roaring-style bitmap of leaf ranks. Ranks are split by their high 16 bits into containers,
+# a container holds the low 16 bits either as a sorted uint16 array or, once it has more than
+# _ARRAY_MAX_SIZE values, as a 65536-bit bitset of uint64 words.
+_CONTAINER_BITS = 16
+_LOW_MASK = (1 << _CONTAINER_BITS) - 1
+_ARRAY_MAX_SIZE = 4096
+_BITSET_WORDS = (1 << _CONTAINER_BITS) // 64
+
+_ARRAY = 0
+_BITSET = 1
+
+_COUNT = struct.Struct('<I')
+_CONTAINER_HEADER = struct.Struct('<HBI')
+
+
+class LeafBitmap:
+
+    __slots__ = ('_keys', '_containers')
+
+    def __init__(self, keys: List[int] = None, containers: List[np.ndarray] = None):
+        # containers must not be changed after construction, bitmaps share them
+        self._keys = [] if keys is None else keys
+        self._containers = [] if containers is None else containers
+
+    @classmethod
+    def from_ranks(cls, ranks: Iterable[int]) -> LeafBitmap:
+        ranks = np.unique(np.asarray(ranks if isinstance(ranks, np.ndarray) else list(ranks), dtype=np.uint32))
+        if not len(ranks):
+            return cls()
+        highs = ranks >> _CONTAINER_BITS
+        bounds = np.flatnonzero(np.diff(highs)) + 1
+        keys = []
+        containers = []
+        for chunk in np.split(ranks, bounds):
+            keys.append(int(chunk[0]) >> _CONTAINER_BITS)
+            containers.append(_optimize((chunk & _LOW_MASK).astype(np.uint16)))
+        return cls(keys, containers)
+
+    def to_array(self) -> np.ndarray:
+        if not self._keys:
+            return np.empty(0, dtype=np.uint32)
+        return np.concatenate([
+            (key << _CONTAINER_BITS) | _to_low_array(container).astype(np.uint32)
+            for key, container in zip(self._keys, self._containers)
+        ]).astype(np.uint32)
+
+    def permuted(self, permutation: np.ndarray) -> LeafBitmap:
+        return LeafBitmap.from_ranks(permutation[self.to_array()])
+
+    def __or__(self, other: LeafBitmap) -> LeafBitmap:
+        if not isinstance(other, LeafBitmap):
+            return NotImplemented
+        keys = []
+        containers = []
+        i = j = 0
+        while i < len(self._keys) and j < len(other._keys):
+            if self._keys[i] < other._keys[j]:
+                keys.append(self._keys[i])
+                containers.append(self._containers[i])
+                i += 1
+            elif self._keys[i] > other._keys[j]:
+                keys.append(other._keys[j])
+                containers.append(other._containers[j])
+                j += 1
+            else:
+                keys.append(self._keys[i])
+                containers.append(_union(self._containers[i], other._containers[j]))
+                i += 1
+                j += 1
+        keys.extend(self._keys[i:])
+        containers.extend(self._containers[i:])
+        keys.extend(other._keys[j:])
+        containers.extend(other._containers[j:])
+        return LeafBitmap(keys, containers)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(container.nbytes for container in self._containers)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(container) for container in self._containers)
+
+    def __bool__(self) -> bool:
+        return bool(self._keys)
+
+    def __contains__(self, rank: int) -> bool:
+        key = rank >> _CONTAINER_BITS
+        if key not in self._keys:
+            return False
+        container = self._containers[self._keys.index(key)]
+        low = rank & _LOW_MASK
+        if container.dtype == np.uint64:
+            return bool(int(container[low >> 6]) >> (low & 63) & 1)
+        position = np.searchsorted(container, low)
+        return position < len(container) and container[position] == low
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.to_array().tolist())
+
+    def __eq__(self, other):
+        if not isinstance(other, LeafBitmap):
+            return NotImplemented
+        return np.array_equal(self.to_array(), other.to_array())
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(self.__class__.__name__, self.to_array().tolist())
+
+    def to_bytes(self) -> bytes:
+        chunks = [_COUNT.pack(len(self._keys))]
+        for key, container in zip(self._keys, self._containers):
+            kind = _BITSET if container.dtype == np.uint64 else _ARRAY
+            chunks.append(_CONTAINER_HEADER.pack(key, kind, len(container)))
+            chunks.append(container.astype(container.dtype.newbyteorder('<'), copy=False).tobytes())
+        return b''.join(chunks)
+
+    @classmethod
+    def read(cls, data: bytes, offset: int = 0) -> Tuple[LeafBitmap, int]:
+        # returns the bitmap and the offset right after it
+        container_count, = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        keys = []
+        containers = []
+        for _ in range(container_count):
+            key, kind, length = _CONTAINER_HEADER.unpack_from(data, offset)
+            offset += _CONTAINER_HEADER.size
+            dtype = np.dtype('<u8') if kind == _BITSET else np.dtype('<u2')
+            container = np.frombuffer(data, dtype=dtype, count=length, offset=offset)
+            offset += length * dtype.itemsize
+            keys.append(key)
+            containers.append(container.astype(np.uint64 if kind == _BITSET else np.uint16))
+        return cls(keys, containers), offset
+
+
+def _optimize(lows: np.ndarray) -> np.ndarray:
+    if len(lows) <= _ARRAY_MAX_SIZE:
+        return lows
+    return _to_bitset(lows)
+
+
+def _to_bitset(lows: np.ndarray) -> np.ndarray:
+    bitset = np.zeros(_BITSET_WORDS, dtype=np.uint64)
+    np.bitwise_or.at(
+        bitset,
+        lows >> 6,
+        np.left_shift(np.uint64(1), (lows & 63).astype(np.uint64))
+    )
+    return bitset
+
+
+def _to_low_array(container: np.ndarray) -> np.ndarray:
+    if container.dtype == np.uint64:
+        return np.flatnonzero(np.unpackbits(container.view(np.uint8), bitorder='little')).astype(np.uint16)
+    return container
+
+
+def _union(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    if first.dtype == np.uint64 and second.dtype == np.uint64:
+        return first | second
+    if first.dtype == np.uint64 or second.dtype == np.uint64:
+        bitset, lows = (first, second) if first.dtype == np.uint64 else (second, first)
+        return bitset | _to_bitset(lows)
+    return _optimize(np.union1d(first, second).astype(np.uint16))
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if container.dtype == np.uint64:
+        return int(np.unpackbits(container.view(np.uint8)).sum())
+    return len(container)
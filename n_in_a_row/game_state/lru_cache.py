@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+
+class CacheEntry:
+
+    __slots__ = ('value', 'size', 'dirty')
+
+    def __init__(self, value: Any, size: int, dirty: bool):
+        self.value = value
+        self.size = size
+        self.dirty = dirty
+
+
+class LRUCache:
+
+    def __init__(
+            self,
+            max_entries: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+            on_evict: Optional[Callable[[Hashable, Any, bool], None]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __repr__(self) -> str:
+        return '{}(entries={}, bytes={}, hits={}, misses={}, evictions={})'.format(
+            self.__class__.__name__, len(self), self.size_bytes, self.hits, self.misses, self.evictions
+        )
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        # neither counted nor moved to the end
+        entry = self._entries.get(key)
+        return None if entry is None else entry.value
+
+    def put(self, key: Hashable, value: Any, size: int = 0, dirty: bool = False) -> None:
+        old_entry = self._entries.pop(key, None)
+        if old_entry is not None:
+            self.size_bytes -= old_entry.size
+        self._entries[key] = CacheEntry(value, size, dirty)
+        self.size_bytes += size
+        self._evict()
+
+    def dirty_items(self) -> Iterator[Tuple[Hashable, Any]]:
+        for key, entry in self._entries.items():
+            if entry.dirty:
+                yield key, entry.value
+
+    def mark_clean(self) -> None:
+        for entry in self._entries.values():
+            entry.dirty = False
+
+    def _is_overflown(self) -> bool:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        # keep at least the newest entry even if it alone is over the limit
+        return self.max_bytes is not None and self.size_bytes > self.max_bytes and len(self._entries) > 1
+
+    def _evict(self) -> None:
+        while self._is_overflown():
+            key, entry = self._entries.popitem(last=False)
+            self.size_bytes -= entry.size
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(key, entry.value, entry.dirty)
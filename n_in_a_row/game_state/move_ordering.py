@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import GridIndex
+
+
+class MoveOrdering:
+    # Orders moves for a pruned search: the best move known for the position first,
+    # then the killer moves of the ply, then by history score and distance to the center.
+
+    KILLERS_PER_PLY = 2
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        center = (cols - 1) / 2
+        self._center_rank = [abs(col - center) for col in range(cols)]
+        self._killers: List[List[int]] = [[] for _ in range(rows * cols + 1)]
+        # cutoff scores by Chip.value and cell, the EMPTY slot is unused
+        self._history: List[List[int]] = [[0] * (rows * cols) for _ in range(3)]
+
+    def order(
+            self,
+            moves: List[GridIndex],
+            ply: int,
+            chip: Chip,
+            best_col: Optional[int] = None
+    ) -> List[GridIndex]:
+        killers = self._killers[ply]
+        history = self._history[chip.value]
+
+        def key(index: GridIndex):
+            if index.col == best_col:
+                return 0, 0, 0
+            if index.col in killers:
+                return 1, killers.index(index.col), 0
+            return 2, -history[index.row * self.cols + index.col], self._center_rank[index.col]
+
+        return sorted(moves, key=key)
+
+    def on_cutoff(self, index: GridIndex, ply: int, depth: int, chip: Chip) -> None:
+        killers = self._killers[ply]
+        if index.col in killers:
+            killers.remove(index.col)
+        killers.insert(0, index.col)
+        del killers[self.KILLERS_PER_PLY:]
+        self._history[chip.value][index.row * self.cols + index.col] += depth * depth
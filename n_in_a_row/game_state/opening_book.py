@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from n_in_a_row.config import load_config
+from n_in_a_row.win_state import WinState
+from n_in_a_row.zobrist import is_zobrist_enabled
+
+from .game_state import GameState
+from .game_solver import GameSolver
+
+
+_MASK_64 = (1 << 64) - 1
+_NO_COL = -1
+
+
+class BookEntry(NamedTuple):
+    win_state: WinState
+    # plies until the game ends when the winner hurries and the loser delays
+    distance: int
+    # None for finished games
+    best_col: Optional[int]
+
+
+class OpeningBook:
+    # Solved positions of the first plies as sorted arrays of position keys, a key is
+    # the game_state_id folded to 64 unsigned bits. Best moves are stored as seen from
+    # the orientation of the game_state_id.
+
+    def __init__(
+            self,
+            rows: int,
+            cols: int,
+            chips_in_a_row: int,
+            canonical: bool,
+            keys: np.ndarray,
+            win_states: np.ndarray,
+            distances: np.ndarray,
+            best_cols: np.ndarray,
+            solver: Optional[GameSolver] = None,
+            search_depth: Optional[int] = None
+    ):
+        self.rows = rows
+        self.cols = cols
+        self.chips_in_a_row = chips_in_a_row
+        self.canonical = canonical
+        self.keys = keys
+        self.win_states = win_states
+        self.distances = distances
+        self.best_cols = best_cols
+        # bisecting a list is much faster than numpy calls for single keys
+        self._keys = keys.tolist()
+        self._values = [
+            (WinState(win_state), distance, best_col)
+            for win_state, distance, best_col in zip(win_states.tolist(), distances.tolist(), best_cols.tolist())
+        ]
+        # searches the positions that are not in the book, search_depth limits it
+        self.solver = solver if solver is not None else GameSolver()
+        self.search_depth = search_depth
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(
+            cls,
+            game_state: GameState,
+            plies: int,
+            solver: Optional[GameSolver] = None,
+            search_depth: Optional[int] = None
+    ) -> OpeningBook:
+        # solves every position up to plies moves after game_state, the positions the
+        # search_depth can't prove are left out of the book
+        solver = solver if solver is not None else GameSolver()
+        levels = _expand_levels(game_state, plies)
+        entries: Dict[int, Tuple[int, int, int]] = {}
+        # deeper positions first, so the shallower searches find them in the table
+        for level in reversed(levels):
+            for position in level:
+                result = solver.solve(position, max_depth=search_depth)
+                if result is None:
+                    continue
+                best_col = solver.get_best_col(position)
+                if best_col is None:
+                    best_col = _NO_COL
+                elif position.canonical and position.is_mirrored:
+                    best_col = position.grid.mirror_col(best_col)
+                entries[position.game_state_id & _MASK_64] = (result.win_state.value, result.distance, best_col)
+
+        keys = np.array(sorted(entries), dtype=np.uint64)
+        values = [entries[int(key)] for key in keys]
+        return cls(
+            rows=game_state.grid.rows,
+            cols=game_state.grid.cols,
+            chips_in_a_row=game_state.chips_in_a_row,
+            canonical=game_state.canonical,
+            keys=keys,
+            win_states=np.array([value[0] for value in values], dtype=np.int8),
+            distances=np.array([value[1] for value in values], dtype=np.uint16),
+            best_cols=np.array([value[2] for value in values], dtype=np.int16),
+            solver=solver,
+            search_depth=search_depth
+        )
+
+    def save(self, path: str) -> None:
+        config = load_config()
+        np.savez_compressed(
+            path,
+            rules=np.array([self.rows, self.cols, self.chips_in_a_row, int(self.canonical)], dtype=np.int64),
+            hash_algorithm=np.array(config['hash_algorithm']),
+            zobrist_seed=np.array(config['zobrist_seed'] if is_zobrist_enabled() else 0, dtype=np.int64),
+            keys=self.keys,
+            win_states=self.win_states,
+            distances=self.distances,
+            best_cols=self.best_cols
+        )
+
+    @classmethod
+    def load(
+            cls,
+            path: str,
+            solver: Optional[GameSolver] = None,
+            search_depth: Optional[int] = None
+    ) -> OpeningBook:
+        config = load_config()
+        with np.load(path) as data:
+            # the keys are only valid for the hashing they were built with
+            if str(data['hash_algorithm']) != config['hash_algorithm'] or (
+                    is_zobrist_enabled() and int(data['zobrist_seed']) != config['zobrist_seed']
+            ):
+                raise OpeningBookHashError(path, str(data['hash_algorithm']))
+            rows, cols, chips_in_a_row, canonical = (int(value) for value in data['rules'])
+            return cls(
+                rows=rows,
+                cols=cols,
+                chips_in_a_row=chips_in_a_row,
+                canonical=bool(canonical),
+                keys=data['keys'],
+                win_states=data['win_states'],
+                distances=data['distances'],
+                best_cols=data['best_cols'],
+                solver=solver,
+                search_depth=search_depth
+            )
+
+    def lookup(self, game_state: GameState) -> Optional[BookEntry]:
+        # searches the positions that are not in the book, None if the search can't prove the result
+        entry = self.get(game_state)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return self.search(game_state)
+
+    def get(self, game_state: GameState) -> Optional[BookEntry]:
+        grid = game_state.grid
+        if grid.rows != self.rows or grid.cols != self.cols or game_state.chips_in_a_row != self.chips_in_a_row:
+            return None
+        if game_state.canonical != self.canonical:
+            game_state = GameState(
+                grid,
+                next_chip=game_state.next_chip,
+                chips_in_a_row=game_state.chips_in_a_row,
+                copy_grid=False,
+                canonical=self.canonical
+            )
+        key = game_state.game_state_id & _MASK_64
+        position = bisect_left(self._keys, key)
+        if position == len(self._keys) or self._keys[position] != key:
+            return None
+        win_state, distance, best_col = self._values[position]
+        if best_col == _NO_COL:
+            best_col = None
+        elif game_state.canonical and game_state.is_mirrored:
+            best_col = grid.mirror_col(best_col)
+        return BookEntry(win_state, distance, best_col)
+
+    def search(self, game_state: GameState) -> Optional[BookEntry]:
+        result = self.solver.solve(game_state, max_depth=self.search_depth)
+        if result is None:
+            return None
+        return BookEntry(result.win_state, result.distance, self.solver.get_best_col(game_state))
+
+
+def _expand_levels(game_state: GameState, plies: int) -> List[List[GameState]]:
+    # unique positions by the number of moves after game_state
+    levels = [[game_state]]
+    seen = {game_state.game_state_id}
+    for _ in range(plies):
+        level = []
+        for parent in levels[-1]:
+            if parent.win_state is not None:
+                continue
+            for col in parent.grid.iter_possible_cols():
+                grid = parent.grid.snapshot()
+                grid.drop_chip(col, parent.next_chip)
+                child = GameState(
+                    grid,
+                    next_chip=parent.next_chip.swap_chip(),
+                    chips_in_a_row=parent.chips_in_a_row,
+                    copy_grid=False,
+                    canonical=parent.canonical
+                )
+                if child.game_state_id not in seen:
+                    seen.add(child.game_state_id)
+                    level.append(child)
+        levels.append(level)
+    return levels
+
+
+class OpeningBookError(Exception):
+    pass
+
+
+class OpeningBookHashError(OpeningBookError):
+
+    def __init__(self, path: str, hash_algorithm: str, *args):
+        if not args:
+            args = [f'Opening book {path} was built with different {hash_algorithm} keys']
+        super().__init__(*args)
+        self.path = path
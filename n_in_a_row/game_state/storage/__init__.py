@@ -0,0 +1,22 @@
+from typing import Any, Dict
+
+from .storage_backend import StorageBackend, StorageReadOnlyError, GameStateEdges
+from .memory_backend import MemoryBackend
+from .mmap_backend import MmapBackend
+from .sqlite_backend import SqliteBackend
+
+
+def create_backend(config: Dict[str, Any]) -> StorageBackend:
+    vault_config = config.get('vault', {})
+    backend = vault_config.get('backend', 'redis')
+    if backend == 'redis':
+        # imported here so that the local backends work without the redis package
+        from .redis_backend import RedisBackend
+        return RedisBackend(host=config['redis']['host'], port=config['redis']['port'])
+    if backend == 'memory':
+        return MemoryBackend()
+    if backend == 'mmap':
+        return MmapBackend(vault_config['mmap_path'], read_only=vault_config.get('mmap_read_only', False))
+    if backend == 'sqlite':
+        return SqliteBackend(vault_config['sqlite_path'])
+    raise ValueError(f'Unknown vault backend {backend}')
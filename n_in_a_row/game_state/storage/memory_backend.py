@@ -0,0 +1,51 @@
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from .storage_backend import StorageBackend
+
+
+class MemoryBackend(StorageBackend):
+
+    def __init__(self, append_parents: bool = False):
+        self.items: Dict[int, bytes] = {}
+        self.appends_parents = append_parents
+        # ordered sets of the parent ids
+        self.parents: Dict[int, Dict[int, None]] = {}
+        self.meta: Dict[str, bytes] = {}
+
+    def get_many(self, keys: Sequence[int]) -> List[Optional[bytes]]:
+        return [self.items.get(key) for key in keys]
+
+    def put_many(self, items: Dict[int, bytes]) -> None:
+        self.items.update(items)
+
+    def exists_many(self, keys: Sequence[int]) -> List[bool]:
+        return [key in self.items for key in keys]
+
+    def delete_many(self, keys: Sequence[int]) -> None:
+        for key in keys:
+            self.items.pop(key, None)
+            self.parents.pop(key, None)
+
+    def keys(self) -> Iterator[int]:
+        return iter(list(self.items))
+
+    def clear(self) -> None:
+        self.items = {}
+        self.parents = {}
+        self.meta = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def put_meta(self, name: str, data: bytes) -> None:
+        self.meta[name] = data
+
+    def get_meta(self, name: str) -> Optional[bytes]:
+        return self.meta.get(name)
+
+    def append_parents(self, parents: Dict[int, List[int]]) -> None:
+        for key, parent_ids in parents.items():
+            self.parents.setdefault(key, {}).update(dict.fromkeys(parent_ids))
+
+    def get_parents(self, keys: Sequence[int]) -> List[List[int]]:
+        return [list(self.parents.get(key, ())) for key in keys]
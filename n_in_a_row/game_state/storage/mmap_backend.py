@@ -0,0 +1,249 @@
+import glob
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .storage_backend import StorageBackend, StorageReadOnlyError
+
+
+# <path>.idx is an open-addressing hash table with linear probing:
+#   header  magic, capacity, used slots, used and deleted slots, end of data
+#   slots   key (two's complement), data offset, data length, state
+# <path>.dat holds the values one after another, a value is rewritten in place
+# when the new one fits and is appended otherwise.
+# <path>.<name>.meta holds the tables put with put_meta, one file each.
+_MAGIC = b'NIRIDX01'
+_HEADER = struct.Struct('<8sQQQQ')
+_HEADER_SIZE = 64
+_SLOT = struct.Struct('<QQII')
+_SLOT_DTYPE = np.dtype([('key', '<u8'), ('offset', '<u8'), ('length', '<u4'), ('state', '<u4')])
+
+_EMPTY = 0
+_USED = 1
+_DELETED = 2
+# set along with _USED for keys below zero, so signed and unsigned ids stay distinct
+_NEGATIVE = 4
+
+_MAX_LOAD = 0.7
+_MIN_DATA_SIZE = 1 << 20
+
+_MASK64 = (1 << 64) - 1
+_FIBONACCI = 0x9E3779B97F4A7C15
+
+
+class MmapBackend(StorageBackend):
+    # A read-only instance sees the data written before it was opened; it is meant
+    # for sharing a finished tree between processes, not for following a writer.
+
+    def __init__(self, path: str, capacity: int = 1 << 16, read_only: bool = False):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.data_path = path + '.dat'
+        self.read_only = read_only
+
+        if not os.path.exists(self.index_path):
+            if read_only:
+                raise FileNotFoundError(self.index_path)
+            self._create_files(max(16, 1 << (capacity - 1).bit_length()))
+        self._open()
+
+    def get_many(self, keys: Sequence[int]) -> List[Optional[bytes]]:
+        values = []
+        for key in keys:
+            slot, state, offset, length = self._find_slot(key)
+            if state & _USED:
+                if offset + length > len(self._data):
+                    self._remap_data()
+                values.append(self._data[offset:offset + length])
+            else:
+                values.append(None)
+        return values
+
+    def put_many(self, items: Dict[int, bytes]) -> None:
+        self._check_writable()
+        if not items:
+            return
+        self._reserve_slots(len(items))
+        self._reserve_data(sum(len(data) for data in items.values()))
+        for key, data in items.items():
+            slot, state, offset, length = self._find_slot(key)
+            if state & _USED:
+                if len(data) > length:
+                    offset = self._data_end
+                    self._data_end += len(data)
+            else:
+                offset = self._data_end
+                self._data_end += len(data)
+                self._used += 1
+                if state == _EMPTY:
+                    self._filled += 1
+            self._data[offset:offset + len(data)] = data
+            _SLOT.pack_into(
+                self._index,
+                _HEADER_SIZE + slot * _SLOT.size,
+                key & _MASK64,
+                offset,
+                len(data),
+                _USED | _NEGATIVE if key < 0 else _USED
+            )
+        self._write_header()
+
+    def exists_many(self, keys: Sequence[int]) -> List[bool]:
+        return [bool(self._find_slot(key)[1] & _USED) for key in keys]
+
+    def delete_many(self, keys: Sequence[int]) -> None:
+        self._check_writable()
+        for key in keys:
+            slot, state, offset, length = self._find_slot(key)
+            if state & _USED:
+                _SLOT.pack_into(self._index, _HEADER_SIZE + slot * _SLOT.size, 0, 0, 0, _DELETED)
+                self._used -= 1
+        self._write_header()
+
+    def keys(self) -> Iterator[int]:
+        return iter(self._used_keys())
+
+    def clear(self) -> None:
+        self._check_writable()
+        self._index[_HEADER_SIZE:] = bytes(len(self._index) - _HEADER_SIZE)
+        self._used = 0
+        self._filled = 0
+        self._data_end = 0
+        self._write_header()
+        for meta_path in glob.glob(glob.escape(self.path) + '.*.meta'):
+            os.remove(meta_path)
+
+    def __len__(self) -> int:
+        return self._used
+
+    def put_meta(self, name: str, data: bytes) -> None:
+        self._check_writable()
+        meta_path = self._meta_path(name)
+        with open(meta_path + '.tmp', 'wb') as meta_file:
+            meta_file.write(data)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def get_meta(self, name: str) -> Optional[bytes]:
+        try:
+            with open(self._meta_path(name), 'rb') as meta_file:
+                return meta_file.read()
+        except FileNotFoundError:
+            return None
+
+    def sync(self) -> None:
+        if not self.read_only:
+            self._write_header()
+            self._index.flush()
+            self._data.flush()
+
+    def close(self) -> None:
+        self.sync()
+        self._index.close()
+        self._data.close()
+        self._index_file.close()
+        self._data_file.close()
+
+    def _meta_path(self, name: str) -> str:
+        return f'{self.path}.{name}.meta'
+
+    def _find_slot(self, key: int) -> Tuple[int, int, int, int]:
+        # returns the slot holding the key, or the first free slot on its probe path
+        state_key = _USED | _NEGATIVE if key < 0 else _USED
+        key &= _MASK64
+        mask = self._capacity - 1
+        slot = ((key * _FIBONACCI) & _MASK64) >> self._shift
+        free_slot = -1
+        while True:
+            slot_key, offset, length, state = _SLOT.unpack_from(
+                self._index, _HEADER_SIZE + slot * _SLOT.size
+            )
+            if state == _EMPTY:
+                if free_slot >= 0:
+                    return free_slot, _DELETED, 0, 0
+                return slot, _EMPTY, 0, 0
+            if state == state_key and slot_key == key:
+                return slot, state, offset, length
+            if state == _DELETED and free_slot < 0:
+                free_slot = slot
+            slot = (slot + 1) & mask
+
+    def _used_keys(self) -> List[int]:
+        slots = np.frombuffer(self._index, dtype=_SLOT_DTYPE, count=self._capacity, offset=_HEADER_SIZE)
+        states = slots['state']
+        keys = slots['key'][(states & _USED) != 0].tolist()
+        negative = ((states[(states & _USED) != 0] & _NEGATIVE) != 0).tolist()
+        del slots, states
+        return [key - (1 << 64) if is_negative else key for key, is_negative in zip(keys, negative)]
+
+    def _reserve_slots(self, count: int) -> None:
+        if self._filled + count <= self._capacity * _MAX_LOAD:
+            return
+        capacity = self._capacity
+        while self._used + count > capacity * _MAX_LOAD:
+            capacity *= 2
+        self._rehash(capacity)
+
+    def _rehash(self, capacity: int) -> None:
+        slots = np.frombuffer(self._index, dtype=_SLOT_DTYPE, count=self._capacity, offset=_HEADER_SIZE)
+        used = slots[(slots['state'] & _USED) != 0].tolist()
+        del slots
+
+        self._index.close()
+        self._index = bytearray(_HEADER_SIZE + capacity * _SLOT.size)
+        self._capacity = capacity
+        self._shift = 64 - (capacity.bit_length() - 1)
+        for key, offset, length, state in used:
+            signed_key = key - (1 << 64) if state & _NEGATIVE else key
+            slot = self._find_slot(signed_key)[0]
+            _SLOT.pack_into(self._index, _HEADER_SIZE + slot * _SLOT.size, key, offset, length, state)
+        self._filled = self._used
+        self._write_header()
+
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'wb') as index_file:
+            index_file.write(self._index)
+        self._index_file.close()
+        os.replace(temp_path, self.index_path)
+        self._index_file = open(self.index_path, 'r+b')
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
+
+    def _reserve_data(self, size: int) -> None:
+        if self._data_end + size <= len(self._data):
+            return
+        new_size = max(2 * len(self._data), self._data_end + size)
+        self._data.close()
+        self._data_file.truncate(new_size)
+        self._data = mmap.mmap(self._data_file.fileno(), 0)
+
+    def _remap_data(self) -> None:
+        self._data.close()
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _create_files(self, capacity: int) -> None:
+        with open(self.index_path, 'wb') as index_file:
+            index_file.write(_HEADER.pack(_MAGIC, capacity, 0, 0, 0).ljust(_HEADER_SIZE, b'\0'))
+            index_file.truncate(_HEADER_SIZE + capacity * _SLOT.size)
+        with open(self.data_path, 'wb') as data_file:
+            data_file.truncate(_MIN_DATA_SIZE)
+
+    def _open(self) -> None:
+        mode, access = ('rb', mmap.ACCESS_READ) if self.read_only else ('r+b', mmap.ACCESS_WRITE)
+        self._index_file = open(self.index_path, mode)
+        self._data_file = open(self.data_path, mode)
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=access)
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=access)
+
+        magic, self._capacity, self._used, self._filled, self._data_end = _HEADER.unpack_from(self._index)
+        if magic != _MAGIC:
+            raise ValueError(f'{self.index_path} is not a game state index')
+        self._shift = 64 - (self._capacity.bit_length() - 1)
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._index, 0, _MAGIC, self._capacity, self._used, self._filled, self._data_end)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise StorageReadOnlyError()
@@ -0,0 +1,79 @@
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import redis
+
+from .storage_backend import StorageBackend
+
+
+# keys of the parent sets and of the tables put with put_meta, node keys are plain ids
+_PARENTS_PREFIX = 'parents:'
+_META_PREFIX = 'meta:'
+_PREFIXES = (_PARENTS_PREFIX.encode(), _META_PREFIX.encode())
+
+
+class RedisBackend(StorageBackend):
+    # The parents of a node are a set under parents:<id> next to the node, an edge is added
+    # with a single SADD, so adding it again changes nothing, and the sets are read with SMEMBERS
+    # in a pipeline. Every command touches one key, which keeps it usable on Redis Cluster.
+    # keys() and len() skip the prefixed keys, len() has to scan the database for them.
+
+    appends_parents = True
+
+    def __init__(self, host: str, port: int):
+        self.redis = redis.Redis(host=host, port=port)
+
+    def get_many(self, keys: Sequence[int]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return self.redis.mget(keys)
+
+    def put_many(self, items: Dict[int, bytes]) -> None:
+        if items and not self.redis.mset(items):
+            raise RuntimeError(f'Redis: Failed to save {len(items)} GameStates')
+
+    def exists_many(self, keys: Sequence[int]) -> List[bool]:
+        pipeline = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.exists(key)
+        return [bool(exists) for exists in pipeline.execute()]
+
+    def delete_many(self, keys: Sequence[int]) -> None:
+        if keys:
+            self.redis.delete(*keys)
+            self.redis.delete(*(_parents_key(key) for key in keys))
+
+    def keys(self) -> Iterator[int]:
+        for key in self.redis.scan_iter(count=1000):
+            if not key.startswith(_PREFIXES):
+                yield int(key)
+
+    def clear(self) -> None:
+        self.redis.flushdb()
+
+    def __len__(self) -> int:
+        return self.redis.dbsize() - sum(
+            1 for key in self.redis.scan_iter(count=1000) if key.startswith(_PREFIXES)
+        )
+
+    def put_meta(self, name: str, data: bytes) -> None:
+        self.redis.set(_META_PREFIX + name, data)
+
+    def get_meta(self, name: str) -> Optional[bytes]:
+        return self.redis.get(_META_PREFIX + name)
+
+    def append_parents(self, parents: Dict[int, List[int]]) -> None:
+        pipeline = self.redis.pipeline(transaction=False)
+        for key, parent_ids in parents.items():
+            if parent_ids:
+                pipeline.sadd(_parents_key(key), *parent_ids)
+        pipeline.execute()
+
+    def get_parents(self, keys: Sequence[int]) -> List[List[int]]:
+        pipeline = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.smembers(_parents_key(key))
+        return [[int(parent_id) for parent_id in parent_ids] for parent_ids in pipeline.execute()]
+
+
+def _parents_key(key: int) -> str:
+    return f'{_PARENTS_PREFIX}{key}'
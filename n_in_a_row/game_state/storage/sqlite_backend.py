@@ -0,0 +1,170 @@
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from .storage_backend import StorageBackend, GameStateEdges
+
+
+# SQLite integers are signed, so ids of 2 ** 63 and above are stored in two's complement.
+# A database is expected to hold ids of one hash mode only.
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS game_states (id INTEGER PRIMARY KEY, data BLOB NOT NULL)',
+    # kind is 0 for parents and 1 for children, position keeps the order of the lists
+    'CREATE TABLE IF NOT EXISTS edges ('
+    ' node_id INTEGER NOT NULL, kind INTEGER NOT NULL, position INTEGER NOT NULL,'
+    ' other_id INTEGER NOT NULL, mirrored INTEGER NOT NULL,'
+    ' PRIMARY KEY (node_id, kind, position)'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS edges_other_id ON edges (other_id, kind)',
+    'CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS tree_meta (name TEXT PRIMARY KEY, data BLOB NOT NULL)',
+)
+
+_PARENT = 0
+_CHILD = 1
+
+# lookups go in chunks of a fixed size, padded with the last id, so that every query
+# has the same text and reuses the prepared statement from the connection cache
+_CHUNK_SIZE = 256
+_IDS = ', '.join('?' * _CHUNK_SIZE)
+_SELECT_DATA = f'SELECT id, data FROM game_states WHERE id IN ({_IDS})'
+_SELECT_IDS = f'SELECT id FROM game_states WHERE id IN ({_IDS})'
+_SELECT_EDGES = (
+    f'SELECT node_id, kind, other_id, mirrored FROM edges WHERE node_id IN ({_IDS})'
+    ' ORDER BY node_id, kind, position'
+)
+
+_SIGN_BIT = 1 << 63
+
+
+def _to_signed(key: int) -> int:
+    return key - (1 << 64) if key >= _SIGN_BIT else key
+
+
+class SqliteBackend(StorageBackend):
+
+    stores_edges = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None, cached_statements=64)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in _SCHEMA:
+            self.connection.execute(statement)
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'unsigned_ids'").fetchone()
+        self._unsigned_ids = bool(row and row[0])
+
+    def get_many(self, keys: Sequence[int]) -> List[Optional[bytes]]:
+        signed_keys = [_to_signed(key) for key in keys]
+        found: Dict[int, bytes] = {}
+        for chunk in self._chunks(signed_keys):
+            found.update(self.connection.execute(_SELECT_DATA, chunk))
+        return [found.get(key) for key in signed_keys]
+
+    def put_many(self, items: Dict[int, bytes]) -> None:
+        if not items:
+            return
+        self._begin()
+        if not self._unsigned_ids and any(key >= _SIGN_BIT for key in items):
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('unsigned_ids', 1)")
+            self._unsigned_ids = True
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO game_states (id, data) VALUES (?, ?)',
+            ((_to_signed(key), data) for key, data in items.items())
+        )
+
+    def exists_many(self, keys: Sequence[int]) -> List[bool]:
+        signed_keys = [_to_signed(key) for key in keys]
+        found = set()
+        for chunk in self._chunks(signed_keys):
+            found.update(row[0] for row in self.connection.execute(_SELECT_IDS, chunk))
+        return [key in found for key in signed_keys]
+
+    def delete_many(self, keys: Sequence[int]) -> None:
+        if not keys:
+            return
+        self._begin()
+        signed_keys = [(_to_signed(key),) for key in keys]
+        self.connection.executemany('DELETE FROM game_states WHERE id = ?', signed_keys)
+        self.connection.executemany('DELETE FROM edges WHERE node_id = ?', signed_keys)
+
+    def put_edges(self, edges: Dict[int, GameStateEdges]) -> None:
+        if not edges:
+            return
+        self._begin()
+        self.connection.executemany(
+            'DELETE FROM edges WHERE node_id = ?',
+            ((_to_signed(key),) for key in edges)
+        )
+        rows = []
+        for key, (parents, children, children_mirrored) in edges.items():
+            node_id = _to_signed(key)
+            rows.extend(
+                (node_id, _PARENT, position, _to_signed(parent), 0)
+                for position, parent in enumerate(parents)
+            )
+            # children without a mirrored flag are read back as not mirrored
+            children_mirrored = list(children_mirrored) + [False] * (len(children) - len(children_mirrored))
+            rows.extend(
+                (node_id, _CHILD, position, _to_signed(child), int(mirrored))
+                for position, (child, mirrored) in enumerate(zip(children, children_mirrored))
+            )
+        self.connection.executemany('INSERT INTO edges VALUES (?, ?, ?, ?, ?)', rows)
+
+    def get_edges(self, keys: Sequence[int]) -> List[GameStateEdges]:
+        signed_keys = [_to_signed(key) for key in keys]
+        edges = {key: GameStateEdges([], [], []) for key in signed_keys}
+        for chunk in self._chunks(list(edges)):
+            for node_id, kind, other_id, mirrored in self.connection.execute(_SELECT_EDGES, chunk):
+                node_edges = edges[node_id]
+                if kind == _PARENT:
+                    node_edges.parents.append(self._from_signed(other_id))
+                else:
+                    node_edges.children.append(self._from_signed(other_id))
+                    node_edges.children_mirrored.append(bool(mirrored))
+        return [edges[key] for key in signed_keys]
+
+    def put_meta(self, name: str, data: bytes) -> None:
+        self._begin()
+        self.connection.execute('INSERT OR REPLACE INTO tree_meta VALUES (?, ?)', (name, data))
+
+    def get_meta(self, name: str) -> Optional[bytes]:
+        row = self.connection.execute('SELECT data FROM tree_meta WHERE name = ?', (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def keys(self) -> Iterator[int]:
+        for (key,) in self.connection.execute('SELECT id FROM game_states'):
+            yield self._from_signed(key)
+
+    def clear(self) -> None:
+        self._begin()
+        self.connection.execute('DELETE FROM game_states')
+        self.connection.execute('DELETE FROM edges')
+        self.connection.execute('DELETE FROM meta')
+        self.connection.execute('DELETE FROM tree_meta')
+        self._unsigned_ids = False
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM game_states').fetchone()[0]
+
+    def sync(self) -> None:
+        if self.connection.in_transaction:
+            self.connection.execute('COMMIT')
+
+    def close(self) -> None:
+        self.sync()
+        self.connection.close()
+
+    def _begin(self) -> None:
+        # writes stay in one transaction until sync, which the vault calls on flush
+        if not self.connection.in_transaction:
+            self.connection.execute('BEGIN')
+
+    def _from_signed(self, key: int) -> int:
+        return key + (1 << 64) if key < 0 and self._unsigned_ids else key
+
+    @staticmethod
+    def _chunks(keys: List[int]) -> Iterator[List[int]]:
+        for start in range(0, len(keys), _CHUNK_SIZE):
+            chunk = keys[start:start + _CHUNK_SIZE]
+            yield chunk + [chunk[-1]] * (_CHUNK_SIZE - len(chunk))
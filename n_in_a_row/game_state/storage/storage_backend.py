@@ -0,0 +1,74 @@
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+
+class GameStateEdges(NamedTuple):
+    parents: List[int]
+    children: List[int]
+    children_mirrored: List[bool]
+
+
+class StorageBackend:
+    # Maps game state ids to encoded game states. Implementations must accept any 64-bit id,
+    # signed (hashlib mode) or unsigned (zobrist mode).
+
+    # backends that keep edges apart from the nodes set this, the vault then encodes
+    # game states without edges and passes the edges to put_edges
+    stores_edges = False
+    # backends that set this keep the parents of every node in an append-only set, the vault
+    # then encodes game states without parents and adds an edge to a saved node with one append
+    appends_parents = False
+
+    def get_many(self, keys: Sequence[int]) -> List[Optional[bytes]]:
+        raise NotImplementedError()  # don't use ABCMeta metaclass
+
+    def put_many(self, items: Dict[int, bytes]) -> None:
+        raise NotImplementedError()
+
+    def exists_many(self, keys: Sequence[int]) -> List[bool]:
+        raise NotImplementedError()
+
+    def delete_many(self, keys: Sequence[int]) -> None:
+        raise NotImplementedError()
+
+    def keys(self) -> Iterator[int]:
+        raise NotImplementedError()
+
+    def clear(self) -> None:
+        raise NotImplementedError()
+
+    def __len__(self) -> int:
+        raise NotImplementedError()
+
+    def put_edges(self, edges: Dict[int, GameStateEdges]) -> None:
+        raise NotImplementedError()
+
+    def get_edges(self, keys: Sequence[int]) -> List[GameStateEdges]:
+        raise NotImplementedError()
+
+    def put_meta(self, name: str, data: bytes) -> None:
+        # tables that belong to a whole tree rather than to a node, kept apart from the nodes
+        raise NotImplementedError()
+
+    def get_meta(self, name: str) -> Optional[bytes]:
+        raise NotImplementedError()
+
+    def append_parents(self, parents: Dict[int, List[int]]) -> None:
+        # appending an edge that is there already leaves the parents as they are
+        raise NotImplementedError()
+
+    def get_parents(self, keys: Sequence[int]) -> List[List[int]]:
+        raise NotImplementedError()
+
+    def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class StorageReadOnlyError(Exception):
+
+    def __init__(self, *args):
+        if not args:
+            args = ['Storage backend is opened read-only']
+        super().__init__(*args)
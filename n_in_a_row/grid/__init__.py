@@ -1,2 +1,3 @@
 from .grid_index import GridIndex
-from .grid import Grid, CellError, CellIsDanglingError, CellOccupiedError, ColumnFullError
+from .grid import Grid, CellError, CellIsDanglingError, CellOccupiedError, ColumnFullError, EmptyUndoLogError
+from .bit_grid import BitGrid
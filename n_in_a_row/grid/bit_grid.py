@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import Iterator, Tuple, List, Optional, Sequence, Union
+
+import numpy as np
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.win_state import WinState
+from n_in_a_row.hashable import Hashable, pack_ints
+from n_in_a_row.zobrist import cell_keys, rule_key
+
+from .grid_index import GridIndex, grid_cells
+from .grid import CellOccupiedError, CellIsDanglingError, ColumnFullError, EmptyUndoLogError
+
+
+class BitGrid(Hashable):
+
+    def __init__(self, rows: int, cols: int):
+        if rows <= 0 or cols <= 0:
+            raise ValueError(f'Grid size ({rows}, {cols}), is invalid')
+
+        # Data that defines the grid
+        self.rows = rows
+        self.cols = cols
+        # Bitboards indexed by Chip.value, the EMPTY slot is unused.
+        # Each column takes rows + 1 bits, the top one is an always empty sentinel
+        # that prevents lines from wrapping into the next column.
+        self._boards: List[int] = [0, 0, 0]
+
+        # Derived data used for optimization
+        self._mask = 0
+        self._zobrist_key = 0
+        self._mirror_zobrist_key = 0
+        # moves made by push with their chip values
+        self._undo_log: List[Tuple[GridIndex, int]] = []
+        self._col_height = rows + 1
+        self._bottom_mask = sum(1 << (col * self._col_height) for col in range(cols))
+        self._full_mask = self._bottom_mask * ((1 << rows) - 1)
+        self._line_shifts = (
+            1,                      # col
+            self._col_height,       # row
+            self._col_height - 1,   # subdiag
+            self._col_height + 1    # diag
+        )
+
+    def __repr__(self) -> str:
+        return '{}(\n{},\nrows={},\ncols={}\n)'.format(
+            self.__class__.__name__, repr(self._to_array()), self.rows, self.cols
+        )
+
+    def __deepcopy__(self, memodict) -> BitGrid:
+        grid = self.__class__.__new__(self.__class__)
+        grid.__dict__.update(self.__dict__)
+        grid._boards = self._boards[:]
+        grid._undo_log = self._undo_log[:]
+        return grid
+
+    def __setitem__(self, index: Union[GridIndex, Tuple[int, int]], chip: Chip) -> None:
+        index = self._check_index(index)
+        self._check_chip(chip)
+        if self._mask & self._cell_bit(index.row, index.col):
+            raise CellOccupiedError(index)
+        row, col = index
+        next_row = row + 1
+        if next_row < self.rows and not self._mask & self._cell_bit(next_row, col):
+            raise CellIsDanglingError(index)
+
+        self._set_chip(index, chip)
+
+    def __getitem__(self, index: Union[GridIndex, Tuple[int, int]]) -> Chip:
+        index = self._check_index(index)
+        bit = self._cell_bit(index.row, index.col)
+        if self._boards[Chip.GREEN.value] & bit:
+            return Chip.GREEN
+        if self._boards[Chip.RED.value] & bit:
+            return Chip.RED
+        return Chip.EMPTY
+
+    def __eq__(self, other):
+        if not isinstance(other, BitGrid):
+            return NotImplemented
+        return (
+                self.rows == other.rows
+                and self.cols == other.cols
+                and self._boards == other._boards
+        )
+
+    def __hash__(self) -> int:
+        return super().__hash__()
+
+    def build_hash(self, hash_obj) -> None:
+        # same bytes as Grid.build_hash, so both grids share game state ids
+        hash_obj.update(pack_ints(self.rows, self.cols))
+        hash_obj.update(self._to_array().tobytes())
+
+    def zobrist_hash(self) -> int:
+        return self._zobrist_key ^ rule_key(self.rows, self.cols)
+
+    @property
+    def zobrist_key(self) -> int:
+        return self._zobrist_key
+
+    @property
+    def mirror_zobrist_key(self) -> int:
+        return self._mirror_zobrist_key
+
+    def mirror_col(self, col: int) -> int:
+        return self.cols - 1 - col
+
+    @classmethod
+    def from_cells(cls, rows: int, cols: int, cells: Sequence[int]) -> BitGrid:
+        # cells are chip values in row-major order
+        grid = cls(rows, cols)
+        keys = cell_keys(rows, cols)
+        empty = Chip.EMPTY.value
+        for i, chip_value in enumerate(cells):
+            if chip_value != empty:
+                row, col = divmod(i, cols)
+                grid._boards[chip_value] |= grid._cell_bit(row, col)
+                grid._zobrist_key ^= keys[chip_value][i]
+                grid._mirror_zobrist_key ^= keys[chip_value][i + cols - 1 - 2 * col]
+        grid._mask = grid._boards[Chip.GREEN.value] | grid._boards[Chip.RED.value]
+        return grid
+
+    def to_cells(self) -> List[int]:
+        return self._to_array().ravel().tolist()
+
+    def mirrored(self) -> BitGrid:
+        grid = self.snapshot()
+        col_mask = (1 << self._col_height) - 1
+        for chip in (Chip.GREEN, Chip.RED):
+            board = self._boards[chip.value]
+            mirrored_board = 0
+            for col in range(self.cols):
+                col_bits = (board >> (col * self._col_height)) & col_mask
+                mirrored_board |= col_bits << (self.mirror_col(col) * self._col_height)
+            grid._boards[chip.value] = mirrored_board
+        grid._mask = grid._boards[Chip.GREEN.value] | grid._boards[Chip.RED.value]
+        grid._zobrist_key, grid._mirror_zobrist_key = self._mirror_zobrist_key, self._zobrist_key
+        return grid
+
+    def find_empty_row(self, col: int) -> int:
+        if col < 0 or col >= self.cols:
+            raise ValueError(f'Column {col} is out of range')
+        return self.rows - self._get_chips_in_col(col) - 1
+
+    def get_possible_moves(self) -> List[GridIndex]:
+        cells = grid_cells(self.rows, self.cols)
+        moves = []
+        for col in range(self.cols):
+            chips_in_col = self._get_chips_in_col(col)
+            if chips_in_col < self.rows:
+                moves.append(cells[(self.rows - chips_in_col - 1) * self.cols + col])
+        return moves
+
+    def iter_possible_cols(self) -> Iterator[int]:
+        mask = self._mask
+        top_bit = 1 << (self.rows - 1)
+        for col in range(self.cols):
+            if not (mask >> (col * self._col_height)) & top_bit:
+                yield col
+
+    def get_possible_cols_mask(self) -> int:
+        # bit col is set if the column has an empty cell
+        free = (self._bottom_mask << (self.rows - 1)) & ~self._mask
+        mask = 0
+        while free:
+            low_bit = free & -free
+            mask |= 1 << ((low_bit.bit_length() - 1) // self._col_height)
+            free ^= low_bit
+        return mask
+
+    def drop_chip(self, col: int, chip: Chip) -> None:
+        self._check_chip(chip)
+        row = self.find_empty_row(col)
+        if row < 0:
+            raise ColumnFullError(col)
+        self._set_chip(grid_cells(self.rows, self.cols)[row * self.cols + col], chip)
+
+    def push(self, col: int, chip: Chip) -> GridIndex:
+        # like drop_chip, but the move can be undone by pop
+        self._check_chip(chip)
+        row = self.find_empty_row(col)
+        if row < 0:
+            raise ColumnFullError(col)
+        index = grid_cells(self.rows, self.cols)[row * self.cols + col]
+        self._set_chip(index, chip)
+        self._undo_log.append((index, chip.value))
+        return index
+
+    def pop(self) -> GridIndex:
+        # undoes the last push, the moves made since then must have been popped too
+        if not self._undo_log:
+            raise EmptyUndoLogError()
+        index, chip_value = self._undo_log.pop()
+        bit = self._cell_bit(index.row, index.col)
+        self._boards[chip_value] ^= bit
+        self._mask ^= bit
+        self._update_zobrist_keys(index, chip_value)
+        return index
+
+    def snapshot(self) -> BitGrid:
+        # an independent copy of the current position that can't pop the pushed moves
+        grid = deepcopy(self)
+        grid._undo_log = []
+        return grid
+
+    def is_full(self) -> bool:
+        return self._mask == self._full_mask
+
+    def get_win_state(self, chips_in_a_row: int) -> Optional[WinState]:
+        for chip in (Chip.GREEN, Chip.RED):
+            if self._has_line(self._boards[chip.value], chips_in_a_row):
+                return WinState.from_chip(chip)
+
+        if self.is_full():
+            return WinState.DRAW
+
+        return None
+
+    def _has_line(self, board: int, length: int) -> bool:
+        if length <= 1:
+            return board != 0
+        for shift in self._line_shifts:
+            # after each step bit i is set iff `run` cells starting from i are occupied
+            line = board
+            run = 1
+            while run * 2 <= length:
+                line &= line >> (run * shift)
+                run *= 2
+            if run < length:
+                line &= line >> ((length - run) * shift)
+            if line:
+                return True
+        return False
+
+    def _cell_bit(self, row: int, col: int) -> int:
+        return 1 << (col * self._col_height + self.rows - 1 - row)
+
+    def _get_chips_in_col(self, col: int) -> int:
+        col_offset = col * self._col_height
+        col_mask = (1 << self.rows) - 1
+        # adding the bottom row carries into the first empty cell of the column
+        next_cell = ((self._mask + self._bottom_mask) >> col_offset) & col_mask
+        if not next_cell:
+            return self.rows
+        return next_cell.bit_length() - 1
+
+    def _to_array(self) -> np.ndarray:
+        grid = np.full((self.rows, self.cols), Chip.EMPTY.value)
+        for chip in (Chip.GREEN, Chip.RED):
+            board = self._boards[chip.value]
+            while board:
+                low_bit = board & -board
+                col, height = divmod(low_bit.bit_length() - 1, self._col_height)
+                grid[self.rows - 1 - height, col] = chip.value
+                board ^= low_bit
+        return grid
+
+    def _check_index(self, index: Union[GridIndex, Tuple[int, int]]) -> GridIndex:
+        row, col = index
+        if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
+            raise IndexError(f'Index {index} is out of bounds')
+        if isinstance(index, GridIndex):
+            return index
+        return GridIndex.of(row, col)
+
+    @staticmethod
+    def _check_chip(chip: Chip) -> None:
+        if not isinstance(chip, Chip):
+            raise TypeError('Value for Grid must be of type Chip')
+        if chip == Chip.EMPTY:
+            raise ValueError('Cannot use empty chip')
+
+    def _set_chip(self, index: GridIndex, chip: Chip) -> None:
+        bit = self._cell_bit(index.row, index.col)
+        self._boards[chip.value] |= bit
+        self._mask |= bit
+        self._update_zobrist_keys(index, chip.value)
+
+    def _update_zobrist_keys(self, index: GridIndex, chip_value: int) -> None:
+        # toggles the chip in the keys, so it both adds and removes it
+        keys = cell_keys(self.rows, self.cols)[chip_value]
+        row_offset = index.row * self.cols
+        self._zobrist_key ^= keys[row_offset + index.col]
+        self._mirror_zobrist_key ^= keys[row_offset + self.cols - 1 - index.col]
@@ -4,16 +4,15 @@ from typing import Tuple, cast
 
 import numpy as np
 
-from n_in_a_row.config import max_grid_shape
-
 from .grid_index import GridIndex
 
 
 class CellUnionManager:
 
-    def __init__(self):
-        max_rows, max_cols = max_grid_shape()
-        array_size = max_rows * max_cols
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        array_size = rows * cols
         self.parent = np.arange(array_size)
         # tree size is valid only for roots
         self.tree_size = np.ones(array_size)
@@ -28,11 +27,11 @@ class CellUnionManager:
         return index_i
 
     def are_united(self, left: GridIndex, right: GridIndex) -> bool:
-        return self._get_root(left.i) == self._get_root(right.i)
+        return self._get_root(left.to_i(self.cols)) == self._get_root(right.to_i(self.cols))
 
     def unite_cells(self, left: GridIndex, right: GridIndex) -> None:
-        left_root = self._get_root(left.i)
-        right_root = self._get_root(right.i)
+        left_root = self._get_root(left.to_i(self.cols))
+        right_root = self._get_root(right.to_i(self.cols))
         if left_root == right_root:
             return
         left_size = self.tree_size[left_root]
@@ -46,7 +45,7 @@ class CellUnionManager:
 
     def get_max_union_root_and_size(self) -> Tuple[GridIndex, int]:
         max_root = cast(int, np.argmax(self.tree_size))
-        return GridIndex.from_i(max_root), self.tree_size[max_root]
+        return GridIndex.from_i(max_root, self.cols), self.tree_size[max_root]
 
 
 class CellUnionManagerError(Exception):
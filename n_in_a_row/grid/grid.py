@@ -1,28 +1,25 @@
 from __future__ import annotations
 
-from typing import Tuple, List, Optional, Union
+from copy import deepcopy
+from functools import lru_cache
+from typing import Iterator, Tuple, List, Optional, Sequence, Union
 
 import numpy as np
 
 from n_in_a_row.chip import Chip
 from n_in_a_row.win_state import WinState
 from n_in_a_row.hashable import Hashable, pack_ints
-from n_in_a_row.config import max_grid_shape
+from n_in_a_row.zobrist import cell_keys, rule_key
 
-from .grid_index import GridIndex
-from .cell_union_manager import CellUnionManager
+from .grid_index import GridIndex, grid_cells
+from .rollback_cell_union_manager import RollbackCellUnionManager
 
 
 class Grid(Hashable):
 
     def __init__(self, rows: int, cols: int):
-        max_rows, max_cols = max_grid_shape()
         if rows <= 0 or cols <= 0:
             raise ValueError(f'Grid size ({rows}, {cols}), is invalid')
-        if rows > max_rows or cols > max_cols:
-            raise ValueError(
-                f'Grid size ({rows}, {cols}) is greater than the max size ({max_rows}, {max_cols})'
-            )
 
         # Data that defines the grid
         self.rows = rows
@@ -31,12 +28,20 @@ class Grid(Hashable):
 
         # Derived data used for optimization
         self._unions = {
-            'row': CellUnionManager(),
-            'col': CellUnionManager(),
-            'diag': CellUnionManager(),
-            'subdiag': CellUnionManager()
+            'row': RollbackCellUnionManager(rows, cols),
+            'col': RollbackCellUnionManager(rows, cols),
+            'diag': RollbackCellUnionManager(rows, cols),
+            'subdiag': RollbackCellUnionManager(rows, cols)
         }
         self._chips_in_cols: List[int] = [0] * self.cols
+        self._chips = 0
+        # longest line of each chip, by Chip.value, the EMPTY slot is unused
+        self._max_lines: List[int] = [0, 0, 0]
+        self._zobrist_key = 0
+        self._mirror_zobrist_key = 0
+        # moves made by push with the union checkpoints and the longest line
+        # of the chip before each of them
+        self._undo_log: List[Tuple[GridIndex, Tuple[int, ...], int]] = []
 
     def __repr__(self) -> str:
         return '{}(\n{},\nrows={},\ncols={}\n)'.format(
@@ -75,34 +80,123 @@ class Grid(Hashable):
         hash_obj.update(pack_ints(self.rows, self.cols))
         hash_obj.update(self.grid.tobytes())
 
+    def zobrist_hash(self) -> int:
+        return self._zobrist_key ^ rule_key(self.rows, self.cols)
+
+    @property
+    def zobrist_key(self) -> int:
+        return self._zobrist_key
+
+    @property
+    def mirror_zobrist_key(self) -> int:
+        return self._mirror_zobrist_key
+
+    def mirror_col(self, col: int) -> int:
+        return self.cols - 1 - col
+
+    @classmethod
+    def from_cells(cls, rows: int, cols: int, cells: Sequence[int]) -> Grid:
+        # cells are chip values in row-major order
+        grid = cls(rows, cols)
+        for row in range(rows - 1, -1, -1):
+            for col in range(cols):
+                chip_value = cells[row * cols + col]
+                if chip_value != Chip.EMPTY.value:
+                    grid._set_chip(GridIndex.of(row, col), Chip(chip_value))
+        return grid
+
+    def to_cells(self) -> List[int]:
+        return self.grid.ravel().tolist()
+
+    def mirrored(self) -> Grid:
+        grid = Grid(self.rows, self.cols)
+        for row in range(self.rows - 1, -1, -1):
+            for col in range(self.cols):
+                chip_value = self.grid[row, col]
+                if chip_value != Chip.EMPTY.value:
+                    grid._set_chip(GridIndex.of(row, self.mirror_col(col)), Chip(chip_value))
+        return grid
+
     def find_empty_row(self, col: int) -> int:
         if col < 0 or col >= self.cols:
             raise ValueError(f'Column {col} is out of range')
         return self.rows - self._chips_in_cols[col] - 1
 
     def get_possible_moves(self) -> List[GridIndex]:
+        cells = grid_cells(self.rows, self.cols)
         moves = []
         for col in range(self.cols):
             chips_in_col = self._chips_in_cols[col]
             if chips_in_col < self.rows:
-                moves.append(GridIndex(self.rows - chips_in_col - 1, col))
+                moves.append(cells[(self.rows - chips_in_col - 1) * self.cols + col])
         return moves
 
+    def iter_possible_cols(self) -> Iterator[int]:
+        rows = self.rows
+        for col, chips_in_col in enumerate(self._chips_in_cols):
+            if chips_in_col < rows:
+                yield col
+
+    def get_possible_cols_mask(self) -> int:
+        # bit col is set if the column has an empty cell
+        mask = 0
+        for col, chips_in_col in enumerate(self._chips_in_cols):
+            if chips_in_col < self.rows:
+                mask |= 1 << col
+        return mask
+
     def drop_chip(self, col: int, chip: Chip) -> None:
         self._check_chip(chip)
         row = self.find_empty_row(col)
         if row < 0:
             raise ColumnFullError(col)
-        self._set_chip(GridIndex(row, col), chip)
+        self._set_chip(grid_cells(self.rows, self.cols)[row * self.cols + col], chip)
+
+    def push(self, col: int, chip: Chip) -> GridIndex:
+        # like drop_chip, but the move can be undone by pop
+        self._check_chip(chip)
+        row = self.find_empty_row(col)
+        if row < 0:
+            raise ColumnFullError(col)
+        index = grid_cells(self.rows, self.cols)[row * self.cols + col]
+        checkpoints = tuple(unions.checkpoint() for unions in self._unions.values())
+        max_line = self._max_lines[chip.value]
+        self._set_chip(index, chip)
+        self._undo_log.append((index, checkpoints, max_line))
+        return index
+
+    def pop(self) -> GridIndex:
+        # undoes the last push, the moves made since then must have been popped too
+        if not self._undo_log:
+            raise EmptyUndoLogError()
+        index, checkpoints, max_line = self._undo_log.pop()
+        for unions, checkpoint in zip(self._unions.values(), checkpoints):
+            unions.rollback(checkpoint)
+            if not self._undo_log:
+                unions.release()
+        chip_value = self.grid[index.ii]
+        self.grid[index.ii] = Chip.EMPTY.value
+        self._chips_in_cols[index.col] -= 1
+        self._chips -= 1
+        self._max_lines[chip_value] = max_line
+        self._update_zobrist_keys(index, chip_value)
+        return index
+
+    def snapshot(self) -> Grid:
+        # an independent copy of the current position that can't pop the pushed moves
+        grid = deepcopy(self)
+        grid._undo_log = []
+        for unions in grid._unions.values():
+            unions.release()
+        return grid
 
     def is_full(self) -> bool:
-        return all(x == self.rows for x in self._chips_in_cols)
+        return self._chips == self.rows * self.cols
 
     def get_win_state(self, chips_in_a_row: int) -> Optional[WinState]:
-        for unions in self._unions.values():
-            index, size = unions.get_max_union_root_and_size()
-            if size >= chips_in_a_row:
-                return WinState.from_chip(Chip(self.grid[index.ii]))
+        for chip in (Chip.GREEN, Chip.RED):
+            if self._max_lines[chip.value] >= chips_in_a_row:
+                return WinState.from_chip(chip)
 
         if self.is_full():
             return WinState.DRAW
@@ -115,7 +209,7 @@ class Grid(Hashable):
             raise IndexError(f'Index {index} is out of bounds')
         if isinstance(index, GridIndex):
             return index
-        return GridIndex(row, col)
+        return GridIndex.of(row, col)
 
     @staticmethod
     def _check_chip(chip: Chip) -> None:
@@ -125,36 +219,51 @@ class Grid(Hashable):
             raise ValueError('Cannot use empty chip')
 
     def _set_chip(self, index: GridIndex, chip: Chip) -> None:
-        self.grid[index.ii] = chip.value
+        grid = self.grid
+        grid[index.ii] = chip.value
         self._chips_in_cols[index.col] += 1
-
-        row, col = index
-        up = row > 0
-        down = row < self.rows - 1
-        left = col > 0
-        right = col < self.cols - 1
-
-        def unite(nrow: int, ncol: int, unions: CellUnionManager):
-            neighbor_index = GridIndex(nrow, ncol)
-            if self.grid[index.ii] == self.grid[neighbor_index.ii]:
-                unions.unite_cells(index, neighbor_index)
-
-        if up:
-            unite(row - 1, col, self._unions['col'])
-            if left:
-                unite(row - 1, col - 1, self._unions['diag'])
-            if right:
-                unite(row - 1, col + 1, self._unions['subdiag'])
-        if left:
-            unite(row, col - 1, self._unions['row'])
-        if right:
-            unite(row, col + 1, self._unions['row'])
-        if down:
-            unite(row + 1, col, self._unions['col'])
-            if left:
-                unite(row + 1, col - 1, self._unions['subdiag'])
-            if right:
-                unite(row + 1, col + 1, self._unions['diag'])
+        self._chips += 1
+        self._update_zobrist_keys(index, chip.value)
+
+        for axis, neighbor_index in neighbor_table(self.rows, self.cols)[index.row * self.cols + index.col]:
+            if grid[neighbor_index.ii] == chip.value:
+                self._unions[axis].unite_cells(index, neighbor_index)
+
+        # only lines through the new chip can grow
+        max_line = max(unions.get_union_size(index) for unions in self._unions.values())
+        if max_line > self._max_lines[chip.value]:
+            self._max_lines[chip.value] = max_line
+
+    def _update_zobrist_keys(self, index: GridIndex, chip_value: int) -> None:
+        # toggles the chip in the keys, so it both adds and removes it
+        keys = cell_keys(self.rows, self.cols)[chip_value]
+        row_offset = index.row * self.cols
+        self._zobrist_key ^= keys[row_offset + index.col]
+        self._mirror_zobrist_key ^= keys[row_offset + self.cols - 1 - index.col]
+
+
+# offsets of the neighbours along every axis
+_AXIS_OFFSETS = (
+    ('col', ((-1, 0), (1, 0))),
+    ('row', ((0, -1), (0, 1))),
+    ('diag', ((-1, -1), (1, 1))),
+    ('subdiag', ((-1, 1), (1, -1)))
+)
+
+
+@lru_cache(maxsize=None)
+def neighbor_table(rows: int, cols: int) -> Tuple[Tuple[Tuple[str, GridIndex], ...], ...]:
+    # (axis, neighbour) pairs of every cell, indexed by row * cols + col
+    return tuple(
+        tuple(
+            (axis, GridIndex.of(row + row_offset, col + col_offset))
+            for axis, offsets in _AXIS_OFFSETS
+            for row_offset, col_offset in offsets
+            if 0 <= row + row_offset < rows and 0 <= col + col_offset < cols
+        )
+        for row in range(rows)
+        for col in range(cols)
+    )
 
 
 class GridError(RuntimeError):
@@ -185,3 +294,11 @@ class ColumnFullError(GridError):
             args = [f'Column {col} is full']
         super().__init__(*args)
         self.col = col
+
+
+class EmptyUndoLogError(GridError):
+
+    def __init__(self, *args):
+        if not args:
+            args = ['No pushed moves to pop']
+        super().__init__(*args)
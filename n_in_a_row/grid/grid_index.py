@@ -1,33 +1,23 @@
 from __future__ import annotations
 
-from typing import Tuple
+from functools import lru_cache
+from typing import Dict, Tuple
 
-from n_in_a_row.config import max_grid_shape
 
-
-class GridIndexMeta(type):
-
-    def __new__(cls, *args, **kwargs):
-        clsobj = super().__new__(cls, *args, **kwargs)
-        max_rows, max_cols = max_grid_shape()
-        clsobj.MAX_GRID_ROWS = max_rows
-        clsobj.MAX_GRID_COLS = max_cols
-        return clsobj
-
-
-class GridIndex(metaclass=GridIndexMeta):
-
-    MAX_GRID_ROWS = None
-    MAX_GRID_COLS = None
+class GridIndex:
 
     __slots__ = ('row', 'col')
 
     def __init__(self, row: int, col: int):
-        assert 0 <= row < self.MAX_GRID_ROWS
-        assert 0 <= col < self.MAX_GRID_COLS
+        assert 0 <= row
+        assert 0 <= col
         self.row = row
         self.col = col
 
+    def __deepcopy__(self, memodict) -> GridIndex:
+        # interned indexes are shared by the grid copies
+        return self
+
     def __iter__(self):
         return iter((self.row, self.col))
 
@@ -45,15 +35,23 @@ class GridIndex(metaclass=GridIndexMeta):
         return NotImplemented
 
     def __hash__(self) -> int:
-        return self.row * self.MAX_GRID_COLS + self.col
+        return hash((self.row, self.col))
 
-    @property
-    def i(self) -> int:
-        return self.row * self.MAX_GRID_COLS + self.col
+    def to_i(self, cols: int) -> int:
+        # position in the row-major order of a grid with cols columns
+        return self.row * cols + self.col
 
     @classmethod
-    def from_i(cls, i: int) -> GridIndex:
-        return GridIndex(i // cls.MAX_GRID_COLS, i % cls.MAX_GRID_COLS)
+    def from_i(cls, i: int, cols: int) -> GridIndex:
+        return cls.of(i // cols, i % cols)
+
+    @classmethod
+    def of(cls, row: int, col: int) -> GridIndex:
+        # the interned index, instances are shared and must not be changed
+        index = _interned.get((row, col))
+        if index is None:
+            index = _interned[row, col] = GridIndex(row, col)
+        return index
 
     @property
     def ii(self) -> Tuple[int, int]:
@@ -61,4 +59,13 @@ class GridIndex(metaclass=GridIndexMeta):
 
     @classmethod
     def from_ii(cls, ii: Tuple[int, int]) -> GridIndex:
-        return GridIndex(ii[0], ii[1])
+        return cls.of(ii[0], ii[1])
+
+
+_interned: Dict[Tuple[int, int], GridIndex] = {}
+
+
+@lru_cache(maxsize=None)
+def grid_cells(rows: int, cols: int) -> Tuple[GridIndex, ...]:
+    # interned indexes of the cells, by GridIndex.to_i(cols)
+    return tuple(GridIndex.of(row, col) for row in range(rows) for col in range(cols))
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from .grid_index import GridIndex
+
+
+class RollbackCellUnionManager:
+    # Union by size without path compression, so every union changes one parent and
+    # one size and can be undone by rollback. Trees stay logarithmically deep.
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        array_size = rows * cols
+        self.parent = list(range(array_size))
+        # tree size is valid only for roots
+        self.tree_size = [1] * array_size
+        self._max_root = 0
+        self._max_size = 1
+        # (attached root, max root, max size) before every union since the first checkpoint
+        self._log: Optional[List[Tuple[int, int, int]]] = None
+
+    def __deepcopy__(self, memodict) -> RollbackCellUnionManager:
+        unions = self.__class__.__new__(self.__class__)
+        unions.rows = self.rows
+        unions.cols = self.cols
+        unions.parent = self.parent[:]
+        unions.tree_size = self.tree_size[:]
+        unions._max_root = self._max_root
+        unions._max_size = self._max_size
+        unions._log = None if self._log is None else self._log[:]
+        return unions
+
+    def _get_root(self, index_i: int) -> int:
+        parent = self.parent
+        while index_i != parent[index_i]:
+            index_i = parent[index_i]
+        return index_i
+
+    def are_united(self, left: GridIndex, right: GridIndex) -> bool:
+        return self._get_root(left.to_i(self.cols)) == self._get_root(right.to_i(self.cols))
+
+    def unite_cells(self, left: GridIndex, right: GridIndex) -> None:
+        left_root = self._get_root(left.to_i(self.cols))
+        right_root = self._get_root(right.to_i(self.cols))
+        if left_root == right_root:
+            return
+        if self.tree_size[left_root] < self.tree_size[right_root]:
+            left_root, right_root = right_root, left_root
+        if self._log is not None:
+            self._log.append((right_root, self._max_root, self._max_size))
+        self.parent[right_root] = left_root
+        size = self.tree_size[left_root] + self.tree_size[right_root]
+        self.tree_size[left_root] = size
+        if size > self._max_size:
+            self._max_root = left_root
+            self._max_size = size
+
+    def get_union_size(self, index: GridIndex) -> int:
+        return self.tree_size[self._get_root(index.to_i(self.cols))]
+
+    def get_max_union_root_and_size(self) -> Tuple[GridIndex, int]:
+        return GridIndex.from_i(self._max_root, self.cols), self._max_size
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def checkpoint(self) -> int:
+        # unions are logged from the first checkpoint until the log is released
+        if self._log is None:
+            self._log = []
+        return len(self._log)
+
+    def rollback(self, checkpoint: int) -> None:
+        log = self._log
+        parent = self.parent
+        tree_size = self.tree_size
+        while len(log) > checkpoint:
+            attached_root, self._max_root, self._max_size = log.pop()
+            root = parent[attached_root]
+            tree_size[root] -= tree_size[attached_root]
+            parent[attached_root] = attached_root
+
+    def release(self) -> None:
+        # keeps the current state and stops logging
+        self._log = None
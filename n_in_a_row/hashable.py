@@ -1,7 +1,8 @@
 import hashlib
 from struct import pack
 
-from config import load_config
+from n_in_a_row.config import load_config
+from n_in_a_row.zobrist import ZOBRIST_HASH_ALGORITHM
 
 
 class Hashable:
@@ -9,8 +10,13 @@ class Hashable:
     def build_hash(self, hash_obj) -> None:
         raise NotImplementedError()  # don't use ABCMeta metaclass
 
+    def zobrist_hash(self) -> int:
+        raise NotImplementedError()
+
     def __hash__(self) -> int:
         config = load_config()
+        if config['hash_algorithm'] == ZOBRIST_HASH_ALGORITHM:
+            return self.zobrist_hash()
         hash_obj = hashlib.new(config['hash_algorithm'])
         self.build_hash(hash_obj)
         return int.from_bytes(hash_obj.digest(), byteorder='big')
@@ -1,7 +1,7 @@
 from n_in_a_row.chip import Chip
 from n_in_a_row.grid import Grid
 from n_in_a_row.game_state import GameState
-from game_state import GameTreeBuilder
+from n_in_a_row.game_state import GameTreeBuilder
 
 
 if __name__ == '__main__':
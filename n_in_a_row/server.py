@@ -0,0 +1,242 @@
+import asyncio
+import json
+import sys
+from collections import deque
+from time import perf_counter
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import redis.asyncio
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_state_codec import decode_game_state
+from n_in_a_row.game_state.game_tree_query import best_move_of
+from n_in_a_row.game_state.lru_cache import LRUCache
+
+
+# Serves the results of a tree solved into the redis vault over HTTP/1.1 with keep-alive:
+#   GET /evaluate?rows=6&cols=7&chips_in_a_row=4&cells=000...&next_chip=1
+#       cells are the chip values in row-major order from the top row, next_chip defaults
+#       to the side to move when GREEN starts
+#   GET /stats
+# Usage: python -m n_in_a_row.server [host port]
+
+
+class LatencyStats:
+
+    def __init__(self, window: int):
+        # seconds of the latest requests
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.count += 1
+
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        # in milliseconds
+        if not self.latencies:
+            return {'p50': None, 'p99': None}
+        p50, p99 = np.percentile(np.fromiter(self.latencies, dtype=np.float64), [50, 99]) * 1000
+        return {'p50': round(float(p50), 3), 'p99': round(float(p99), 3)}
+
+
+class PositionService:
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = load_config() if config is None else config
+        server_config = config.get('server', {})
+        self.canonical = server_config.get('canonical', False)
+        redis_connections = server_config.get('redis_connections', 16)
+        self.redis = redis.asyncio.Redis(
+            host=config['redis']['host'],
+            port=config['redis']['port'],
+            max_connections=redis_connections
+        )
+        # the pool raises instead of waiting once all its connections are taken
+        self._redis_slots = asyncio.Semaphore(redis_connections)
+        # stored nodes of the hot positions
+        self.cache = LRUCache(max_entries=server_config.get('cache_size', 100000))
+        # reads of the positions requested while they are being read
+        self._in_flight: Dict[int, asyncio.Task] = {}
+        self.latency = LatencyStats(server_config.get('latency_window', 10000))
+        self.reads = 0
+        self.coalesced = 0
+
+    async def evaluate(self, game_state: GameState) -> Optional[Dict[str, Any]]:
+        # None if the position is not in the solved tree
+        game_state_id = game_state.game_state_id
+        node = await self._load(game_state_id)
+        if node is None or node.result is None:
+            return None
+        move = best_move_of(node, node.orientation_id != game_state.orientation_id)
+        return {
+            'game_state_id': game_state_id,
+            'result': node.result.name,
+            'distance': node.distance,
+            'best_move': None if move is None else [move.row, move.col]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.latency.count,
+            'latency_ms': self.latency.percentiles(),
+            'redis_reads': self.reads,
+            'coalesced': self.coalesced,
+            'cache_hits': self.cache.hits,
+            'cache_entries': len(self.cache)
+        }
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+    async def _load(self, game_state_id: int) -> Optional[GameState]:
+        node = self.cache.get(game_state_id)
+        if node is not None:
+            return node
+        task = self._in_flight.get(game_state_id)
+        if task is None:
+            task = self._in_flight[game_state_id] = asyncio.ensure_future(self._read(game_state_id))
+            task.add_done_callback(lambda _: self._in_flight.pop(game_state_id, None))
+        else:
+            self.coalesced += 1
+        # a cancelled request must not cancel the read the others wait for
+        return await asyncio.shield(task)
+
+    async def _read(self, game_state_id: int) -> Optional[GameState]:
+        self.reads += 1
+        async with self._redis_slots:
+            data = await self.redis.get(game_state_id)
+        if data is None:
+            return None
+        node = decode_game_state(data)
+        self.cache.put(game_state_id, node)
+        return node
+
+
+def parse_game_state(query: Dict[str, str], canonical: bool) -> GameState:
+    rows = int(query['rows'])
+    cols = int(query['cols'])
+    cells = [int(cell) for cell in query['cells']]
+    if len(cells) != rows * cols or any(cell not in (0, 1, 2) for cell in cells):
+        raise ValueError(f'Cells do not fit a {rows}x{cols} grid')
+    if 'next_chip' in query:
+        next_chip = Chip(int(query['next_chip']))
+    else:
+        next_chip = Chip.RED if cells.count(Chip.GREEN.value) > cells.count(Chip.RED.value) else Chip.GREEN
+    return GameState(
+        BitGrid.from_cells(rows, cols, cells),
+        next_chip=next_chip,
+        chips_in_a_row=int(query['chips_in_a_row']),
+        copy_grid=False,
+        canonical=canonical
+    )
+
+
+async def handle_request(service: PositionService, target: str) -> Tuple[int, Dict[str, Any]]:
+    url = urlsplit(target)
+    if url.path == '/stats':
+        return 200, service.stats()
+    if url.path != '/evaluate':
+        return 404, {'error': f'Unknown path {url.path}'}
+    query = {key: values[0] for key, values in parse_qs(url.query).items()}
+    try:
+        game_state = parse_game_state(query, service.canonical)
+    except (KeyError, ValueError) as error:
+        return 400, {'error': f'Invalid position: {error}'}
+    try:
+        answer = await service.evaluate(game_state)
+    except redis.RedisError as error:
+        return 503, {'error': f'Vault is unavailable: {error}'}
+    if answer is None:
+        return 404, {'error': 'Position is not solved'}
+    return 200, answer
+
+
+async def handle_connection(
+        service: PositionService,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            start = perf_counter()
+            keep_alive = request_line.rstrip().endswith(b'HTTP/1.1')
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = header.decode('latin-1').partition(':')
+                if name.strip().lower() == 'connection':
+                    keep_alive = value.strip().lower() == 'keep-alive'
+
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            if method != 'GET':
+                status, body = 405, {'error': f'Method {method} is not allowed'}
+            else:
+                status, body = await handle_request(service, target)
+            payload = json.dumps(body).encode()
+            writer.write(
+                f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(payload)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + payload
+            )
+            await writer.drain()
+            if status == 200:
+                service.latency.add(perf_counter() - start)
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def report_latency(service: PositionService, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        print(json.dumps(service.stats()), flush=True)
+
+
+async def serve(host: str, port: int, service: PositionService) -> asyncio.AbstractServer:
+    return await asyncio.start_server(
+        lambda reader, writer: handle_connection(service, reader, writer), host, port
+    )
+
+
+async def main(host: str, port: int) -> None:
+    service = PositionService()
+    server = await serve(host, port, service)
+    report_interval = load_config().get('server', {}).get('report_interval', 0)
+    reporter = asyncio.ensure_future(report_latency(service, report_interval)) if report_interval else None
+    print(f'Serving on {host}:{port}', flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await service.close()
+
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'
+}
+
+
+if __name__ == '__main__':
+    server_config = load_config().get('server', {})
+    host = sys.argv[1] if len(sys.argv) > 1 else server_config.get('host', 'localhost')
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else server_config.get('port', 8080)
+    try:
+        asyncio.run(main(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from n_in_a_row.game_state.storage import MmapBackend, StorageReadOnlyError
+
+
+class MmapTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._temp_dir.name, 'game_states')
+        self.backend = MmapBackend(self.path, capacity=16)
+
+    def tearDown(self):
+        self.backend.close()
+        self._temp_dir.cleanup()
+
+
+class TestPutGet(MmapTestCase):
+
+    def test_put_get(self):
+        self.backend.put_many({1: b'one', -2: b'minus two', 2 ** 64 - 2: b'big'})
+        self.assertListEqual(
+            [b'one', None, b'minus two', b'big'],
+            self.backend.get_many([1, 2, -2, 2 ** 64 - 2])
+        )
+        self.assertListEqual([True, False], self.backend.exists_many([-2, 2]))
+        self.assertEqual(3, len(self.backend))
+        self.assertSetEqual({1, -2, 2 ** 64 - 2}, set(self.backend.keys()))
+
+    def test_overwrite(self):
+        self.backend.put_many({5: b'abcdef'})
+        self.backend.put_many({5: b'abc'})
+        self.assertListEqual([b'abc'], self.backend.get_many([5]))
+        self.backend.put_many({5: b'abcdefghij'})
+        self.assertListEqual([b'abcdefghij'], self.backend.get_many([5]))
+        self.assertEqual(1, len(self.backend))
+
+    def test_delete(self):
+        self.backend.put_many({key: str(key).encode() for key in range(10)})
+        self.backend.delete_many([3, 4, 42])
+        self.assertListEqual([b'2', None, None, b'5'], self.backend.get_many([2, 3, 4, 5]))
+        self.assertEqual(8, len(self.backend))
+        self.backend.put_many({4: b'four'})
+        self.assertListEqual([b'four'], self.backend.get_many([4]))
+
+    def test_grow(self):
+        items = {key * 7919: os.urandom(key % 50 + 1) for key in range(-500, 500)}
+        for key, data in items.items():
+            self.backend.put_many({key: data})
+        self.assertEqual(len(items), len(self.backend))
+        self.assertListEqual(list(items.values()), self.backend.get_many(list(items)))
+
+    def test_clear(self):
+        self.backend.put_many({1: b'one'})
+        self.backend.clear()
+        self.assertEqual(0, len(self.backend))
+        self.assertListEqual([None], self.backend.get_many([1]))
+
+
+class TestPersistence(MmapTestCase):
+
+    def test_reopen(self):
+        self.backend.put_many({key: bytes([key % 256]) * key for key in range(1, 100)})
+        self.backend.close()
+        self.backend = MmapBackend(self.path)
+        self.assertEqual(99, len(self.backend))
+        self.assertListEqual([b'\x07' * 7, b'\x63' * 99], self.backend.get_many([7, 99]))
+
+    def test_read_only(self):
+        self.backend.put_many({1: b'one'})
+        self.backend.sync()
+        reader = MmapBackend(self.path, read_only=True)
+        try:
+            self.assertListEqual([b'one'], reader.get_many([1]))
+            self.assertRaises(StorageReadOnlyError, reader.put_many, {2: b'two'})
+            self.assertRaises(StorageReadOnlyError, reader.delete_many, [1])
+        finally:
+            reader.close()
+
+    def test_meta(self):
+        self.assertIsNone(self.backend.get_meta('ranks'))
+        self.backend.put_meta('ranks', b'first')
+        self.backend.put_meta('ranks', b'second')
+        self.backend.close()
+        self.backend = MmapBackend(self.path)
+        self.assertEqual(b'second', self.backend.get_meta('ranks'))
+        self.backend.clear()
+        self.assertIsNone(self.backend.get_meta('ranks'))
+
+    def test_read_only_missing(self):
+        self.assertRaises(FileNotFoundError, MmapBackend, self.path + '_missing', read_only=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.storage import SqliteBackend, GameStateEdges
+
+
+class SqliteTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._temp_dir.name, 'game_states.sqlite3')
+        self.backend = SqliteBackend(self.path)
+
+    def tearDown(self):
+        self.backend.close()
+        self._temp_dir.cleanup()
+
+
+class TestNodes(SqliteTestCase):
+
+    def test_put_get(self):
+        self.backend.put_many({1: b'one', -2: b'minus two', 2 ** 64 - 3: b'big'})
+        self.assertListEqual(
+            [b'one', None, b'minus two', b'big'],
+            self.backend.get_many([1, 2, -2, 2 ** 64 - 3])
+        )
+        self.assertListEqual([True, False, True], self.backend.exists_many([-2, 2, 2 ** 64 - 3]))
+        self.assertEqual(3, len(self.backend))
+        self.assertSetEqual({1, 2 ** 64 - 2, 2 ** 64 - 3}, set(self.backend.keys()))
+
+    def test_many(self):
+        items = {key * 7919: str(key).encode() for key in range(1000)}
+        self.backend.put_many(items)
+        self.assertListEqual(list(items.values()), self.backend.get_many(list(items)))
+
+    def test_delete_and_clear(self):
+        self.backend.put_many({1: b'one', 2: b'two'})
+        self.backend.put_edges({1: GameStateEdges([], [2], [False])})
+        self.backend.delete_many([1])
+        self.assertListEqual([None, b'two'], self.backend.get_many([1, 2]))
+        self.assertListEqual([GameStateEdges([], [], [])], self.backend.get_edges([1]))
+        self.backend.clear()
+        self.assertEqual(0, len(self.backend))
+
+    def test_persistence(self):
+        self.backend.put_many({1: b'one'})
+        self.backend.close()
+        self.backend = SqliteBackend(self.path)
+        self.assertListEqual([b'one'], self.backend.get_many([1]))
+
+
+class TestEdges(SqliteTestCase):
+
+    def test_put_get(self):
+        self.backend.put_edges({
+            1: GameStateEdges([], [3, 2, -4], [False, True, False]),
+            3: GameStateEdges([1, 2], [], []),
+        })
+        self.assertListEqual(
+            [
+                GameStateEdges([1, 2], [], []),
+                GameStateEdges([], [], []),
+                GameStateEdges([], [3, 2, -4], [False, True, False]),
+            ],
+            self.backend.get_edges([3, 2, 1])
+        )
+
+    def test_replace(self):
+        self.backend.put_edges({1: GameStateEdges([5], [3, 2], [False, False])})
+        self.backend.put_edges({1: GameStateEdges([5, 6], [3], [True])})
+        self.assertListEqual([GameStateEdges([5, 6], [3], [True])], self.backend.get_edges([1]))
+
+    def test_vault(self):
+        vault = GameStateVault(backend=self.backend)
+        vault.cache.max_entries = 0
+        root = GameState(Grid(rows=2, cols=3), next_chip=Chip.GREEN, chips_in_a_row=2)
+        children = [root.make_move(index) for index in root.grid.get_possible_moves()]
+        vault.save_many([root] + children)
+        vault.flush()
+
+        loaded = vault.load_game_state(root.game_state_id)
+        self.assertEqual(root, loaded)
+        self.assertListEqual(
+            [child.game_state_id for child in children],
+            [child.game_state_id for child in loaded.children]
+        )
+        self.assertListEqual([False] * len(children), loaded.children_mirrored)
+        loaded_child = vault.load_game_state(children[1].game_state_id)
+        self.assertListEqual([root.game_state_id], [parent.game_state_id for parent in loaded_child.parents])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from n_in_a_row.game_state.bloom_filter import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        rnd = random.Random(1)
+        keys = [rnd.getrandbits(64) for _ in range(5000)] + [-rnd.getrandbits(63) for _ in range(5000)]
+        bloom_filter = BloomFilter(len(keys))
+        bloom_filter.add_many(keys[:100])
+        false_positives = 0
+        for key in keys[100:]:
+            false_positives += key in bloom_filter
+            bloom_filter.add(key)
+        self.assertTrue(all(bloom_filter.contains_many(keys)))
+        self.assertIn(keys[0], bloom_filter)
+        self.assertEqual(len(keys) - false_positives, len(bloom_filter))
+
+    def test_repeated_keys(self):
+        bloom_filter = BloomFilter(100)
+        bloom_filter.add_many([1, 2, 3])
+        estimated_error_rate = bloom_filter.estimated_error_rate
+        bloom_filter.add_many([3, 2, 1, 1])
+        bloom_filter.add(2)
+        self.assertEqual(3, len(bloom_filter))
+        self.assertEqual(estimated_error_rate, bloom_filter.estimated_error_rate)
+
+    def test_error_rate(self):
+        rnd = random.Random(2)
+        bloom_filter = BloomFilter(10000, error_rate=0.01)
+        bloom_filter.add_many([rnd.getrandbits(64) for _ in range(10000)])
+        false_positives = sum(bloom_filter.contains_many([rnd.getrandbits(64) for _ in range(20000)]))
+        self.assertLess(false_positives / 20000, 0.02)
+        self.assertAlmostEqual(0.01, bloom_filter.estimated_error_rate, delta=0.002)
+
+    def test_clear(self):
+        bloom_filter = BloomFilter(10)
+        bloom_filter.add_many([1, 2, 3])
+        bloom_filter.clear()
+        self.assertFalse(any(bloom_filter.contains_many([1, 2, 3])))
+        self.assertEqual(0, len(bloom_filter))
+        self.assertRaises(ValueError, BloomFilter, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import io
+import random
+import unittest
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid, Grid
+from n_in_a_row.win_state import WinState
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_tree_builder import GameTreeBuilder
+from n_in_a_row.game_state.game_tree_query import GameTreeQuery
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.game_annotator import (
+    GameAnnotator, GameRecordError, read_game_records, write_annotations
+)
+from n_in_a_row.game_state.storage import MemoryBackend
+
+
+def random_games(count: int, seed: int):
+    rnd = random.Random(seed)
+    games = []
+    for _ in range(count):
+        grid = Grid(rows=3, cols=3)
+        chip = Chip.GREEN
+        moves = []
+        while grid.get_win_state(3) is None:
+            moves.append(rnd.choice(list(grid.iter_possible_cols())))
+            grid.drop_chip(moves[-1], chip)
+            chip = chip.swap_chip()
+        # some games are recorded unfinished
+        games.append(moves[:rnd.randint(1, len(moves))])
+    return games
+
+
+class TestGameAnnotator(unittest.TestCase):
+
+    def setUp(self):
+        self.vaults = {}
+        for canonical in (False, True):
+            tree_builder = GameTreeBuilder(
+                GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                vault=GameStateVault(backend=MemoryBackend())
+            )
+            tree_builder.build_solution_tree()
+            self.vaults[canonical] = tree_builder.vault
+
+    def test_same_as_query(self):
+        games = random_games(50, seed=2)
+        for canonical, vault in self.vaults.items():
+            query = GameTreeQuery(vault)
+            annotator = GameAnnotator(vault, rows=3, cols=3, chips_in_a_row=3, canonical=canonical, batch_size=7)
+            annotations = list(annotator.annotate(games))
+            self.assertEqual(sum(len(moves) for moves in games), len(annotations))
+            self.assertEqual(len(annotations) + len(games), annotator.positions)
+
+            annotations = iter(annotations)
+            for game, moves in enumerate(games):
+                game_state = GameState(
+                    BitGrid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical
+                )
+                for ply, col in enumerate(moves):
+                    annotation = next(annotations)
+                    self.assertEqual((game, ply, col), annotation[:3])
+                    result = query.evaluate(game_state)
+                    self.assertEqual((result.win_state, result.distance), annotation[3:5])
+                    self.assertEqual(query.best_move(game_state).col, annotation.best_col)
+                    game_state = game_state.make_move(
+                        next(index for index in game_state.grid.get_possible_moves() if index.col == col)
+                    )
+                    mover = WinState.from_chip(game_state.next_chip.swap_chip())
+                    self.assertEqual(
+                        result.win_state == mover and query.evaluate(game_state).win_state != mover
+                        or result.win_state == WinState.DRAW and query.evaluate(game_state).win_state != WinState.DRAW,
+                        annotation.blunder
+                    )
+
+    def test_missing(self):
+        vault = GameStateVault(backend=MemoryBackend())
+        annotations = list(GameAnnotator(vault, rows=3, cols=3, chips_in_a_row=3).annotate([[1, 1]]))
+        self.assertEqual([(0, 0, 1, None, None, None, None), (0, 1, 1, None, None, None, None)], annotations)
+
+    def test_invalid(self):
+        annotator = GameAnnotator(self.vaults[False], rows=3, cols=3, chips_in_a_row=3)
+        self.assertRaises(GameRecordError, list, annotator.annotate([[0, 0, 0, 0]]))
+        self.assertRaises(GameRecordError, list, annotator.annotate([[0, 1, 0, 1, 0, 1]]))
+        # the grid is back to empty after a bad record
+        self.assertEqual([0] * 9, annotator.grid.to_cells())
+
+    def test_records(self):
+        lines = io.StringIO('# 3x3\n1 0 2\n\n0,1\n')
+        games = list(read_game_records(lines))
+        self.assertListEqual([[1, 0, 2], [0, 1]], games)
+
+        output = io.StringIO()
+        count = write_annotations(GameAnnotator(self.vaults[False], 3, 3, 3).annotate(games), output)
+        self.assertEqual(5, count)
+        rows = output.getvalue().splitlines()
+        self.assertEqual(6, len(rows))
+        self.assertEqual(['0', '0', '1'], rows[1].split('\t')[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
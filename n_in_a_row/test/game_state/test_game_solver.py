@@ -0,0 +1,123 @@
+import random
+import unittest
+from typing import Tuple
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid, BitGrid, GridIndex
+from n_in_a_row.win_state import WinState
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_solver import GameSolver, SolverResult
+
+
+def make_child(game_state: GameState, index: GridIndex) -> GameState:
+    child = game_state.make_move(index)
+    # the brute force doesn't need the tree
+    game_state.children.clear()
+    return child
+
+
+def minimax(game_state: GameState) -> Tuple[int, int]:
+    # (outcome for the side to move: 1 win, 0 draw, -1 loss, distance)
+    if game_state.win_state == WinState.DRAW:
+        return 0, 0
+    if game_state.win_state is not None:
+        return -1, 0
+    results = []
+    for index in game_state.grid.get_possible_moves():
+        outcome, distance = minimax(make_child(game_state, index))
+        results.append((-outcome, distance + 1))
+    # prefer winning, then the quickest win or the longest loss
+    return max(results, key=lambda result: (result[0], -result[1] if result[0] > 0 else result[1]))
+
+
+def to_result(game_state: GameState, outcome: int, distance: int) -> SolverResult:
+    if outcome == 0:
+        return SolverResult(WinState.DRAW, distance)
+    chip = game_state.next_chip if outcome > 0 else game_state.next_chip.swap_chip()
+    return SolverResult(WinState.from_chip(chip), distance)
+
+
+class TestGameSolver(unittest.TestCase):
+
+    def test_immediate_win(self):
+        grid = BitGrid(rows=3, cols=3)
+        grid.drop_chip(0, Chip.GREEN)
+        grid.drop_chip(2, Chip.RED)
+        grid.drop_chip(0, Chip.GREEN)
+        grid.drop_chip(2, Chip.RED)
+        game_state = GameState(grid, next_chip=Chip.GREEN, chips_in_a_row=3)
+        self.assertEqual(SolverResult(WinState.GREEN, 1), GameSolver().solve(game_state))
+
+    def test_large_board(self):
+        for grid_cls in (Grid, BitGrid):
+            grid = grid_cls(rows=7, cols=9)
+            for col in range(5, 8):
+                grid.drop_chip(col, Chip.GREEN)
+                grid.drop_chip(col, Chip.RED)
+            game_state = GameState(grid, next_chip=Chip.GREEN, chips_in_a_row=4)
+            self.assertEqual(SolverResult(WinState.GREEN, 1), GameSolver().solve(game_state, max_depth=2))
+
+    def test_finished(self):
+        grid = Grid(rows=1, cols=2)
+        grid.drop_chip(0, Chip.GREEN)
+        grid.drop_chip(1, Chip.GREEN)
+        game_state = GameState(grid, next_chip=Chip.RED, chips_in_a_row=2)
+        self.assertEqual(SolverResult(WinState.GREEN, 0), GameSolver().solve(game_state))
+
+    def test_same_as_minimax(self):
+        rnd = random.Random(3)
+        for rows, cols, chips_in_a_row, canonical, moves in [
+            (3, 3, 3, False, 0), (3, 3, 3, True, 1), (2, 4, 2, False, 0), (3, 4, 3, True, 3), (4, 3, 3, False, 3)
+        ]:
+            for _ in range(5):
+                game_state = GameState(
+                    BitGrid(rows=rows, cols=cols),
+                    next_chip=Chip.GREEN,
+                    chips_in_a_row=chips_in_a_row,
+                    canonical=canonical
+                )
+                for _ in range(rnd.randint(moves, moves + 2)):
+                    if game_state.win_state is not None:
+                        break
+                    game_state = make_child(game_state, rnd.choice(game_state.grid.get_possible_moves()))
+                expected = to_result(game_state, *minimax(game_state))
+                self.assertEqual(expected, GameSolver().solve(game_state))
+                self.assertEqual(expected, GameSolver(table_size=16).solve(game_state))
+
+    def test_shared_table(self):
+        # deeper searches of earlier positions must not end the deepening of later ones early
+        rnd = random.Random(5)
+        solver = GameSolver()
+        game_states = []
+        game_state = GameState(BitGrid(rows=3, cols=4), next_chip=Chip.GREEN, chips_in_a_row=3)
+        while game_state.win_state is None:
+            game_states.append(game_state)
+            game_state = make_child(game_state, rnd.choice(game_state.grid.get_possible_moves()))
+        for game_state in reversed(game_states):
+            self.assertEqual(to_result(game_state, *minimax(game_state)), solver.solve(game_state))
+
+    def test_table_is_bounded(self):
+        solver = GameSolver(table_size=100)
+        solver.solve(GameState(BitGrid(rows=4, cols=4), next_chip=Chip.GREEN, chips_in_a_row=3))
+        self.assertEqual(100, len(solver.table))
+        self.assertGreater(solver.nodes, 100)
+
+    def test_max_depth(self):
+        game_state = GameState(BitGrid(rows=4, cols=4), next_chip=Chip.GREEN, chips_in_a_row=3)
+        solver = GameSolver()
+        self.assertIsNone(solver.solve(game_state, max_depth=4))
+        self.assertEqual(4, len(solver.depth_nodes))
+        self.assertEqual(solver.nodes, sum(solver.depth_nodes))
+
+        grid = BitGrid(rows=3, cols=3)
+        grid.drop_chip(0, Chip.GREEN)
+        grid.drop_chip(2, Chip.RED)
+        grid.drop_chip(0, Chip.GREEN)
+        grid.drop_chip(2, Chip.RED)
+        game_state = GameState(grid, next_chip=Chip.GREEN, chips_in_a_row=3)
+        self.assertEqual(SolverResult(WinState.GREEN, 1), solver.solve(game_state, max_depth=3))
+        self.assertEqual(1, len(solver.depth_nodes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -136,7 +136,7 @@ class TestMakeMove(unittest.TestCase):
         self.assertIsNone(child.win_states_counter)
         self.assertIn(gs, child.parents)
         self.assertIn(child, gs.children)
-        self.assertEqual(0, len(gs.child_leaf_node_ids))
+        self.assertEqual(0, len(gs.child_leaves))
 
         gs.grid[1, 1] = Chip.GREEN
         self.assertEqual(Chip.EMPTY, child.grid[1, 1])
@@ -180,5 +180,58 @@ class TestMakeMove(unittest.TestCase):
         self.assertRaises(CellError, lambda: gs.make_move(GridIndex(0, 2)))
 
 
+class TestMirror(unittest.TestCase):
+
+    @staticmethod
+    def _make_mirrored_grids():
+        g1 = Grid(rows=3, cols=4)
+        g1.drop_chip(0, Chip.GREEN)
+        g1.drop_chip(1, Chip.RED)
+        g1.drop_chip(0, Chip.GREEN)
+
+        g2 = Grid(rows=3, cols=4)
+        g2.drop_chip(3, Chip.GREEN)
+        g2.drop_chip(2, Chip.RED)
+        g2.drop_chip(3, Chip.GREEN)
+        return g1, g2
+
+    def test_mirror(self):
+        g1, g2 = self._make_mirrored_grids()
+        gs1 = GameState(g1, next_chip=Chip.RED, chips_in_a_row=3)
+        gs2 = GameState(g2, next_chip=Chip.RED, chips_in_a_row=3)
+        self.assertEqual(gs2, gs1.mirror())
+        self.assertEqual(gs1, gs2.mirror())
+        self.assertEqual(gs1.mirror_id, gs2.orientation_id)
+        self.assertEqual(GridIndex(1, 3), gs1.mirror_index(GridIndex(1, 0)))
+
+    def test_canonical_id(self):
+        g1, g2 = self._make_mirrored_grids()
+        gs1 = GameState(g1, next_chip=Chip.RED, chips_in_a_row=3, canonical=True)
+        gs2 = GameState(g2, next_chip=Chip.RED, chips_in_a_row=3, canonical=True)
+        self.assertEqual(gs1.game_state_id, gs2.game_state_id)
+        self.assertNotEqual(gs1.orientation_id, gs2.orientation_id)
+        self.assertNotEqual(gs1.is_mirrored, gs2.is_mirrored)
+        self.assertTrue(gs1.is_same_position(gs2))
+
+        plain = GameState(g1, next_chip=Chip.RED, chips_in_a_row=3)
+        self.assertNotEqual(plain.game_state_id, gs1.orientation_id)
+        self.assertFalse(plain.is_same_position(GameState(g2, next_chip=Chip.RED, chips_in_a_row=3)))
+
+    def test_symmetric(self):
+        g = Grid(rows=3, cols=3)
+        g.drop_chip(1, Chip.GREEN)
+        gs = GameState(g, next_chip=Chip.RED, chips_in_a_row=3, canonical=True)
+        self.assertEqual(gs.orientation_id, gs.mirror_id)
+        self.assertFalse(gs.is_mirrored)
+
+    def test_make_move(self):
+        gs = GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=True)
+        left = gs.make_move(GridIndex(2, 0))
+        right = gs.make_move(GridIndex(2, 2))
+        self.assertTrue(left.canonical)
+        self.assertEqual(left.game_state_id, right.game_state_id)
+        self.assertNotEqual(left.is_mirrored, right.is_mirrored)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,166 @@
+import os
+import pickle
+import unittest
+from collections import Counter
+
+import numpy as np
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid, BitGrid, GridIndex
+from n_in_a_row.win_state import WinState
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.leaf_bitmap import LeafBitmap
+from n_in_a_row.game_state.game_state_codec import (
+    encode_game_state, decode_game_state, encode_leaf_ranks, decode_leaf_ranks, GameStateCodecError
+)
+
+
+def make_stored(grid_cls=Grid, canonical=False) -> GameState:
+    root = GameState(grid_cls(rows=3, cols=5), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical)
+    game_state = root.make_move(root.grid.get_possible_moves()[1])
+    for index in game_state.grid.get_possible_moves():
+        game_state.make_move(index)
+    game_state = GameStateVault._to_stored(game_state)
+    game_state.children_mirrored = [False, True, False, False, True]
+    game_state.child_leaves = {
+        WinState.GREEN: LeafBitmap.from_ranks([0, 2, 70000]),
+        WinState.DRAW: LeafBitmap.from_ranks(range(50)),
+    }
+    game_state.win_states_counter = Counter({WinState.GREEN: 3, WinState.DRAW: 50})
+    game_state.result = WinState.GREEN
+    game_state.distance = 7
+    game_state.best_col = 3
+    return game_state
+
+
+class TestRoundTrip(unittest.TestCase):
+
+    def assertSameStored(self, expected: GameState, actual: GameState):
+        self.assertEqual(expected, actual)
+        self.assertIs(type(expected.grid), type(actual.grid))
+        self.assertEqual(hash(expected.grid), hash(actual.grid))
+        for attr in ('game_state_id', 'orientation_id', 'next_chip', 'chips_in_a_row', 'canonical',
+                     'win_state', 'win_states_counter', 'parents', 'children', 'children_mirrored',
+                     'child_leaves', 'result', 'distance', 'best_col'):
+            self.assertEqual(getattr(expected, attr), getattr(actual, attr), attr)
+
+    def test_grid(self):
+        game_state = make_stored()
+        self.assertSameStored(game_state, decode_game_state(encode_game_state(game_state)))
+
+    def test_bit_grid(self):
+        game_state = make_stored(BitGrid)
+        decoded = decode_game_state(encode_game_state(game_state))
+        self.assertSameStored(game_state, decoded)
+        self.assertEqual(game_state.grid.zobrist_key, decoded.grid.zobrist_key)
+
+    def test_canonical(self):
+        game_state = make_stored(canonical=True)
+        decoded = decode_game_state(encode_game_state(game_state))
+        self.assertSameStored(game_state, decoded)
+        self.assertEqual(game_state.mirror_id, decoded.mirror_id)
+
+    def test_decoded_grid_is_playable(self):
+        game_state = make_stored()
+        decoded = decode_game_state(encode_game_state(game_state))
+        index = decoded.grid.get_possible_moves()[0]
+        self.assertEqual(game_state.make_move(index), decoded.make_move(index))
+
+    def test_leaf(self):
+        game_state = GameState(Grid(rows=1, cols=2), next_chip=Chip.GREEN, chips_in_a_row=2)
+        game_state = game_state.make_move(game_state.grid.get_possible_moves()[0])
+        game_state = game_state.make_move(game_state.grid.get_possible_moves()[0])
+        game_state = GameStateVault._to_stored(game_state)
+        self.assertEqual(WinState.DRAW, game_state.win_state)
+        self.assertIsNone(game_state.win_states_counter)
+        self.assertSameStored(game_state, decode_game_state(encode_game_state(game_state)))
+
+    def test_smaller_than_pickle(self):
+        game_state = make_stored()
+        self.assertLess(len(encode_game_state(game_state)), len(pickle.dumps(game_state)) / 4)
+
+    def test_leaf_ranks(self):
+        leaf_rank_ids = {WinState.GREEN: [5, 2 ** 64 - 1, 7], WinState.RED: [-3, 4], WinState.DRAW: []}
+        mirror_ranks = {
+            WinState.GREEN: np.array([0, 2, 1], dtype=np.uint32),
+            WinState.RED: np.array([0, 1], dtype=np.uint32),
+            WinState.DRAW: np.array([], dtype=np.uint32)
+        }
+        decoded_rank_ids, decoded_mirror_ranks = decode_leaf_ranks(encode_leaf_ranks(leaf_rank_ids, mirror_ranks))
+        self.assertDictEqual(leaf_rank_ids, decoded_rank_ids)
+        self.assertListEqual(list(mirror_ranks), list(decoded_mirror_ranks))
+        for win_state, ranks in mirror_ranks.items():
+            self.assertEqual(np.uint32, decoded_mirror_ranks[win_state].dtype)
+            self.assertListEqual(ranks.tolist(), decoded_mirror_ranks[win_state].tolist())
+
+
+# written by the tree before the binary records: a 3x5 board, 3 in a row, after two moves
+# in the second column, with the grid of that tree and the leaf ids of the children
+LEGACY_PATH = os.path.join(os.path.dirname(__file__), 'legacy_game_state.pickle')
+
+
+def load_legacy() -> bytes:
+    with open(LEGACY_PATH, 'rb') as legacy_file:
+        return legacy_file.read()
+
+
+class TestLegacy(unittest.TestCase):
+
+    def test_pickled(self):
+        decoded = decode_game_state(load_legacy())
+        grid = Grid(rows=3, cols=5)
+        grid[GridIndex(2, 1)] = Chip.GREEN
+        grid[GridIndex(1, 1)] = Chip.RED
+        self.assertEqual(GameState(grid, next_chip=Chip.GREEN, chips_in_a_row=3), decoded)
+        self.assertFalse(decoded.canonical)
+        self.assertEqual(5, len(decoded.children))
+        self.assertListEqual([False] * 5, decoded.children_mirrored)
+        self.assertDictEqual({}, decoded.child_leaves)
+        self.assertIsNone(decoded.result)
+
+        # the board is set up like a new one
+        self.assertEqual(grid.zobrist_key, decoded.grid.zobrist_key)
+        self.assertEqual(grid.mirror_zobrist_key, decoded.grid.mirror_zobrist_key)
+        self.assertEqual(decoded.game_state_id, decoded.orientation_id)
+        self.assertIsNone(decoded.grid.get_win_state(3))
+        next_game_state = decoded.make_move(GridIndex(2, 2)).make_move(GridIndex(2, 3))
+        self.assertIsNone(next_game_state.win_state)
+        self.assertEqual(WinState.GREEN, next_game_state.make_move(GridIndex(2, 0)).win_state)
+        decoded.grid.push(2, Chip.GREEN)
+        self.assertIsNone(decoded.grid.get_win_state(3))
+        decoded.grid.pop()
+        self.assertEqual(grid, decoded.grid)
+
+    def test_without_result(self):
+        game_state = make_stored()
+        game_state.result = game_state.distance = game_state.best_col = None
+        data = encode_game_state(game_state)
+        self.assertLess(len(data), len(encode_game_state(make_stored())))
+        # version 2 records are the same without the result
+        decoded = decode_game_state(bytes([2]) + data[1:])
+        self.assertEqual(make_stored().child_leaves, decoded.child_leaves)
+        self.assertIsNone(decoded.result)
+        self.assertIsNone(decoded.best_col)
+
+    def test_unknown_version(self):
+        data = bytearray(encode_game_state(make_stored()))
+        data[0] = 0x7F
+        self.assertRaises(GameStateCodecError, decode_game_state, bytes(data))
+
+    def test_migrate(self):
+        vault = GameStateVault()
+        game_state = decode_game_state(load_legacy())
+        vault.backend.put_many({game_state.game_state_id: load_legacy()})
+        try:
+            self.assertGreaterEqual(vault.migrate_pickled(), 1)
+            data = vault.backend.get_many([game_state.game_state_id])[0]
+            self.assertEqual(encode_game_state(game_state), data)
+            self.assertEqual(game_state.grid.zobrist_key, decode_game_state(data).grid.zobrist_key)
+            self.assertEqual(0, vault.migrate_pickled())
+        finally:
+            vault.backend.delete_many([game_state.game_state_id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,304 @@
+import unittest
+from unittest.mock import patch
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.win_state import WinState
+from n_in_a_row.grid import Grid, GridIndex
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.lru_cache import LRUCache
+from n_in_a_row.game_state.leaf_bitmap import LeafBitmap
+from n_in_a_row.game_state.bloom_filter import BloomFilter
+from n_in_a_row.game_state.game_state_codec import encode_game_state
+from n_in_a_row.game_state.storage import MemoryBackend
+from n_in_a_row.game_state.game_state_vault import (
+    GameStateVault, GameStateProxy, GameStateNotInVaultError, GameStateCollisionError
+)
+
+
+class VaultTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.vault = GameStateVault()
+        self.root = GameState(Grid(rows=2, cols=3), next_chip=Chip.GREEN, chips_in_a_row=2)
+        self.children = [self.root.make_move(index) for index in self.root.grid.get_possible_moves()]
+
+    def tearDown(self):
+        self.vault.flush()
+        self.vault.backend.delete_many(
+            [self.root.game_state_id] + [child.game_state_id for child in self.children]
+        )
+
+
+class TestSaveLoad(VaultTestCase):
+
+    def test_save_load(self):
+        self.vault.save_game_state(self.root)
+        loaded = self.vault.load_game_state(self.root.game_state_id)
+        self.assertEqual(self.root, loaded)
+        self.assertListEqual(
+            [child.game_state_id for child in self.children],
+            [child.game_state_id for child in loaded.children]
+        )
+        self.assertTrue(all(isinstance(child, GameStateProxy) for child in loaded.children))
+
+    def test_not_in_vault(self):
+        self.assertRaises(
+            GameStateNotInVaultError,
+            self.vault.load_game_state,
+            self.children[0].game_state_id
+        )
+
+    def test_collision(self):
+        self.vault.verify_collisions = True
+        self.vault.save_game_state(self.root)
+        self.assertRaises(
+            GameStateCollisionError,
+            self.vault.load_game_state,
+            self.root.game_state_id,
+            expected=self.children[0]
+        )
+        self.assertEqual(
+            self.root,
+            self.vault.load_game_state(self.root.game_state_id, expected=self.root)
+        )
+
+
+class TestBatch(VaultTestCase):
+
+    def test_save_load_many(self):
+        game_state_ids = self.vault.save_many(self.children)
+        self.assertListEqual([child.game_state_id for child in self.children], game_state_ids)
+
+        loaded = self.vault.load_many([game_state_ids[2], self.root.game_state_id, game_state_ids[0]])
+        self.assertEqual(self.children[2], loaded[0])
+        self.assertIsNone(loaded[1])
+        self.assertEqual(self.children[0], loaded[2])
+        self.assertListEqual(
+            [self.root.game_state_id],
+            [parent.game_state_id for parent in loaded[2].parents]
+        )
+
+    def test_exists_many(self):
+        self.vault.save_many(self.children[:2])
+        self.assertListEqual(
+            [True, True, False, False],
+            self.vault.exists_many(
+                [child.game_state_id for child in self.children] + [self.root.game_state_id]
+            )
+        )
+
+    def test_write_behind(self):
+        self.vault.cache.max_entries = 0
+        self.vault.flush_size = 3
+        self.vault.save_many(self.children[:2])
+        self.assertListEqual([False], self.vault.backend.exists_many([self.children[0].game_state_id]))
+        self.assertEqual(self.children[0], self.vault.load_game_state(self.children[0].game_state_id))
+
+        self.vault.save_game_state(self.children[2])
+        self.assertEqual(
+            3,
+            sum(self.vault.backend.exists_many([child.game_state_id for child in self.children]))
+        )
+
+        child = self.vault.load_game_state(self.children[0].game_state_id)
+        child.grid[GridIndex(0, 0)] = Chip.RED
+        self.vault.save_game_state(child)
+        self.vault.flush()
+        self.assertEqual(child, self.vault.load_game_state(child.game_state_id))
+
+
+class TestCache(VaultTestCase):
+
+    def test_hits_and_misses(self):
+        self.vault.save_game_state(self.root)
+        self.vault.flush()
+        self.vault.cache = LRUCache(max_entries=10, on_evict=self.vault.cache.on_evict)
+
+        self.vault.load_game_state(self.root.game_state_id)
+        self.assertEqual((0, 1), (self.vault.cache.hits, self.vault.cache.misses))
+        self.vault.load_game_state(self.root.game_state_id)
+        self.vault.load_many([self.root.game_state_id, self.children[0].game_state_id])
+        self.assertEqual((2, 2), (self.vault.cache.hits, self.vault.cache.misses))
+
+    def test_write_back(self):
+        self.vault.cache.max_entries = 2
+        self.vault.save_many(self.children)
+        self.assertEqual(2, len(self.vault.cache))
+        self.assertEqual(1, self.vault.cache.evictions)
+        # the evicted dirty entry went to the write-behind buffer
+        self.vault.load_many([child.game_state_id for child in self.children])
+
+        self.vault.flush()
+        self.assertEqual(
+            3,
+            sum(self.vault.backend.exists_many([child.game_state_id for child in self.children]))
+        )
+        self.assertListEqual([], list(self.vault.cache.dirty_items()))
+
+    def test_loaded_copies(self):
+        self.vault.save_game_state(self.root)
+        loaded = self.vault.load_game_state(self.root.game_state_id)
+        loaded.child_leaves[WinState.GREEN] = LeafBitmap.from_ranks([1])
+        loaded.children.pop()
+        reloaded = self.vault.load_game_state(self.root.game_state_id)
+        self.assertDictEqual({}, reloaded.child_leaves)
+        self.assertEqual(len(self.children), len(reloaded.children))
+
+
+class TestFilter(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.vault.saved_filter = BloomFilter(1000)
+
+    def test_skips_unsaved(self):
+        self.vault.save_game_state(self.root)
+        self.vault.flush()
+        backend_get_many = self.vault.backend.get_many
+        requested = []
+        self.vault.backend.get_many = lambda keys: requested.extend(keys) or backend_get_many(keys)
+        self.vault.cache = LRUCache(on_evict=self.vault.cache.on_evict)
+
+        game_state_ids = [self.root.game_state_id] + [child.game_state_id for child in self.children]
+        loaded = self.vault.load_stored_many(game_state_ids)
+        self.assertEqual(self.root, loaded[0])
+        self.assertListEqual([None] * len(self.children), loaded[1:])
+        self.assertListEqual([self.root.game_state_id], requested)
+        self.assertEqual(len(self.children), self.vault.filter_skips)
+        self.assertListEqual([True] + [False] * len(self.children), self.vault.exists_many(game_state_ids))
+        self.assertEqual(0, self.vault.filter_error_rate)
+
+    def test_rebuild(self):
+        self.vault.save_many([self.root] + self.children)
+        self.vault.flush()
+        vault_config = load_config()['vault']
+        vault_config['bloom_expected_nodes'] = 1000
+        try:
+            # the keys are read once, len() isn't asked for whether there are any
+            with patch.object(type(self.vault.backend), '__len__', side_effect=AssertionError):
+                reopened = GameStateVault()
+        finally:
+            del vault_config['bloom_expected_nodes']
+        self.assertTrue(all(reopened.saved_filter.contains_many(
+            [self.root.game_state_id] + [child.game_state_id for child in self.children]
+        )))
+        self.assertEqual(self.root, reopened.load_game_state(self.root.game_state_id))
+
+
+class TestParentLists(VaultTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.writes = []
+        for method in ('put_many', 'append_parents'):
+            backend_method = getattr(self.vault.backend, method)
+            setattr(self.vault.backend, method, self._recorded(method, backend_method))
+
+    def _recorded(self, method, backend_method):
+        return lambda items: self.writes.append((method, dict(items))) or backend_method(items)
+
+    def test_add_parent(self):
+        self.assertTrue(self.vault.backend.appends_parents)
+        child_id, parent_id = self.children[0].game_state_id, self.children[1].game_state_id
+        self.vault.save_many(self.children)
+        self.vault.flush()
+        self.writes.clear()
+
+        self.vault.add_parent(child_id, parent_id)
+        self.vault.flush()
+        self.assertListEqual([('append_parents', {child_id: [parent_id]})], self.writes)
+        reopened = GameStateVault(backend=self.vault.backend)
+        self.assertCountEqual(
+            [self.root.game_state_id, parent_id],
+            [parent.game_state_id for parent in reopened.load_game_state(child_id).parents]
+        )
+
+        # an edge that is there already is not appended again
+        reopened.add_parent(child_id, parent_id)
+        reopened.flush()
+        self.assertListEqual([('append_parents', {child_id: [parent_id]})], self.writes)
+        self.assertEqual(2, len(self.vault.backend.get_parents([child_id])[0]))
+
+    def test_save_appends(self):
+        child_id = self.children[0].game_state_id
+        self.vault.save_many(self.children)
+        self.vault.flush()
+        self.writes.clear()
+
+        # another vault adds an edge after this one loaded the game state
+        child = self.vault.load_game_state(child_id)
+        other = GameStateVault(backend=self.vault.backend)
+        other.add_parent(child_id, self.children[1].game_state_id)
+        other.flush()
+        child.parents.append(self.vault.load_game_state(self.children[2].game_state_id))
+        self.vault.save_game_state(child)
+        self.vault.flush()
+        self.assertIn(('append_parents', {child_id: [self.children[2].game_state_id]}), self.writes)
+        self.assertCountEqual(
+            [self.root.game_state_id, self.children[1].game_state_id, self.children[2].game_state_id],
+            self.vault.backend.get_parents([child_id])[0]
+        )
+
+    def test_lazy_parents(self):
+        child_id = self.children[0].game_state_id
+        self.vault.save_many(self.children)
+        self.vault.flush()
+        self.writes.clear()
+
+        reopened = GameStateVault(backend=self.vault.backend)
+        child = reopened.load_many([child_id], with_parents=False)[0]
+        self.assertIsNone(child.parents)
+        self.assertIn('parents=None', repr(child))
+        child.win_states_counter = {WinState.GREEN: 1}
+        reopened.save_game_state(child)
+        reopened.add_parent(child_id, self.children[1].game_state_id)
+        reopened.flush()
+        self.assertCountEqual(['put_many', 'append_parents'], [method for method, _ in self.writes])
+
+        child = reopened.load_game_state(child_id)
+        self.assertDictEqual({WinState.GREEN: 1}, child.win_states_counter)
+        self.assertCountEqual(
+            [self.root.game_state_id, self.children[1].game_state_id],
+            [parent.game_state_id for parent in child.parents]
+        )
+
+    def test_older_record(self):
+        # records written before the parent lists keep their parents
+        child = self.children[0]
+        stored_child = GameStateVault._to_stored(child)
+        self.vault.backend.put_many({child.game_state_id: encode_game_state(stored_child)})
+        self.vault.add_parent(child.game_state_id, self.children[1].game_state_id)
+        self.vault.flush()
+        parent_ids = [self.root.game_state_id, self.children[1].game_state_id]
+        reopened = GameStateVault(backend=self.vault.backend)
+        self.assertCountEqual(parent_ids, reopened.load_stored_many([child.game_state_id])[0].parents)
+
+        # the first read moves them to the list
+        reopened.flush()
+        self.assertCountEqual(parent_ids, self.vault.backend.get_parents([child.game_state_id])[0])
+        reopened = GameStateVault(backend=self.vault.backend)
+        self.assertCountEqual(parent_ids, reopened.load_stored_many([child.game_state_id])[0].parents)
+
+    def test_memory_backend(self):
+        for append_parents in (False, True):
+            vault = GameStateVault(backend=MemoryBackend(append_parents=append_parents))
+            vault.save_many(self.children)
+            vault.add_parent(self.children[0].game_state_id, self.children[1].game_state_id)
+            vault.flush()
+            self.assertEqual(append_parents, bool(vault.backend.parents))
+            reopened = GameStateVault(backend=vault.backend)
+            self.assertListEqual(
+                [self.root.game_state_id, self.children[1].game_state_id],
+                reopened.load_stored_many([self.children[0].game_state_id])[0].parents
+            )
+        self.assertRaises(
+            GameStateNotInVaultError,
+            GameStateVault(backend=MemoryBackend()).add_parent,
+            self.root.game_state_id,
+            self.children[0].game_state_id
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
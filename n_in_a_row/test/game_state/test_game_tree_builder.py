@@ -1,12 +1,19 @@
+import os
+import tempfile
 import unittest
 
+from collections import deque
 from copy import deepcopy
+from unittest.mock import patch
 
 from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
 from n_in_a_row.win_state import WinState
-from n_in_a_row.grid import Grid
+from n_in_a_row.grid import Grid, GridIndex
 from n_in_a_row.game_state.game_state import GameState
 from n_in_a_row.game_state.game_tree_builder import GameTreeBuilder
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.storage import MemoryBackend
 
 
 class TestGameTreeBuilder(unittest.TestCase):
@@ -298,7 +305,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         self.assertSetEqual(
             {gs000.game_state_id, gs010.game_state_id, gs011.game_state_id,
              gs100.game_state_id, gs101.game_state_id, gs110.game_state_id},
-            node.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node)
         )
 
         # root -> 0
@@ -310,7 +317,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs000.game_state_id, gs010.game_state_id, gs011.game_state_id},
-            node0.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node0)
         )
 
         # root -> 0 -> 0
@@ -322,7 +329,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs000.game_state_id},
-            node00.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node00)
         )
 
         # root -> 0 -> 0 -> 0
@@ -335,7 +342,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs000.game_state_id},
-            node000.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node000)
         )
 
         # root -> 0 -> 1
@@ -347,7 +354,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs010.game_state_id, gs011.game_state_id},
-            node01.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node01)
         )
 
         # root -> 0 -> 1 -> 0
@@ -360,7 +367,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs010.game_state_id},
-            node010.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node010)
         )
 
         # root -> 0 -> 1 -> 1
@@ -373,7 +380,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs011.game_state_id},
-            node011.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node011)
         )
 
         # root -> 1
@@ -385,7 +392,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs100.game_state_id, gs101.game_state_id, gs110.game_state_id},
-            node1.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node1)
         )
 
         # root -> 1 -> 0
@@ -397,7 +404,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs100.game_state_id, gs101.game_state_id},
-            node10.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node10)
         )
 
         # root -> 1 -> 0 -> 0
@@ -410,7 +417,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs100.game_state_id},
-            node100.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node100)
         )
 
         # root -> 1 -> 0 -> 1
@@ -423,7 +430,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs101.game_state_id},
-            node101.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node101)
         )
 
         # root -> 1 -> 1
@@ -435,7 +442,7 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs110.game_state_id},
-            node11.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node11)
         )
 
         # root -> 1 -> 1 -> 0
@@ -448,9 +455,262 @@ class TestGameTreeBuilder(unittest.TestCase):
         )
         self.assertSetEqual(
             {gs110.game_state_id},
-            node110.child_leaf_node_ids
+            tree_builder.get_child_leaf_node_ids(node110)
         )
 
+    def test_canonical(self):
+        # own vaults, trees left in the configured one would be loaded instead of built
+        tree_builder = GameTreeBuilder(
+            GameState(
+                Grid(rows=3, cols=3),
+                next_chip=Chip.GREEN,
+                chips_in_a_row=3
+            ),
+            vault=GameStateVault(backend=MemoryBackend())
+        )
+        tree_builder.build_solution_tree()
+
+        canonical_tree_builder = GameTreeBuilder(
+            GameState(
+                Grid(rows=3, cols=3),
+                next_chip=Chip.GREEN,
+                chips_in_a_row=3,
+                canonical=True
+            ),
+            vault=GameStateVault(backend=MemoryBackend())
+        )
+        canonical_tree_builder.build_solution_tree()
+
+        self.assertLess(
+            len(canonical_tree_builder.leaf_node_ids),
+            len(tree_builder.leaf_node_ids)
+        )
+        self.assertEqual(
+            {
+                WinState.GREEN: 118,
+                WinState.RED: 55,
+                WinState.DRAW: 16
+            },
+            canonical_tree_builder.root.win_states_counter
+        )
+        self.assertEqual(
+            tree_builder.root.win_states_counter,
+            canonical_tree_builder.root.win_states_counter
+        )
+
+        # root -> 2 -> 0
+        # 0 0 0
+        # 0 0 0
+        # 2 0 1
+        node = tree_builder.root
+        canonical_node, mirrored = canonical_tree_builder.root, False
+        for index in [GridIndex(2, 2), GridIndex(2, 0)]:
+            node = tree_builder.vault.load_game_state(
+                node.children[node.grid.get_possible_moves().index(index)].game_state_id
+            )
+            canonical_node, mirrored = canonical_tree_builder.get_child(canonical_node, index, mirrored)
+            self.assertEqual(node.win_states_counter, canonical_node.win_states_counter)
+            oriented_node = canonical_node.mirror() if mirrored else canonical_node
+            self.assertEqual(node.grid, oriented_node.grid)
+
+    def test_reload(self):
+        for canonical in (False, True):
+            vault = GameStateVault()
+            vault.backend.clear()
+            tree_builder = GameTreeBuilder(
+                GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                vault=vault
+            )
+            tree_builder.build_solution_tree()
+
+            # the root is found in the vault and the tree is not built again
+            reloaded_tree_builder = GameTreeBuilder(
+                GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                vault=GameStateVault(backend=vault.backend)
+            )
+            reloaded_tree_builder.build_solution_tree()
+            self.assertEqual(0, reloaded_tree_builder.expansions)
+
+            nodes = vault.load_many(list(vault.backend.keys()))
+            reloaded_nodes = reloaded_tree_builder.vault.load_many([node.game_state_id for node in nodes])
+            for node, reloaded_node in zip(nodes, reloaded_nodes):
+                self.assertSetEqual(
+                    tree_builder.get_child_leaf_node_ids(node),
+                    reloaded_tree_builder.get_child_leaf_node_ids(reloaded_node)
+                )
+
+    def test_parallel(self):
+        for canonical in (False, True):
+            serial_backend = MemoryBackend()
+            tree_builder = GameTreeBuilder(
+                GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                vault=GameStateVault(backend=serial_backend)
+            )
+            tree_builder.build_solution_tree()
+
+            parallel_tree_builder = GameTreeBuilder(
+                GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                vault=GameStateVault(backend=MemoryBackend()),
+                workers=2,
+                split_ply=2
+            )
+            # the workers exchange the positions they claimed every few expansions
+            with patch('n_in_a_row.game_state.game_tree_builder._EXCHANGE_EXPANSIONS', 10):
+                parallel_tree_builder.build_solution_tree()
+            self.assertFalse(parallel_tree_builder._pending_elsewhere)
+
+            self.assertSetEqual(set(tree_builder.leaf_node_ids), set(parallel_tree_builder.leaf_node_ids))
+            self.assertEqual(
+                tree_builder.expansions,
+                parallel_tree_builder.expansions - parallel_tree_builder.duplicate_expansions
+            )
+            game_state_ids = list(serial_backend.keys())
+            for node, parallel_node in zip(
+                    tree_builder.vault.load_many(game_state_ids),
+                    parallel_tree_builder.vault.load_many(game_state_ids)
+            ):
+                self.assertEqual(node.win_states_counter, parallel_node.win_states_counter)
+                self.assertSetEqual(
+                    {parent.game_state_id for parent in node.parents},
+                    {parent.game_state_id for parent in parallel_node.parents}
+                )
+                if not canonical:
+                    self.assertListEqual(node.children, parallel_node.children)
+                    self.assertSetEqual(
+                        tree_builder.get_child_leaf_node_ids(node),
+                        parallel_tree_builder.get_child_leaf_node_ids(parallel_node)
+                    )
+
+    def test_expansions(self):
+        for canonical in (False, True):
+            tree_builder = GameTreeBuilder(
+                GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                vault=GameStateVault(backend=MemoryBackend())
+            )
+            tree_builder.build_solution_tree()
+            nodes = tree_builder.vault.load_many(list(tree_builder.vault.backend.keys()))
+            self.assertEqual(sum(1 for node in nodes if node.children), tree_builder.expansions)
+            self.assertEqual(
+                sum(len(node.parents) for node in nodes),
+                len(nodes) - 1 + tree_builder.transpositions + tree_builder.duplicate_pushes_avoided
+            )
+
+            # breadth first, most of the positions are reached again while they wait to be expanded
+            with patch('n_in_a_row.game_state.game_tree_builder.deque', _Queue):
+                bfs_tree_builder = GameTreeBuilder(
+                    GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                    vault=GameStateVault(backend=MemoryBackend())
+                )
+                bfs_tree_builder.build_solution_tree()
+            self.assertEqual(tree_builder.expansions, bfs_tree_builder.expansions)
+            self.assertGreater(bfs_tree_builder.duplicate_pushes_avoided, 0)
+            self.assertEqual(
+                tree_builder.transpositions + tree_builder.duplicate_pushes_avoided,
+                bfs_tree_builder.transpositions + bfs_tree_builder.duplicate_pushes_avoided
+            )
+            self.assertEqual(tree_builder.root.win_states_counter, bfs_tree_builder.root.win_states_counter)
+            for node in nodes:
+                bfs_node = bfs_tree_builder.vault.load_game_state(node.game_state_id)
+                self.assertEqual(node.win_states_counter, bfs_node.win_states_counter)
+                self.assertSetEqual(
+                    {parent.game_state_id for parent in node.parents},
+                    {parent.game_state_id for parent in bfs_node.parents}
+                )
+
+    def test_snapshots(self):
+        for canonical in (False, True):
+            root = GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical)
+            cells = root.grid.to_cells()
+            tree_builder = GameTreeBuilder(root, vault=GameStateVault(backend=MemoryBackend()))
+            with patch.object(Grid, 'snapshot', autospec=True, side_effect=Grid.snapshot) as snapshot:
+                tree_builder.build_solution_tree()
+            # only the positions pushed on the stack get grids of their own
+            self.assertEqual(len(tree_builder.vault.backend) - 1, snapshot.call_count)
+            self.assertListEqual(cells, root.grid.to_cells())
+
+            verifying_tree_builder = GameTreeBuilder(
+                GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+                vault=GameStateVault(backend=MemoryBackend())
+            )
+            verifying_tree_builder.vault.verify_collisions = True
+            verifying_tree_builder.build_solution_tree()
+            self.assertEqual(tree_builder.root.win_states_counter, verifying_tree_builder.root.win_states_counter)
+
+    def test_regulation(self):
+        tree_builder = GameTreeBuilder(
+            GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3),
+            vault=GameStateVault(backend=MemoryBackend())
+        )
+        tree_builder.build_solution_tree()
+
+        regulation = tree_builder._build_lower_parallel_regulation()
+        self.assertSetEqual(set(tree_builder.leaf_node_ids), regulation[0])
+        self.assertSetEqual({tree_builder.root.game_state_id}, regulation[-1])
+        levels = {
+            game_state_id: level
+            for level, level_node_ids in enumerate(regulation)
+            for game_state_id in level_node_ids
+        }
+        self.assertEqual(len(tree_builder.vault.backend), len(levels))
+        for game_state_id, level in levels.items():
+            node = tree_builder.vault.load_game_state(game_state_id)
+            if node.children:
+                # one level above the highest child
+                self.assertEqual(level, 1 + max(levels[child.game_state_id] for child in node.children))
+
+
+class _Queue(deque):
+
+    def pop(self):
+        return self.popleft()
+
+
+class TestGameTreeBuilderMmap(TestGameTreeBuilder):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        vault_config = load_config().setdefault('vault', {})
+        self._vault_config = dict(vault_config)
+        vault_config['backend'] = 'mmap'
+        vault_config['mmap_path'] = os.path.join(self._temp_dir.name, 'game_states')
+
+    def tearDown(self):
+        vault_config = load_config()['vault']
+        vault_config.clear()
+        vault_config.update(self._vault_config)
+        self._temp_dir.cleanup()
+
+
+class TestGameTreeBuilderSqlite(TestGameTreeBuilder):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        vault_config = load_config().setdefault('vault', {})
+        self._vault_config = dict(vault_config)
+        vault_config['backend'] = 'sqlite'
+        vault_config['sqlite_path'] = os.path.join(self._temp_dir.name, 'game_states.sqlite3')
+
+    def tearDown(self):
+        vault_config = load_config()['vault']
+        vault_config.clear()
+        vault_config.update(self._vault_config)
+        self._temp_dir.cleanup()
+
+
+class TestGameTreeBuilderBloomFilter(TestGameTreeBuilder):
+
+    def setUp(self):
+        vault_config = load_config().setdefault('vault', {})
+        self._vault_config = dict(vault_config)
+        # the default vaults are kept apart from the ones of the other tests
+        vault_config['backend'] = 'memory'
+        vault_config['bloom_expected_nodes'] = 10000
+
+    def tearDown(self):
+        vault_config = load_config()['vault']
+        vault_config.clear()
+        vault_config.update(self._vault_config)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import Grid
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_solver import GameSolver
+from n_in_a_row.game_state.game_tree_builder import GameTreeBuilder
+from n_in_a_row.game_state.game_tree_query import GameTreeQuery, GameStateNotSolvedError
+from n_in_a_row.game_state.game_state_vault import GameStateVault, GameStateNotInVaultError
+from n_in_a_row.game_state.storage import MemoryBackend
+
+
+def build_tree(canonical: bool) -> GameTreeBuilder:
+    tree_builder = GameTreeBuilder(
+        GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical),
+        vault=GameStateVault(backend=MemoryBackend())
+    )
+    tree_builder.build_solution_tree()
+    return tree_builder
+
+
+class TestGameTreeQuery(unittest.TestCase):
+
+    def test_same_as_solver(self):
+        solver = GameSolver()
+        for canonical in (False, True):
+            tree_builder = build_tree(canonical)
+            query = GameTreeQuery(tree_builder.vault)
+            for game_state in tree_builder.vault.load_many(list(tree_builder.vault.backend.keys())):
+                for oriented in (game_state, game_state.mirror()):
+                    result = query.evaluate(oriented)
+                    self.assertEqual(solver.solve(oriented), result)
+                    move = query.best_move(oriented)
+                    if game_state.win_state is not None:
+                        self.assertIsNone(move)
+                        continue
+                    self.assertIn(move, oriented.grid.get_possible_moves())
+                    self.assertEqual(
+                        (result.win_state, result.distance - 1), solver.solve(oriented.make_move(move))
+                    )
+
+    def test_principal_variation(self):
+        tree_builder = build_tree(canonical=True)
+        query = GameTreeQuery(tree_builder.vault)
+        for root in (tree_builder.root, tree_builder.root.mirror()):
+            result = query.evaluate(root)
+            moves = query.principal_variation(root)
+            self.assertEqual(result.distance, len(moves))
+            game_state = root
+            for move in moves:
+                self.assertEqual(query.best_move(game_state), move)
+                game_state = game_state.make_move(move)
+            self.assertEqual(result.win_state, game_state.win_state)
+            self.assertListEqual(moves[:3], query.principal_variation(root, 3))
+
+    def test_missing(self):
+        vault = GameStateVault(backend=MemoryBackend())
+        query = GameTreeQuery(vault)
+        game_state = GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3)
+        self.assertRaises(GameStateNotInVaultError, query.evaluate, game_state)
+        vault.save_game_state(game_state)
+        self.assertRaises(GameStateNotSolvedError, query.best_move, game_state)
+
+
+if __name__ == '__main__':
+    unittest.main()
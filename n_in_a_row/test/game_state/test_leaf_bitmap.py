@@ -0,0 +1,48 @@
+import random
+import unittest
+
+import numpy as np
+
+from n_in_a_row.game_state.leaf_bitmap import LeafBitmap
+
+
+class TestLeafBitmap(unittest.TestCase):
+
+    def test_from_ranks(self):
+        leaves = LeafBitmap.from_ranks([5, 1, 70000, 5])
+        self.assertListEqual([1, 5, 70000], list(leaves))
+        self.assertEqual(3, len(leaves))
+        self.assertIn(70000, leaves)
+        self.assertNotIn(4, leaves)
+        self.assertFalse(LeafBitmap.from_ranks([]))
+
+    def test_bitset_container(self):
+        leaves = LeafBitmap.from_ranks(range(0, 20000, 2))
+        self.assertEqual(10000, len(leaves))
+        self.assertIn(19998, leaves)
+        self.assertNotIn(19999, leaves)
+        self.assertListEqual(list(range(0, 20000, 2)), list(leaves))
+
+    def test_union(self):
+        rnd = random.Random(7)
+        for first_size, second_size in [(10, 20), (5000, 30), (6000, 7000)]:
+            first = rnd.sample(range(200000), first_size)
+            second = rnd.sample(range(200000), second_size)
+            union = LeafBitmap.from_ranks(first) | LeafBitmap.from_ranks(second)
+            self.assertListEqual(sorted(set(first) | set(second)), list(union))
+            self.assertEqual(len(set(first) | set(second)), len(union))
+
+    def test_permuted(self):
+        leaves = LeafBitmap.from_ranks([0, 3])
+        self.assertEqual(LeafBitmap.from_ranks([1, 2]), leaves.permuted(np.array([1, 0, 3, 2])))
+
+    def test_bytes(self):
+        leaves = LeafBitmap.from_ranks(list(range(5000)) + [100000, 100007])
+        data = b'xx' + leaves.to_bytes()
+        read, offset = LeafBitmap.read(data, 2)
+        self.assertEqual(leaves, read)
+        self.assertEqual(len(data), offset)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from n_in_a_row.game_state.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LRUCache(max_entries=2)
+        self.assertIsNone(cache.get(1))
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        self.assertEqual('a', cache.get(1))
+        self.assertEqual('b', cache.get(2))
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertIn(1, cache)
+        self.assertNotIn(3, cache)
+
+    def test_evict_by_entries(self):
+        evicted = []
+        cache = LRUCache(max_entries=2, on_evict=lambda *args: evicted.append(args))
+        cache.put(1, 'a', dirty=True)
+        cache.put(2, 'b')
+        cache.get(1)
+        cache.put(3, 'c')
+        self.assertListEqual([(2, 'b', False)], evicted)
+        cache.put(4, 'd')
+        self.assertListEqual([(2, 'b', False), (1, 'a', True)], evicted)
+        self.assertEqual(2, cache.evictions)
+        self.assertEqual(2, len(cache))
+
+    def test_evict_by_bytes(self):
+        cache = LRUCache(max_bytes=100)
+        cache.put(1, 'a', size=60)
+        cache.put(2, 'b', size=30)
+        self.assertEqual(90, cache.size_bytes)
+        cache.put(3, 'c', size=20)
+        self.assertNotIn(1, cache)
+        self.assertEqual(50, cache.size_bytes)
+
+        cache.put(2, 'b', size=10)
+        self.assertEqual(30, cache.size_bytes)
+
+        cache.put(4, 'd', size=500)
+        self.assertEqual(1, len(cache))
+        self.assertEqual('d', cache.get(4))
+
+    def test_dirty(self):
+        cache = LRUCache()
+        cache.put(1, 'a', dirty=True)
+        cache.put(2, 'b')
+        cache.put(3, 'c', dirty=True)
+        self.assertListEqual([(1, 'a'), (3, 'c')], list(cache.dirty_items()))
+        cache.mark_clean()
+        self.assertListEqual([], list(cache.dirty_items()))
+
+
+if __name__ == '__main__':
+    unittest.main()
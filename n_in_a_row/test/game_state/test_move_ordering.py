@@ -0,0 +1,43 @@
+import unittest
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import GridIndex
+from n_in_a_row.game_state.move_ordering import MoveOrdering
+
+
+class TestMoveOrdering(unittest.TestCase):
+
+    def setUp(self):
+        self.move_ordering = MoveOrdering(rows=6, cols=7)
+        self.moves = [GridIndex(5, col) for col in range(7)]
+
+    def cols(self, moves):
+        return [index.col for index in moves]
+
+    def test_center_first(self):
+        ordered = self.cols(self.move_ordering.order(self.moves, 0, Chip.GREEN))
+        self.assertEqual(3, ordered[0])
+        self.assertEqual({2, 4}, set(ordered[1:3]))
+        self.assertEqual({0, 6}, set(ordered[5:]))
+
+    def test_best_col_first(self):
+        ordered = self.cols(self.move_ordering.order(self.moves, 0, Chip.GREEN, best_col=6))
+        self.assertEqual(6, ordered[0])
+        self.assertEqual(3, ordered[1])
+
+    def test_killers(self):
+        self.move_ordering.on_cutoff(GridIndex(5, 0), 2, 1, Chip.GREEN)
+        self.move_ordering.on_cutoff(GridIndex(5, 1), 2, 1, Chip.GREEN)
+        self.move_ordering.on_cutoff(GridIndex(5, 6), 2, 1, Chip.GREEN)
+        self.assertEqual([6, 1, 0], self.cols(self.move_ordering.order(self.moves, 2, Chip.GREEN))[:3])
+        self.assertEqual([3], self.cols(self.move_ordering.order(self.moves, 1, Chip.RED))[:1])
+
+    def test_history(self):
+        self.move_ordering.on_cutoff(GridIndex(5, 0), 2, 3, Chip.RED)
+        self.move_ordering.on_cutoff(GridIndex(5, 5), 4, 1, Chip.RED)
+        self.assertEqual([0, 5, 3], self.cols(self.move_ordering.order(self.moves, 1, Chip.RED))[:3])
+        self.assertEqual(3, self.cols(self.move_ordering.order(self.moves, 1, Chip.GREEN))[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.win_state import WinState
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_solver import GameSolver
+from n_in_a_row.game_state.opening_book import OpeningBook, BookEntry, _expand_levels
+
+
+def play(game_state: GameState, col: int) -> GameState:
+    grid = game_state.grid.snapshot()
+    grid.drop_chip(col, game_state.next_chip)
+    return GameState(
+        grid,
+        next_chip=game_state.next_chip.swap_chip(),
+        chips_in_a_row=game_state.chips_in_a_row,
+        copy_grid=False,
+        canonical=game_state.canonical
+    )
+
+
+class TestOpeningBook(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def root(self, canonical: bool = False) -> GameState:
+        return GameState(BitGrid(rows=3, cols=4), next_chip=Chip.GREEN, chips_in_a_row=3, canonical=canonical)
+
+    def test_same_as_solver(self):
+        for canonical in (False, True):
+            book = OpeningBook.build(self.root(canonical), plies=4)
+            positions = [position for level in _expand_levels(self.root(), 4) for position in level]
+            self.assertEqual(len(positions) if not canonical else len(book), len(book))
+            for position in positions:
+                entry = book.get(position)
+                result = GameSolver().solve(position)
+                self.assertEqual((result.win_state, result.distance), entry[:2])
+                if position.win_state is not None:
+                    self.assertIsNone(entry.best_col)
+                    continue
+                # the best move keeps the result one ply closer
+                child = book.lookup(play(position, entry.best_col))
+                if result.win_state == WinState.DRAW:
+                    self.assertEqual(WinState.DRAW, child.win_state)
+                else:
+                    self.assertEqual((result.win_state, result.distance - 1), child[:2])
+
+    def test_miss(self):
+        book = OpeningBook.build(self.root(), plies=1)
+        position = play(play(self.root(), 0), 0)
+        self.assertIsNone(book.get(position))
+        result = GameSolver().solve(position)
+        self.assertEqual((result.win_state, result.distance), book.lookup(position)[:2])
+        self.assertEqual((0, 1), (book.hits, book.misses))
+
+        other_rules = GameState(BitGrid(rows=3, cols=4), next_chip=Chip.GREEN, chips_in_a_row=2)
+        self.assertIsNone(book.get(other_rules))
+        self.assertEqual(BookEntry(WinState.GREEN, 3, None)[:2], book.lookup(other_rules)[:2])
+
+    def test_save_load(self):
+        path = os.path.join(self._temp_dir.name, 'book.npz')
+        book = OpeningBook.build(self.root(canonical=True), plies=3)
+        book.save(path)
+        loaded = OpeningBook.load(path)
+        self.assertEqual(len(book), len(loaded))
+        self.assertTrue(loaded.canonical)
+        for level in _expand_levels(self.root(canonical=True), 3):
+            for position in level:
+                self.assertEqual(book.get(position), loaded.get(position))
+                self.assertIsNotNone(loaded.get(position.mirror()))
+
+
+if __name__ == '__main__':
+    unittest.main()
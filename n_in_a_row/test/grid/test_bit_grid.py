@@ -0,0 +1,316 @@
+import random
+import unittest
+from copy import deepcopy
+
+from n_in_a_row.grid import grid, bit_grid
+from n_in_a_row.grid.grid_index import GridIndex
+from n_in_a_row.chip import Chip
+from n_in_a_row.win_state import WinState
+
+
+class TestInit(unittest.TestCase):
+
+    def test_ok(self):
+        max_rows, max_cols = 6, 7
+        g = bit_grid.BitGrid(rows=max_rows, cols=max_cols)
+        for i in range(max_rows):
+            for j in range(max_cols):
+                self.assertEqual(Chip.EMPTY, g[i, j])
+        self.assertEqual(max_rows, g.rows)
+        self.assertEqual(max_cols, g.cols)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lambda: bit_grid.BitGrid(rows=0, cols=0))
+        self.assertRaises(ValueError, lambda: bit_grid.BitGrid(rows=-1, cols=3))
+
+    def test_large(self):
+        g = bit_grid.BitGrid(rows=9, cols=12)
+        for col in range(7, 12):
+            g.drop_chip(col, Chip.RED)
+        g.drop_chip(11, Chip.GREEN)
+        self.assertEqual(WinState.RED, g.get_win_state(5))
+        self.assertIsNone(g.get_win_state(6))
+        self.assertEqual(6, g.find_empty_row(11))
+
+
+class TestSetterGetter(unittest.TestCase):
+
+    def test_out_of_bounds_index(self):
+        g = bit_grid.BitGrid(rows=6, cols=5)
+        self.assertRaises(IndexError, lambda: g[6, 5])
+        self.assertRaises(IndexError, lambda: g[0, 5])
+        self.assertRaises(IndexError, lambda: g[-1, 2])
+        self.assertRaises(IndexError, lambda: g[3, -2])
+
+        self.assertRaises(TypeError, lambda: g[3])
+
+    def test_set(self):
+        rows, cols = 6, 7
+        g = bit_grid.BitGrid(rows=rows, cols=cols)
+        for i in range(rows - 1, -1, -1):
+            for j in range(cols):
+                g[i, j] = Chip.GREEN if j % 2 == 0 else Chip.RED
+
+        for i in range(rows - 1, -1, -1):
+            for j in range(cols):
+                self.assertEqual(g[i, j], Chip.GREEN if j % 2 == 0 else Chip.RED)
+
+    def test_invalid_value_set(self):
+        g = bit_grid.BitGrid(rows=6, cols=7)
+
+        def do_assign(row, col, value):
+            g[row, col] = value
+
+        self.assertRaises(TypeError, do_assign, 5, 0, Chip.GREEN.value)
+        self.assertRaises(TypeError, do_assign, 5, 0, None)
+        self.assertRaises(ValueError, do_assign, 5, 1, Chip.EMPTY)
+
+    def test_invalid_cell_set(self):
+        g = bit_grid.BitGrid(rows=4, cols=3)
+
+        def do_assign(row, col, value):
+            g[row, col] = value
+
+        self.assertRaises(grid.CellIsDanglingError, do_assign, 0, 0, Chip.GREEN)
+        self.assertRaises(grid.CellIsDanglingError, do_assign, 2, 2, Chip.GREEN)
+
+        g[3, 0] = Chip.RED
+        g[2, 0] = Chip.GREEN
+        self.assertEqual(Chip.RED, g[3, 0])
+        self.assertEqual(Chip.GREEN, g[2, 0])
+
+        self.assertRaises(grid.CellOccupiedError, do_assign, 3, 0, Chip.RED)
+        self.assertRaises(grid.CellOccupiedError, do_assign, 2, 0, Chip.GREEN)
+
+
+class TestEqualityAndHash(unittest.TestCase):
+
+    def test_same_grids_diff_created(self):
+        g1 = bit_grid.BitGrid(rows=3, cols=4)
+        g1.drop_chip(0, Chip.GREEN)
+        g1.drop_chip(1, Chip.RED)
+        g1.drop_chip(2, Chip.GREEN)
+        g1.drop_chip(0, Chip.RED)
+
+        g2 = bit_grid.BitGrid(rows=3, cols=4)
+        g2.drop_chip(2, Chip.GREEN)
+        g2.drop_chip(0, Chip.GREEN)
+        g2.drop_chip(1, Chip.RED)
+        g2.drop_chip(0, Chip.RED)
+
+        self.assertEqual(g1, g2)
+        self.assertEqual(hash(g1), hash(g2))
+
+    def test_diff_grids(self):
+        g1 = bit_grid.BitGrid(rows=2, cols=3)
+        g1.drop_chip(0, Chip.GREEN)
+        g1.drop_chip(1, Chip.RED)
+
+        g2 = bit_grid.BitGrid(rows=2, cols=3)
+        g2.drop_chip(1, Chip.RED)
+        g2.drop_chip(2, Chip.GREEN)
+
+        self.assertNotEqual(g1, g2)
+        self.assertNotEqual(hash(g1), hash(g2))
+
+        g3 = bit_grid.BitGrid(rows=3, cols=3)
+        g3.drop_chip(0, Chip.GREEN)
+        g3.drop_chip(1, Chip.RED)
+
+        self.assertNotEqual(g1, g3)
+        self.assertNotEqual(hash(g1), hash(g3))
+
+    def test_same_hash_as_grid(self):
+        g1 = grid.Grid(rows=4, cols=5)
+        g2 = bit_grid.BitGrid(rows=4, cols=5)
+        self.assertEqual(hash(g1), hash(g2))
+
+        for col, chip in [(0, Chip.GREEN), (4, Chip.RED), (0, Chip.RED), (2, Chip.GREEN)]:
+            g1.drop_chip(col, chip)
+            g2.drop_chip(col, chip)
+        self.assertEqual(hash(g1), hash(g2))
+
+    def test_deepcopy(self):
+        g1 = bit_grid.BitGrid(rows=3, cols=3)
+        g1.drop_chip(0, Chip.GREEN)
+        g2 = deepcopy(g1)
+        g2.drop_chip(0, Chip.RED)
+
+        self.assertEqual(Chip.EMPTY, g1[1, 0])
+        self.assertEqual(Chip.RED, g2[1, 0])
+        self.assertNotEqual(g1, g2)
+
+    def test_mirrored(self):
+        g1 = grid.Grid(rows=3, cols=4)
+        g2 = bit_grid.BitGrid(rows=3, cols=4)
+        for col, chip in [(0, Chip.GREEN), (0, Chip.RED), (1, Chip.RED), (3, Chip.GREEN)]:
+            g1.drop_chip(col, chip)
+            g2.drop_chip(col, chip)
+
+        mirrored = g2.mirrored()
+        self.assertEqual(hash(g1.mirrored()), hash(mirrored))
+        self.assertEqual(g2, mirrored.mirrored())
+        self.assertEqual(g2.mirror_zobrist_key, mirrored.zobrist_key)
+        self.assertEqual(g1.mirrored().get_possible_moves(), mirrored.get_possible_moves())
+
+
+class TestMoves(unittest.TestCase):
+
+    def test_find_empty_row(self):
+        g = bit_grid.BitGrid(rows=5, cols=3)
+        self.assertEqual(4, g.find_empty_row(0))
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(0, Chip.RED)
+        self.assertEqual(2, g.find_empty_row(0))
+        for _ in range(3):
+            g.drop_chip(0, Chip.RED)
+        self.assertEqual(-1, g.find_empty_row(0))
+        self.assertRaises(ValueError, g.find_empty_row, 3)
+
+    def test_get_possible_moves(self):
+        g = bit_grid.BitGrid(rows=3, cols=3)
+        self.assertListEqual(
+            [GridIndex(2, 0), GridIndex(2, 1), GridIndex(2, 2)],
+            g.get_possible_moves()
+        )
+        g.drop_chip(0, Chip.RED)
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(2, Chip.GREEN)
+        self.assertListEqual(
+            [GridIndex(2, 1), GridIndex(1, 2)],
+            g.get_possible_moves()
+        )
+
+    def test_drop_chip_full(self):
+        g = bit_grid.BitGrid(rows=2, cols=2)
+        for col in range(2):
+            g.drop_chip(col, Chip.GREEN)
+            g.drop_chip(col, Chip.RED)
+        self.assertTrue(g.is_full())
+        self.assertListEqual([], g.get_possible_moves())
+        for col in range(2):
+            self.assertRaises(grid.ColumnFullError, g.drop_chip, col, Chip.RED)
+
+    def test_possible_cols(self):
+        rnd = random.Random(3)
+        for grid_cls in (grid.Grid, bit_grid.BitGrid):
+            g = grid_cls(rows=3, cols=5)
+            chip = Chip.GREEN
+            while not g.is_full():
+                cols = [index.col for index in g.get_possible_moves()]
+                self.assertEqual(cols, list(g.iter_possible_cols()))
+                self.assertEqual(sum(1 << col for col in cols), g.get_possible_cols_mask())
+                g.drop_chip(rnd.choice(cols), chip)
+                chip = chip.swap_chip()
+            self.assertEqual([], list(g.iter_possible_cols()))
+            self.assertEqual(0, g.get_possible_cols_mask())
+
+
+class TestGetWinState(unittest.TestCase):
+
+    def test_lines(self):
+        g = bit_grid.BitGrid(rows=1, cols=4)
+        for col in range(4):
+            g.drop_chip(col, Chip.RED)
+        self.assertEqual(WinState.RED, g.get_win_state(3))
+        self.assertEqual(WinState.RED, g.get_win_state(4))
+
+        g = bit_grid.BitGrid(rows=4, cols=1)
+        for _ in range(4):
+            g.drop_chip(0, Chip.GREEN)
+        self.assertEqual(WinState.GREEN, g.get_win_state(4))
+
+        g = bit_grid.BitGrid(rows=4, cols=4)
+        for col in range(4):
+            for _ in range(3 - col):
+                g.drop_chip(col, Chip.RED)
+            g.drop_chip(col, Chip.GREEN)
+        self.assertEqual(WinState.GREEN, g.get_win_state(4))
+
+        g = bit_grid.BitGrid(rows=4, cols=4)
+        for col in range(4):
+            for _ in range(col):
+                g.drop_chip(col, Chip.RED)
+            g.drop_chip(col, Chip.GREEN)
+        self.assertEqual(WinState.GREEN, g.get_win_state(4))
+
+    def test_no_wrap_between_cols(self):
+        g = bit_grid.BitGrid(rows=3, cols=2)
+        g.drop_chip(0, Chip.RED)
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(1, Chip.GREEN)
+        g.drop_chip(1, Chip.GREEN)
+        self.assertIsNone(g.get_win_state(3))
+
+    def test_draw(self):
+        g = bit_grid.BitGrid(rows=1, cols=4)
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(1, Chip.GREEN)
+        g.drop_chip(2, Chip.GREEN)
+        g.drop_chip(3, Chip.RED)
+        self.assertEqual(WinState.DRAW, g.get_win_state(4))
+
+    def test_same_as_grid(self):
+        rnd = random.Random(42)
+        for _ in range(200):
+            rows, cols = rnd.randint(1, 6), rnd.randint(1, 7)
+            chips_in_a_row = rnd.randint(2, 5)
+            g1 = grid.Grid(rows=rows, cols=cols)
+            g2 = bit_grid.BitGrid(rows=rows, cols=cols)
+            chip = Chip.GREEN
+            while g1.get_win_state(chips_in_a_row) is None:
+                index = rnd.choice(g1.get_possible_moves())
+                g1[index] = chip
+                g2[index] = chip
+                chip = chip.swap_chip()
+                self.assertEqual(g1.get_possible_moves(), g2.get_possible_moves())
+                self.assertEqual(
+                    g1.get_win_state(chips_in_a_row), g2.get_win_state(chips_in_a_row)
+                )
+            self.assertEqual(hash(g1), hash(g2))
+
+
+class TestPushPop(unittest.TestCase):
+
+    def test_pop_restores(self):
+        rnd = random.Random(7)
+        for grid_cls in (grid.Grid, bit_grid.BitGrid):
+            for _ in range(20):
+                rows, cols = rnd.randint(1, 6), rnd.randint(1, 7)
+                chips_in_a_row = rnd.randint(2, 4)
+                g = grid_cls(rows=rows, cols=cols)
+                chip = Chip.GREEN
+                snapshots = []
+                while g.get_win_state(chips_in_a_row) is None:
+                    snapshots.append((g.snapshot(), g.zobrist_key, g.mirror_zobrist_key))
+                    col = rnd.choice(g.get_possible_moves()).col
+                    self.assertEqual(g.find_empty_row(col), g.push(col, chip).row)
+                    chip = chip.swap_chip()
+                while snapshots:
+                    g.pop()
+                    snapshot, zobrist_key, mirror_zobrist_key = snapshots.pop()
+                    self.assertEqual(snapshot, g)
+                    self.assertEqual(zobrist_key, g.zobrist_key)
+                    self.assertEqual(mirror_zobrist_key, g.mirror_zobrist_key)
+                    self.assertEqual(snapshot.get_possible_moves(), g.get_possible_moves())
+                    self.assertEqual(snapshot.get_win_state(chips_in_a_row), g.get_win_state(chips_in_a_row))
+                self.assertRaises(grid.EmptyUndoLogError, g.pop)
+
+    def test_snapshot(self):
+        for grid_cls in (grid.Grid, bit_grid.BitGrid):
+            g = grid_cls(rows=2, cols=2)
+            g.push(0, Chip.GREEN)
+            g.push(0, Chip.RED)
+            snapshot = g.snapshot()
+            self.assertRaises(grid.EmptyUndoLogError, snapshot.pop)
+            self.assertRaises(grid.ColumnFullError, g.push, 0, Chip.GREEN)
+            g.pop()
+            self.assertEqual(Chip.RED, snapshot[0, 0])
+            self.assertEqual(Chip.EMPTY, g[0, 0])
+            self.assertEqual(Chip.GREEN, g[1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
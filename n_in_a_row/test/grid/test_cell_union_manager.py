@@ -7,7 +7,7 @@ from n_in_a_row.grid.cell_union_manager import CellUnionManager
 class TestUnite(unittest.TestCase):
 
     def test_empty(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         self.assertTrue(union.are_united(GridIndex(0, 0), GridIndex(0, 0)))
         self.assertFalse(union.are_united(GridIndex(0, 1), GridIndex(0, 0)))
         self.assertFalse(union.are_united(GridIndex(5, 6), GridIndex(3, 1)))
@@ -18,7 +18,7 @@ class TestUnite(unittest.TestCase):
         self.assertFalse(union.are_united(GridIndex(5, 6), GridIndex(3, 1)))
 
     def test_union_of_two(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(2, 3), GridIndex(1, 5))
         self.assertTrue(union.are_united(GridIndex(2, 3), GridIndex(2, 3)))
         self.assertTrue(union.are_united(GridIndex(1, 5), GridIndex(1, 5)))
@@ -27,7 +27,7 @@ class TestUnite(unittest.TestCase):
         self.assertFalse(union.are_united(GridIndex(1, 5), GridIndex(1, 0)))
 
     def test_one_large_union(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(0, 0), GridIndex(1, 1))
         union.unite_cells(GridIndex(1, 1), GridIndex(2, 2))
         union.unite_cells(GridIndex(2, 2), GridIndex(3, 3))
@@ -138,7 +138,7 @@ class TestUnite(unittest.TestCase):
         self.assertFalse(union.are_united(GridIndex(4, 3), GridIndex(5, 4)))
 
     def test_two_unions(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(1, 0), GridIndex(1, 1))
         union.unite_cells(GridIndex(1, 1), GridIndex(1, 2))
         union.unite_cells(GridIndex(1, 2), GridIndex(1, 3))
@@ -239,7 +239,7 @@ class TestUnite(unittest.TestCase):
         self.assertFalse(union.are_united(GridIndex(1, 4), GridIndex(2, 4)))
 
     def test_three_unions(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(1, 0), GridIndex(1, 1))
         union.unite_cells(GridIndex(2, 0), GridIndex(2, 1))
         union.unite_cells(GridIndex(3, 0), GridIndex(3, 1))
@@ -278,13 +278,13 @@ class TestUnite(unittest.TestCase):
 class TestGetMaxUnionRootAndSize(unittest.TestCase):
 
     def test_empty(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         root, size = union.get_max_union_root_and_size()
         self.assertEqual(GridIndex(0, 0), root)
         self.assertEqual(1, size)
 
     def test_one_union(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(1, 0), GridIndex(1, 1))
         union.unite_cells(GridIndex(1, 1), GridIndex(1, 2))
         union.unite_cells(GridIndex(1, 2), GridIndex(1, 3))
@@ -295,7 +295,7 @@ class TestGetMaxUnionRootAndSize(unittest.TestCase):
         self.assertEqual(6, size)
 
     def test_two_equal_unions(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(1, 0), GridIndex(1, 1))
         union.unite_cells(GridIndex(1, 1), GridIndex(1, 2))
         union.unite_cells(GridIndex(1, 2), GridIndex(1, 3))
@@ -307,7 +307,7 @@ class TestGetMaxUnionRootAndSize(unittest.TestCase):
         self.assertEqual(4, size)
 
     def test_two_unions(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(2, 0), GridIndex(2, 1))
         union.unite_cells(GridIndex(2, 1), GridIndex(2, 2))
         union.unite_cells(GridIndex(2, 2), GridIndex(2, 3))
@@ -325,7 +325,7 @@ class TestGetMaxUnionRootAndSize(unittest.TestCase):
         self.assertEqual(8, size)
 
     def test_three_unions(self):
-        union = CellUnionManager()
+        union = CellUnionManager(6, 7)
         union.unite_cells(GridIndex(2, 0), GridIndex(2, 1))
         union.unite_cells(GridIndex(2, 1), GridIndex(2, 2))
         union.unite_cells(GridIndex(2, 2), GridIndex(2, 3))
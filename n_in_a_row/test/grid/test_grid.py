@@ -4,13 +4,12 @@ from n_in_a_row.grid import grid
 from n_in_a_row.grid.grid_index import GridIndex
 from n_in_a_row.chip import Chip
 from n_in_a_row.win_state import WinState
-from n_in_a_row.config import max_grid_shape
 
 
 class TestInit(unittest.TestCase):
 
     def test_ok(self):
-        max_rows, max_cols = max_grid_shape()
+        max_rows, max_cols = 6, 7
         g = grid.Grid(rows=max_rows, cols=max_cols)
         for i in range(max_rows):
             for j in range(max_cols):
@@ -24,10 +23,14 @@ class TestInit(unittest.TestCase):
         self.assertRaises(ValueError, lambda: grid.Grid(rows=2, cols=-3))
         self.assertRaises(ValueError, lambda: grid.Grid(rows=-1, cols=-3))
 
-        rows, cols = max_grid_shape()
-        self.assertRaises(ValueError, lambda: grid.Grid(rows=rows + 1, cols=cols + 1))
-        self.assertRaises(ValueError, lambda: grid.Grid(rows=3, cols=cols + 1))
-        self.assertRaises(ValueError, lambda: grid.Grid(rows=rows + 1, cols=cols + 1))
+    def test_large(self):
+        g = grid.Grid(rows=9, cols=12)
+        for col in range(7, 12):
+            g.drop_chip(col, Chip.RED)
+        g.drop_chip(11, Chip.GREEN)
+        self.assertEqual(WinState.RED, g.get_win_state(5))
+        self.assertIsNone(g.get_win_state(6))
+        self.assertEqual(6, g.find_empty_row(11))
 
 
 class TestSetterGetter(unittest.TestCase):
@@ -46,7 +49,7 @@ class TestSetterGetter(unittest.TestCase):
         self.assertRaises(TypeError, lambda: g[3])
 
     def test_set(self):
-        rows, cols = max_grid_shape()
+        rows, cols = 6, 7
         g = grid.Grid(rows=rows, cols=cols)
         for i in range(rows - 1, -1, -1):
             for j in range(cols):
@@ -285,17 +288,40 @@ class TestEqualityAndHash(unittest.TestCase):
         self.assertNotEqual(hash(g1), hash(g2))
 
 
+class TestMirrored(unittest.TestCase):
+
+    def test_mirrored(self):
+        g = grid.Grid(rows=3, cols=4)
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(0, Chip.RED)
+        g.drop_chip(1, Chip.RED)
+
+        expected = grid.Grid(rows=3, cols=4)
+        expected.drop_chip(3, Chip.GREEN)
+        expected.drop_chip(3, Chip.RED)
+        expected.drop_chip(2, Chip.RED)
+
+        mirrored = g.mirrored()
+        self.assertEqual(expected, mirrored)
+        self.assertEqual(g, mirrored.mirrored())
+        self.assertEqual(g.mirror_zobrist_key, mirrored.zobrist_key)
+        self.assertEqual(mirrored.mirror_zobrist_key, g.zobrist_key)
+
+        self.assertEqual(WinState.RED, mirrored.get_win_state(2))
+        self.assertEqual(WinState.RED, g.get_win_state(2))
+
+
 class TestFindEmptyRow(unittest.TestCase):
 
     def test_empty_grid(self):
-        rows, cols = max_grid_shape()
+        rows, cols = 6, 7
         g = grid.Grid(rows=rows, cols=cols)
 
         for col in range(cols):
             self.assertEqual(rows - 1, g.find_empty_row(col))
 
     def test_full_grid(self):
-        rows, cols = max_grid_shape()
+        rows, cols = 6, 7
         g = grid.Grid(rows=rows, cols=cols)
 
         for i in range(rows - 1, -1, -1):
@@ -381,6 +407,23 @@ class TestGetPossibleMoves(unittest.TestCase):
         self.assertListEqual([], g.get_possible_moves())
 
 
+class TestNeighborTable(unittest.TestCase):
+
+    def test_neighbors(self):
+        table = grid.neighbor_table(3, 4)
+        self.assertEqual(12, len(table))
+        self.assertEqual(
+            {('col', GridIndex(1, 0)), ('row', GridIndex(0, 1)), ('diag', GridIndex(1, 1))},
+            set(table[0])
+        )
+        self.assertEqual(8, len(table[1 * 4 + 2]))
+        self.assertEqual(
+            {('col', GridIndex(1, 3)), ('row', GridIndex(2, 2)), ('diag', GridIndex(1, 2))},
+            set(table[2 * 4 + 3])
+        )
+        self.assertIs(table, grid.neighbor_table(3, 4))
+
+
 class TestDropChip(unittest.TestCase):
 
     def test_empty_grid(self):
@@ -648,6 +691,21 @@ class TestGetWinState(unittest.TestCase):
         g.drop_chip(2, Chip.GREEN)
         g.drop_chip(3, Chip.RED)
 
+    def test_longest_line(self):
+        g = grid.Grid(rows=3, cols=5)
+        g.drop_chip(0, Chip.GREEN)
+        g.drop_chip(2, Chip.GREEN)
+        g.drop_chip(0, Chip.RED)
+        self.assertIsNone(g.get_win_state(2))
+        # the chip joins two lines
+        g.drop_chip(1, Chip.GREEN)
+        self.assertEqual(WinState.GREEN, g.get_win_state(3))
+        self.assertIsNone(g.get_win_state(4))
+        g.push(3, Chip.GREEN)
+        self.assertEqual(WinState.GREEN, g.get_win_state(4))
+        g.pop()
+        self.assertIsNone(g.get_win_state(4))
+
 
 if __name__ == '__main__':
     unittest.main()
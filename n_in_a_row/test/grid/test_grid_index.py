@@ -1,28 +1,21 @@
 import unittest
+from copy import deepcopy
 
 import numpy as np
 
-from n_in_a_row.grid.grid_index import GridIndex
-from n_in_a_row.config import max_grid_shape
+from n_in_a_row.grid.grid_index import GridIndex, grid_cells
 
 
 class TestGridIndex(unittest.TestCase):
 
-    def test_config(self):
-        max_rows, max_cols = max_grid_shape()
-        self.assertEqual(max_rows, GridIndex.MAX_GRID_ROWS)
-        self.assertEqual(max_cols, GridIndex.MAX_GRID_COLS)
-
     def test_init(self):
         self.assertRaises(AssertionError, lambda: GridIndex(-1, 0))
         self.assertRaises(AssertionError, lambda: GridIndex(0, -2))
         self.assertRaises(AssertionError, lambda: GridIndex(-3, -4))
-        self.assertRaises(AssertionError, lambda: GridIndex(1, 7))
-        self.assertRaises(AssertionError, lambda: GridIndex(6, 4))
-        self.assertRaises(AssertionError, lambda: GridIndex(9, 10))
         GridIndex(0, 0)
         GridIndex(2, 3)
         GridIndex(5, 6)
+        GridIndex(9, 10)
 
     def test_unpacking(self):
         row, col = GridIndex(1, 2)
@@ -67,27 +60,28 @@ class TestGridIndex(unittest.TestCase):
         self.assertNotEqual(hash(GridIndex(2, 3)), hash(GridIndex(3, 2)))
 
     def test_i(self):
-        rows, cols = max_grid_shape()
+        rows, cols = 6, 7
         array = np.arange(rows * cols).reshape((rows, cols))
 
-        self.assertEqual(array[0, 0], GridIndex(0, 0).i)
-        self.assertEqual(array[0, 1], GridIndex(0, 1).i)
-        self.assertEqual(array[1, 0], GridIndex(1, 0).i)
-        self.assertEqual(array[1, 1], GridIndex(1, 1).i)
-        self.assertEqual(array[3, 4], GridIndex(3, 4).i)
-        self.assertEqual(array[5, 2], GridIndex(5, 2).i)
-        self.assertEqual(array[rows - 1, cols - 1], GridIndex(rows - 1, cols - 1).i)
-
-        self.assertEqual((0, 0), GridIndex.from_i(array[0, 0]))
-        self.assertEqual((0, 1), GridIndex.from_i(array[0, 1]))
-        self.assertEqual((1, 0), GridIndex.from_i(array[1, 0]))
-        self.assertEqual((1, 1), GridIndex.from_i(array[1, 1]))
-        self.assertEqual((3, 4), GridIndex.from_i(array[3, 4]))
-        self.assertEqual((5, 2), GridIndex.from_i(array[5, 2]))
-        self.assertEqual((rows - 1, cols - 1), GridIndex.from_i(array[rows - 1, cols - 1]))
+        self.assertEqual(array[0, 0], GridIndex(0, 0).to_i(cols))
+        self.assertEqual(array[0, 1], GridIndex(0, 1).to_i(cols))
+        self.assertEqual(array[1, 0], GridIndex(1, 0).to_i(cols))
+        self.assertEqual(array[1, 1], GridIndex(1, 1).to_i(cols))
+        self.assertEqual(array[3, 4], GridIndex(3, 4).to_i(cols))
+        self.assertEqual(array[5, 2], GridIndex(5, 2).to_i(cols))
+        self.assertEqual(array[rows - 1, cols - 1], GridIndex(rows - 1, cols - 1).to_i(cols))
+        self.assertEqual(9, GridIndex(3, 0).to_i(3))
+
+        self.assertEqual((0, 0), GridIndex.from_i(array[0, 0], cols))
+        self.assertEqual((0, 1), GridIndex.from_i(array[0, 1], cols))
+        self.assertEqual((1, 0), GridIndex.from_i(array[1, 0], cols))
+        self.assertEqual((1, 1), GridIndex.from_i(array[1, 1], cols))
+        self.assertEqual((3, 4), GridIndex.from_i(array[3, 4], cols))
+        self.assertEqual((5, 2), GridIndex.from_i(array[5, 2], cols))
+        self.assertEqual((rows - 1, cols - 1), GridIndex.from_i(array[rows - 1, cols - 1], cols))
 
     def test_ii(self):
-        rows, cols = max_grid_shape()
+        rows, cols = 6, 7
 
         self.assertEqual((0, 0), GridIndex(0, 0).ii)
         self.assertEqual((0, 1), GridIndex(0, 1).ii)
@@ -105,6 +99,19 @@ class TestGridIndex(unittest.TestCase):
         self.assertEqual(GridIndex(3, 2), GridIndex.from_ii((3, 2)))
         self.assertEqual(GridIndex(rows - 1, cols - 1), GridIndex.from_ii((rows - 1, cols - 1)))
 
+    def test_interned(self):
+        rows, cols = 6, 7
+        cells = grid_cells(rows, cols)
+        self.assertEqual(rows * cols, len(cells))
+        for i, index in enumerate(cells):
+            self.assertEqual(i, index.to_i(cols))
+            self.assertIs(index, GridIndex.from_i(i, cols))
+            self.assertIs(index, GridIndex.of(index.row, index.col))
+            self.assertIs(index, GridIndex.from_ii(index.ii))
+            self.assertIs(index, deepcopy(index))
+        self.assertIs(cells[8], grid_cells(2, 4)[5])
+        self.assertEqual(GridIndex(2, 3), GridIndex.of(2, 3))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,79 @@
+import random
+import unittest
+from copy import deepcopy
+
+from n_in_a_row.grid.grid_index import GridIndex
+from n_in_a_row.grid.cell_union_manager import CellUnionManager
+from n_in_a_row.grid.rollback_cell_union_manager import RollbackCellUnionManager
+
+
+class TestRollbackCellUnionManager(unittest.TestCase):
+
+    def test_empty(self):
+        union = RollbackCellUnionManager(6, 7)
+        self.assertEqual((GridIndex(0, 0), 1), union.get_max_union_root_and_size())
+        self.assertTrue(union.are_united(GridIndex(0, 0), GridIndex(0, 0)))
+        self.assertFalse(union.are_united(GridIndex(0, 1), GridIndex(0, 0)))
+
+    def test_same_as_cell_union_manager(self):
+        rnd = random.Random(11)
+        max_rows, max_cols = 6, 7
+        cells = [GridIndex(row, col) for row in range(max_rows) for col in range(max_cols)]
+        for _ in range(20):
+            expected = CellUnionManager(6, 7)
+            union = RollbackCellUnionManager(6, 7)
+            for _ in range(rnd.randint(1, 40)):
+                left, right = rnd.choice(cells), rnd.choice(cells)
+                expected.unite_cells(left, right)
+                union.unite_cells(left, right)
+                self.assertEqual(expected.get_max_union_root_and_size()[1], union.max_size)
+            for _ in range(50):
+                left, right = rnd.choice(cells), rnd.choice(cells)
+                self.assertEqual(expected.are_united(left, right), union.are_united(left, right))
+            root, size = union.get_max_union_root_and_size()
+            self.assertEqual(size, sum(union.are_united(root, cell) for cell in cells))
+
+    def test_rollback(self):
+        union = RollbackCellUnionManager(6, 7)
+        union.unite_cells(GridIndex(0, 0), GridIndex(0, 1))
+        checkpoint = union.checkpoint()
+        union.unite_cells(GridIndex(0, 1), GridIndex(0, 2))
+        inner_checkpoint = union.checkpoint()
+        union.unite_cells(GridIndex(1, 0), GridIndex(0, 2))
+        self.assertTrue(union.are_united(GridIndex(1, 0), GridIndex(0, 0)))
+        self.assertEqual(4, union.max_size)
+
+        union.rollback(inner_checkpoint)
+        self.assertFalse(union.are_united(GridIndex(1, 0), GridIndex(0, 0)))
+        self.assertTrue(union.are_united(GridIndex(0, 2), GridIndex(0, 0)))
+        self.assertEqual(3, union.max_size)
+
+        union.rollback(checkpoint)
+        self.assertFalse(union.are_united(GridIndex(0, 2), GridIndex(0, 0)))
+        self.assertTrue(union.are_united(GridIndex(0, 1), GridIndex(0, 0)))
+        self.assertEqual((GridIndex(0, 0), 2), union.get_max_union_root_and_size())
+
+        union.release()
+        union.unite_cells(GridIndex(0, 1), GridIndex(0, 2))
+        self.assertEqual(0, union.checkpoint())
+
+    def test_random_rollback(self):
+        rnd = random.Random(12)
+        max_rows, max_cols = 6, 7
+        cells = [GridIndex(row, col) for row in range(max_rows) for col in range(max_cols)]
+        union = RollbackCellUnionManager(6, 7)
+        states = []
+        for _ in range(30):
+            states.append((deepcopy(union), union.checkpoint()))
+            for _ in range(rnd.randint(0, 3)):
+                union.unite_cells(rnd.choice(cells), rnd.choice(cells))
+        while states:
+            state, checkpoint = states.pop()
+            union.rollback(checkpoint)
+            self.assertEqual(state.parent, union.parent)
+            self.assertEqual(state.tree_size, union.tree_size)
+            self.assertEqual(state.get_max_union_root_and_size(), union.get_max_union_root_and_size())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import random
+import unittest
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.grid import BitGrid
+from n_in_a_row.game_state import GameState, GameTreeBuilder, GameTreeQuery
+from n_in_a_row.game_state.game_state_vault import GameStateVault
+from n_in_a_row.game_state.storage import create_backend
+from n_in_a_row.server import PositionService, serve
+
+
+async def fetch(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str):
+    writer.write(f'GET {path} HTTP/1.1\r\n\r\n'.encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header == b'\r\n':
+            break
+        name, _, value = header.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def to_path(game_state: GameState) -> str:
+    return (
+        f'/evaluate?rows={game_state.grid.rows}&cols={game_state.grid.cols}'
+        f'&chips_in_a_row={game_state.chips_in_a_row}'
+        f'&cells={"".join(str(cell) for cell in game_state.grid.to_cells())}'
+    )
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        # the server reads the vault of the configured redis
+        config = dict(load_config(), vault={'backend': 'redis'})
+        self.vault = GameStateVault(backend=create_backend(config))
+        tree_builder = GameTreeBuilder(
+            GameState(BitGrid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3),
+            vault=self.vault
+        )
+        tree_builder.build_solution_tree()
+        self.root = tree_builder.root
+
+    def tearDown(self):
+        self.vault.backend.clear()
+
+    def test_evaluate(self):
+        query = GameTreeQuery(self.vault)
+        rnd = random.Random(3)
+        game_states = []
+        game_state = GameState(BitGrid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3)
+        while game_state.win_state is None:
+            game_states.append(game_state)
+            game_state = game_state.make_move(rnd.choice(game_state.grid.get_possible_moves()))
+        game_states.append(game_state)
+
+        async def run():
+            service = PositionService()
+            server = await serve('localhost', 0, service)
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            try:
+                for game_state in game_states:
+                    status, body = await fetch(reader, writer, to_path(game_state))
+                    self.assertEqual(200, status)
+                    result = query.evaluate(game_state)
+                    self.assertEqual(result.win_state.name, body['result'])
+                    self.assertEqual(result.distance, body['distance'])
+                    move = query.best_move(game_state)
+                    self.assertEqual(None if move is None else list(move), body['best_move'])
+
+                status, _ = await fetch(reader, writer, '/evaluate?rows=3&cols=3&chips_in_a_row=3&cells=00')
+                self.assertEqual(400, status)
+                status, _ = await fetch(reader, writer, '/evaluate?rows=2&cols=2&chips_in_a_row=3&cells=0000')
+                self.assertEqual(404, status)
+                status, stats = await fetch(reader, writer, '/stats')
+                self.assertEqual(200, status)
+                self.assertEqual(len(game_states), stats['requests'])
+                self.assertIsNotNone(stats['latency_ms']['p99'])
+            finally:
+                writer.close()
+                server.close()
+                await server.wait_closed()
+                await service.close()
+
+        asyncio.run(run())
+
+    def test_coalesce(self):
+        async def run():
+            service = PositionService()
+            try:
+                answers = await asyncio.gather(*(service.evaluate(self.root) for _ in range(10)))
+                self.assertEqual(1, service.reads)
+                self.assertEqual(9, service.coalesced)
+                self.assertTrue(all(answer == answers[0] for answer in answers))
+                # then from the hot cache
+                await service.evaluate(self.root)
+                self.assertEqual(1, service.reads)
+                self.assertEqual(1, service.cache.hits)
+            finally:
+                await service.close()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
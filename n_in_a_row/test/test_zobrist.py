@@ -0,0 +1,119 @@
+import unittest
+
+from n_in_a_row.chip import Chip
+from n_in_a_row.config import load_config
+from n_in_a_row.grid import Grid, BitGrid
+from n_in_a_row.game_state.game_state import GameState
+from n_in_a_row.game_state.game_state_vault import GameStateProxy
+from n_in_a_row.zobrist import ZOBRIST_HASH_ALGORITHM, cell_keys
+
+
+class ZobristTestCase(unittest.TestCase):
+
+    def setUp(self):
+        config = load_config()
+        self._hash_algorithm = config['hash_algorithm']
+        config['hash_algorithm'] = ZOBRIST_HASH_ALGORITHM
+
+    def tearDown(self):
+        load_config()['hash_algorithm'] = self._hash_algorithm
+
+
+class TestCellKeys(ZobristTestCase):
+
+    def test_keys(self):
+        keys = cell_keys(3, 4)
+        self.assertEqual(3, len(keys))
+        self.assertTrue(all(key == 0 for key in keys[Chip.EMPTY.value]))
+        all_keys = keys[Chip.GREEN.value] + keys[Chip.RED.value]
+        self.assertEqual(len(all_keys), len(set(all_keys)))
+        self.assertTrue(all(0 < key < 2 ** 64 for key in all_keys))
+        self.assertEqual(keys, cell_keys(3, 4))
+
+
+class TestGridKey(ZobristTestCase):
+
+    def test_incremental(self):
+        g1 = Grid(rows=3, cols=4)
+        g1.drop_chip(0, Chip.GREEN)
+        g1.drop_chip(1, Chip.RED)
+        g1.drop_chip(0, Chip.RED)
+
+        g2 = Grid(rows=3, cols=4)
+        g2.drop_chip(1, Chip.RED)
+        g2.drop_chip(0, Chip.GREEN)
+        g2.drop_chip(0, Chip.RED)
+
+        self.assertEqual(g1.zobrist_key, g2.zobrist_key)
+        self.assertEqual(hash(g1), hash(g2))
+
+        keys = cell_keys(3, 4)
+        self.assertEqual(
+            keys[Chip.GREEN.value][2 * 4 + 0] ^ keys[Chip.RED.value][2 * 4 + 1] ^ keys[Chip.RED.value][1 * 4 + 0],
+            g1.zobrist_key
+        )
+
+    def test_diff_grids(self):
+        g1 = Grid(rows=3, cols=4)
+        g1.drop_chip(0, Chip.GREEN)
+        g2 = Grid(rows=3, cols=4)
+        g2.drop_chip(0, Chip.RED)
+        g3 = Grid(rows=4, cols=4)
+        g3.drop_chip(0, Chip.GREEN)
+
+        self.assertNotEqual(hash(g1), hash(g2))
+        self.assertNotEqual(hash(g1), hash(g3))
+
+    def test_same_as_bit_grid(self):
+        g1 = Grid(rows=4, cols=5)
+        g2 = BitGrid(rows=4, cols=5)
+        for col, chip in [(0, Chip.GREEN), (4, Chip.RED), (0, Chip.RED), (2, Chip.GREEN)]:
+            g1.drop_chip(col, chip)
+            g2.drop_chip(col, chip)
+        self.assertEqual(g1.zobrist_key, g2.zobrist_key)
+        self.assertEqual(hash(g1), hash(g2))
+
+
+class TestGameStateId(ZobristTestCase):
+
+    def test_id(self):
+        g = Grid(rows=3, cols=3)
+        g.drop_chip(1, Chip.GREEN)
+
+        gs = GameState(g, next_chip=Chip.RED, chips_in_a_row=3)
+        self.assertEqual(gs.zobrist_hash(), gs.game_state_id)
+        self.assertLess(gs.game_state_id, 2 ** 64)
+
+        same = GameState(g, next_chip=Chip.RED, chips_in_a_row=3)
+        self.assertEqual(gs.game_state_id, same.game_state_id)
+
+        diff_next_chip = GameState(g, next_chip=Chip.GREEN, chips_in_a_row=3)
+        self.assertNotEqual(gs.game_state_id, diff_next_chip.game_state_id)
+
+        diff_chips_in_a_row = GameState(g, next_chip=Chip.RED, chips_in_a_row=2)
+        self.assertNotEqual(gs.game_state_id, diff_chips_in_a_row.game_state_id)
+
+    def test_make_move(self):
+        gs = GameState(Grid(rows=3, cols=3), next_chip=Chip.GREEN, chips_in_a_row=3)
+        child = gs.make_move(gs.grid.get_possible_moves()[2])
+
+        g = Grid(rows=3, cols=3)
+        g.drop_chip(2, Chip.GREEN)
+        self.assertEqual(
+            GameState(g, next_chip=Chip.RED, chips_in_a_row=3).game_state_id,
+            child.game_state_id
+        )
+
+
+class TestProxyHash(ZobristTestCase):
+
+    def test_large_ids(self):
+        game_state_ids = [2 ** 61 + 5, 2 ** 63 - 1, 2 ** 64 - 1]
+        proxies = [GameStateProxy(game_state_id, None) for game_state_id in game_state_ids]
+        for proxy, game_state_id in zip(proxies, game_state_ids):
+            self.assertEqual(hash(game_state_id), hash(proxy))
+        self.assertSetEqual(set(), set(proxies) - set(game_state_ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+from functools import lru_cache
+from typing import Tuple
+
+from n_in_a_row.config import load_config
+
+
+ZOBRIST_HASH_ALGORITHM = 'zobrist'
+
+_MASK_64 = (1 << 64) - 1
+
+_CELL_KIND = 1
+_SIDE_KIND = 2
+_RULE_KIND = 3
+
+
+def _splitmix64(value: int) -> int:
+    value = (value + 0x9E3779B97F4A7C15) & _MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return value ^ (value >> 31)
+
+
+def _make_key(*parts: int) -> int:
+    # keys are derived from the seed instead of drawn from a shared RNG,
+    # so they don't depend on the order tables are built in and stay stable across runs
+    key = load_config()['zobrist_seed'] & _MASK_64
+    for part in parts:
+        key = _splitmix64(key ^ part)
+    return key
+
+
+def is_zobrist_enabled() -> bool:
+    return load_config()['hash_algorithm'] == ZOBRIST_HASH_ALGORITHM
+
+
+@lru_cache(maxsize=None)
+def cell_keys(rows: int, cols: int) -> Tuple[Tuple[int, ...], ...]:
+    # indexed by [Chip.value][row * cols + col], the Chip.EMPTY keys are zeros
+    empty_keys = (0,) * (rows * cols)
+    chip_keys = tuple(
+        tuple(_make_key(_CELL_KIND, row, col, chip_value) for row in range(rows) for col in range(cols))
+        for chip_value in (1, 2)
+    )
+    return (empty_keys,) + chip_keys
+
+
+@lru_cache(maxsize=None)
+def side_key(chip_value: int) -> int:
+    return _make_key(_SIDE_KIND, chip_value)
+
+
+@lru_cache(maxsize=None)
+def rule_key(rows: int, cols: int, chips_in_a_row: int = 0, canonical: bool = False) -> int:
+    if canonical:
+        # canonical states live in their own key space
+        return _make_key(_RULE_KIND, rows, cols, chips_in_a_row, 1)
+    return _make_key(_RULE_KIND, rows, cols, chips_in_a_row)